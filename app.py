@@ -1,14 +1,21 @@
 import logging
 import os
+import threading
+import time
 # from enum import Enum
 from flask import Flask, request, jsonify
 
-from controllers.consts import RecoType
+from controllers.batchers import MicroBatcher
+from controllers.caches import LRUCache
+from controllers.consts import RecoType, DEFAULT_TOP_K, MAX_TOP_K, CACHE_MAXSIZE, CACHE_TTL, VERSION_CHECK_INTERVAL, \
+    BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, BATCH_TIMEOUT
+from controllers.embeddings import sanction_group, sanction_name
 from controllers.handlers import NameHandler
+from controllers.registry import REGISTRY
 from controllers.screeners import NameScreener
-from controllers.translators import NameTranslator
+from controllers.translators import NameTranslator, translation_cache
 from models.db import get_db_hook
-from models.models import Sanctions
+from models.models import Sanctions, SanctionAliases, SanctionKeys, SanctionsVersions
 from utilities.loggings import MultipurposeLogger
 from utilities.utils import load_json_file
 
@@ -30,12 +37,55 @@ glogger = logging.getLogger(__name__)  # Use this logger in your app
 class APIService:
     """Flask API Service for processing names."""
 
-    def __init__(self, factory, logger: MultipurposeLogger = None):
+    def __init__(self, factory, logger: MultipurposeLogger = None, config: dict = None):
         self.app = Flask(__name__)
         self._factory = factory
         self._logger = logger if logger else glogger
-        self._screener = NameScreener(logger=self._logger)
-        self._translator = NameTranslator(logger=self._logger)
+        self._config = config if config else {}
+        # created first, its fuzzy screening workers are forked before the service starts any thread
+        self._screener = NameScreener(logger=self._logger, **self._config.get("screener", {}))
+        self._translator = NameTranslator(
+            logger=self._logger, cache=translation_cache(self._config, logger=self._logger),
+            **self._config.get("translator", {}),
+        )
+
+        # Models are loaded on first use unless warmed here, and unloaded after idle_timeout seconds unused
+        models = self._config.get("models", {})
+        REGISTRY.idle_timeout = models.get("idle_timeout")
+        warm = models.get("warm", [])
+        if "encoder" in warm or "pair" in warm:
+            self._screener.warm(pair="pair" in warm)
+        if "translator" in warm:
+            self._translator.warm()
+        REGISTRY.start_janitor()
+
+        # Concurrent /process requests are coalesced into batched encode and translate calls
+        batching = self._config.get("batching", {})
+        self._encoder = self._translate = None
+        self._batch_timeout = batching.get("timeout", BATCH_TIMEOUT)
+        if batching.get("enabled", False):
+            options = dict(
+                max_batch=batching.get("max_batch", BATCH_MAX_SIZE),
+                max_wait_ms=batching.get("max_wait_ms", BATCH_MAX_WAIT_MS),
+                logger=self._logger,
+            )
+            self._encoder = MicroBatcher(
+                lambda names: list(self._screener.encode(names, batch_size=len(names))), name="encode-batcher",
+                **options,
+            )
+            self._translate = MicroBatcher(self._translator.translate_batch, name="translate-batcher", **options)
+
+        cache = self._config.get("cache", {})
+        self._cache = LRUCache(maxsize=cache.get("maxsize", CACHE_MAXSIZE), ttl=cache.get("ttl", CACHE_TTL))
+        self._sanctions = None
+        self._sanction_names = None  # display names of the sanctions, for the fuzzy screening
+        self._sanction_groups = None  # uids of the sanctions owning them, aliases collapse to their sanction
+        self._list_version = None
+        self._version_checked_at = 0.0
+        self._sanctions_lock = threading.Lock()
+        self._blocking = self._config.get("blocking", {}).get("enabled", False)
+        # Arabic names are matched against the Arabic renderings stored at ingest instead of being translated
+        self._dual_script = self._config.get("dual_script", {}).get("enabled", False)
         self._setup_routes()
 
     def _validate_parameters(self, type, name, threshold):
@@ -48,46 +98,205 @@ class APIService:
             return jsonify({"error": "Invalid threshold"}), 400
         return True
 
+    def _validate_top_k(self, top_k):
+        """Validates the top_k API parameter."""
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or not (1 <= top_k <= MAX_TOP_K):
+            return jsonify({"error": f"Invalid top_k, expected an integer between 1 and {MAX_TOP_K}"}), 400
+        return True
+
+    def _current_sanctions(self):
+        """
+        Returns the loaded sanctions list and its version.
+
+        The latest version recorded by the scraper is checked at most every VERSION_CHECK_INTERVAL
+        seconds, the sanctions are reloaded and the results cache cleared only when it changed.
+        """
+        with self._sanctions_lock:
+            now = time.monotonic()
+            if self._sanctions is not None and now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+                return self._sanctions, self._list_version
+            self._version_checked_at = now
+
+            latest = self._factory.session.query(SanctionsVersions).order_by(SanctionsVersions.id.desc()).first()
+            version = latest.version if latest else None
+            if self._sanctions is None or version != self._list_version:
+                self._logger.info(f"Loading sanctions list version {version}")
+                # aliases are screened alongside the primary names, matches collapse to their sanction
+                self._sanctions = self._factory.session.query(Sanctions).all() \
+                    + self._factory.session.query(SanctionAliases).all()
+                self._sanction_names = [sanction_name(sanction) for sanction in self._sanctions]
+                self._sanction_groups = [sanction_group(sanction) for sanction in self._sanctions]
+                self._list_version = version
+                self._cache.clear()
+            return self._sanctions, self._list_version
+
+    def _candidate_uids(self, name, type):
+        """Fetches the uids in the union of the blocking key buckets probed by a name, see NameHandler.probe_keys."""
+        probes = NameHandler().probe_keys(name=name, type=type)
+        rows = self._factory.session.query(SanctionKeys.uid).filter(SanctionKeys.key.in_(probes)).distinct()
+        return [uid for uid, in rows]
+
+    def _cache_key(self, name, type, threshold, top_k, version):
+        """Builds the results cache key of a screening request."""
+        return (
+            " ".join(NameHandler().clean(name).split()), type.upper(), float(threshold), top_k,
+            NameScreener._model_name, version,
+        )
+
+    @staticmethod
+    def _similarity_threshold(threshold):
+        """Maps a 1-100 threshold to the 0-1 cosine similarity scale of the screener."""
+        return threshold / 100 if threshold > 1 else threshold
+
     def _setup_routes(self):
         """Defines API routes."""
 
+        @self.app.errorhandler(TimeoutError)
+        def batch_timeout(error):
+            # the batched encode / translate result did not come back within the batching timeout
+            return jsonify({"error": "Screening timed out, retry later"}), 503
+
         @self.app.route('/process', methods=['POST'])
         def process():
             data = request.json
             type = data.get("type")
             name = data.get("name")
             threshold = data.get("threshold")
+            top_k = data.get("top_k", DEFAULT_TOP_K)
 
             processed = self._validate_parameters(type, name, threshold)
-            if not processed:
+            if processed is not True:
                 return processed
+            processed = self._validate_top_k(top_k)
+            if processed is not True:
+                return processed
+
+            sanctions, version = self._current_sanctions()
+            key = self._cache_key(name, type, threshold, top_k, version)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return jsonify(cached)
 
             name_handler = NameHandler()
             language = name_handler.detect_language(name)
 
-            if language == 'ar':
-                name = self._translator.translate(name)
-
-            # search_hash = name_handler.hash(name=name, type=type)
+            if language == 'ar' and self._dual_script and self._screener.has_arabic(sanctions):
+                matches = self._screener.arabic_runner(
+                    name=name, sanctions=sanctions, threshold=self._similarity_threshold(threshold), top_k=top_k,
+                )
+                response = {"name": name, "matches": matches}
+                self._cache.put(key, response)
+                return jsonify(response)
 
-            # sanctions = self._factory.session.query(Sanctions).filter(
-            #     Sanctions.search_hash == str(search_hash)
-            # ).all()
+            if language == 'ar':
+                name = self._translate(name, timeout=self._batch_timeout) if self._translate \
+                    else self._translator.translate(name)
 
-            sanctions = self._factory.session.query(Sanctions).all()
-            # print(sanctions)
+            # Only the sanctions of the probed blocking key buckets are scored, instead of the whole list
+            uids = self._candidate_uids(name, type) if self._blocking else None
 
             # matches = self._screener.ditto_runner(name=name, sanctions=sanctions)
             # matches = self._screener.distl_roberta_runner(name=name, sanctions=sanctions)
-            matches = self._screener.sbert_runner(name=name, sanctions=sanctions)
+            matches = self._screener.sbert_runner(
+                name=name, sanctions=sanctions, threshold=self._similarity_threshold(threshold), top_k=top_k,
+                uids=uids, embedding=self._encoder(name, timeout=self._batch_timeout) if self._encoder else None,
+            )
 
-            return jsonify({
+            response = {
                 "name": name,
                 # "language": language,
                 # "hash": search_hash,
                 "matches": matches
+            }
+            self._cache.put(key, response)
+            return jsonify(response)
+
+        @self.app.route('/process/batch', methods=['POST'])
+        def process_batch():
+            data = request.json
+            type = data.get("type")
+            names = data.get("names")
+            threshold = data.get("threshold")
+            batch_size = data.get("batch_size", 64)
+            top_k = data.get("top_k", DEFAULT_TOP_K)
+            method = data.get("method", "sbert")
+
+            if not isinstance(names, list) or not names:
+                return jsonify({"error": "Invalid names"}), 400
+            if not isinstance(batch_size, int) or batch_size < 1:
+                return jsonify({"error": "Invalid batch_size"}), 400
+            if method not in ("sbert", "fuzzy"):
+                return jsonify({"error": "Invalid method, expected 'sbert' or 'fuzzy'"}), 400
+            processed = self._validate_top_k(top_k)
+            if processed is not True:
+                return processed
+            for name in names:
+                processed = self._validate_parameters(type, name, threshold)
+                if processed is not True:
+                    return processed
+
+            sanctions, version = self._current_sanctions()
+            keys = [(method, *self._cache_key(name, type, threshold, top_k, version)) for name in names]
+            results = [self._cache.get(key) for key in keys]
+            pending = [index for index, result in enumerate(results) if result is None]
+
+            if pending:
+                name_handler = NameHandler()
+                queries = [names[index] for index in pending]
+                arabic = [idx for idx, query in enumerate(queries) if name_handler.detect_language(query) == 'ar']
+                if arabic and self._dual_script and self._screener.has_arabic(sanctions):
+                    # Arabic names are screened against the Arabic renderings, the others go on below
+                    for idx in arabic:
+                        results[pending[idx]] = {"name": queries[idx], "matches": self._screener.arabic_runner(
+                            name=queries[idx], sanctions=sanctions,
+                            threshold=self._similarity_threshold(threshold), top_k=top_k,
+                        )}
+                        self._cache.put(keys[pending[idx]], results[pending[idx]])
+                    screened = set(arabic)
+                    latin = [idx for idx in range(len(queries)) if idx not in screened]
+                    pending, queries, arabic = [pending[idx] for idx in latin], [queries[idx] for idx in latin], []
+
+            if pending:
+                translations = self._translator.translate_batch([queries[idx] for idx in arabic])
+                for idx, translation in zip(arabic, translations):
+                    queries[idx] = translation
+                if method == "fuzzy":
+                    # token_sort_ratio is on the 0-100 scale
+                    matches = self._screener.fuzzy_batch_runner(
+                        names=queries, sanctions=self._sanction_names, groups=self._sanction_groups,
+                        threshold=threshold * 100 if threshold <= 1 else threshold, top_k=top_k,
+                    )
+                else:
+                    matches = self._screener.sbert_batch_runner(
+                        names=queries, sanctions=sanctions,
+                        threshold=self._similarity_threshold(threshold),
+                        batch_size=batch_size, top_k=top_k,
+                    )
+                for index, query, query_matches in zip(pending, queries, matches):
+                    results[index] = {"name": query, "matches": query_matches}
+                    self._cache.put(keys[index], results[index])
+
+            return jsonify({"results": results})
+
+        @self.app.route('/stats', methods=['GET'])
+        def stats():
+            return jsonify({
+                "list_version": self._list_version,
+                "cache": self._cache.stats(),
+                "fuzzy_pool": self._screener.fuzzy_stats(),
+                "models": REGISTRY.stats(),
+                "translation_cache": self._translator.cache.stats() if self._translator.cache else None,
+                "transliteration": self._translator.transliterator.stats() if self._translator.transliterator else None,
+                "batching": {
+                    "encode": self._encoder.stats() if self._encoder else None,
+                    "translate": self._translate.stats() if self._translate else None,
+                },
             })
 
+    def close(self):
+        """Releases the screener resources."""
+        self._screener.close()
+
     def run(self):
         """Starts the Flask API server."""
         self.app.run(host="0.0.0.0", port=5000)  # , debug=True)
@@ -108,8 +317,9 @@ def main():
     connection, factory = get_db_hook(config=config.get("database"), )
 
     # Start API Service
-    api_service = APIService(factory=factory, )
+    api_service = APIService(factory=factory, config=config)
     api_service.run()
+    api_service.close()
 
     # Close DB Connection
     factory.close()
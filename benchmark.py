@@ -0,0 +1,565 @@
+import os
+import re
+import time
+from argparse import ArgumentParser, Namespace
+
+import numpy as np
+
+from controllers.embeddings import SanctionsMatrix
+from controllers.indexes import IVFFlatIndex, TrigramIndex, exact_top_k, recall_at_k
+from controllers.quantizers import QuantizedMatrix
+
+GIVEN_NAMES = [
+    "mohammed", "muhammad", "ahmad", "ali", "omar", "hassan", "hussein", "khalid", "ibrahim", "youssef",
+    "abdullah", "abdul rahman", "said", "karim", "tariq", "hamza", "walid", "jamal", "nasser", "faisal",
+    "john", "james", "robert", "michael", "david", "maria", "elena", "ivan", "sergei", "viktor",
+]
+FAMILY_NAMES = [
+    "al hashimi", "al masri", "haddad", "khoury", "nasrallah", "el amin", "darwish", "saleh", "mansour", "farouk",
+    "petrov", "ivanov", "smirnov", "garcia", "lopez", "rodriguez", "smith", "johnson", "kim", "chen",
+    "trading llc", "shipping co", "holdings ltd", "import export", "general trading", "bank", "group",
+]
+
+
+ARABIC_GIVEN_NAMES = [
+    "محمد", "أحمد", "علي", "عمر", "حسن", "حسين", "خالد", "إبراهيم", "يوسف", "عبدالله",
+    "عبدالرحمن", "سعيد", "كريم", "طارق", "حمزة", "وليد", "جمال", "ناصر", "فيصل", "فاطمة",
+]
+ARABIC_FAMILY_NAMES = [
+    "الهاشمي", "المصري", "حداد", "خوري", "نصرالله", "الأمين", "درويش", "صالح", "منصور", "فاروق",
+]
+
+# Arabic names missing from the transliterator tables, with their usual Latin spelling, so the fast path is
+# also measured on names its tables were not written from
+HELD_OUT_GIVEN_NAMES = {
+    "نواف": "Nawaf", "بندر": "Bandar", "تركي": "Turki", "مشعل": "Mishal", "ثامر": "Thamer", "عصمت": "Esmat",
+    "شادي": "Shadi", "لؤي": "Louay", "مؤمن": "Moamen", "أشرف": "Ashraf", "حازم": "Hazem", "باسل": "Basel",
+    "كنان": "Kinan", "عمران": "Imran", "رائد": "Raed", "منذر": "Munther", "لبنى": "Lubna", "رنا": "Rana",
+    "دعاء": "Doaa", "شيماء": "Shaimaa",
+}
+HELD_OUT_FAMILY_NAMES = {
+    "العمري": "Al-Omari", "البرغوثي": "Al-Barghouti", "الكبيسي": "Al-Kubaisi", "الجبوري": "Al-Jubouri",
+    "الدليمي": "Al-Dulaimi", "العبيدي": "Al-Obaidi", "الرفاعي": "Al-Rifai", "السامرائي": "Al-Samarrai",
+    "الخطيب": "Al-Khatib", "عيتاني": "Itani", "قباني": "Qabbani", "الطحان": "Al-Tahhan",
+}
+
+# Common transliteration variants, to respell queries the way customers write them
+RESPELLINGS = {
+    "mohammed": "muhamad", "muhammad": "mohamed", "ahmad": "ahmed", "omar": "umar", "hassan": "hasan",
+    "hussein": "husain", "khalid": "khaled", "youssef": "yusuf", "abdullah": "abdallah", "said": "saeed",
+    "tariq": "tarek", "walid": "waleed", "jamal": "gamal", "nasser": "naser", "faisal": "faysal",
+    "al hashimi": "alhashemi", "el amin": "al ameen", "khoury": "khouri", "darwish": "darweesh",
+    "mansour": "mansur", "farouk": "faruq", "abdul rahman": "abdurrahman",
+}
+
+
+def synthetic_embeddings(size: int, dim: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Return ``size`` unit-norm vectors drawn around ``clusters`` random centres, like name embeddings."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, size=size)] + 0.5 * rng.normal(size=(size, dim))
+    return SanctionsMatrix.normalize(vectors)
+
+
+def synthetic_names(size: int, seed: int = 0) -> list[str]:
+    """Return ``size`` random sanction-like names built from common given and family names."""
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join([
+            *rng.choice(GIVEN_NAMES, size=int(rng.integers(1, 3))),
+            *rng.choice(FAMILY_NAMES, size=int(rng.integers(1, 3))),
+        ])
+        for _ in range(size)
+    ]
+
+
+def perturb(name: str, rng: np.random.Generator) -> str:
+    """Return ``name`` with a dropped character and its tokens shuffled, like a customer typo."""
+    chars = list(name)
+    del chars[int(rng.integers(0, len(chars)))]
+    tokens = "".join(chars).split()
+    rng.shuffle(tokens)
+    return " ".join(tokens)
+
+
+def load_embeddings(config_path: str, size: int) -> np.ndarray:
+    """Return the embeddings of up to ``size`` sanctions loaded from the configured database."""
+    from controllers.screeners import NameScreener
+    from models.db import get_db_hook
+    from models.models import Sanctions
+    from utilities.utils import load_json_file
+
+    connection, factory = get_db_hook(config=load_json_file(config_path).get("database"))
+    try:
+        sanctions = factory.session.query(Sanctions).limit(size).all()
+        return NameScreener().build_matrix(sanctions).matrix
+    finally:
+        factory.close()
+        connection.close()
+
+
+def ann(args: Namespace):
+    """Report the recall and latency of the IVF index against the exact scan for each nprobe."""
+    if args.config:
+        matrix = load_embeddings(args.config, args.size)
+    else:
+        matrix = synthetic_embeddings(args.size, args.dim, seed=args.seed)
+
+    rng = np.random.default_rng(args.seed + 1)
+    picked = matrix[rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)]
+    queries = SanctionsMatrix.normalize(picked + args.noise * rng.normal(size=picked.shape))
+
+    started = time.perf_counter()
+    index = IVFFlatIndex(nlist=args.nlist).build(matrix)
+    print(f"Built index over {len(matrix)} x {matrix.shape[1]} in {time.perf_counter() - started:.2f}s "
+          f"({index.nlist} cells)")
+
+    print(f"{'nprobe':>8} {'recall@' + str(args.k):>10} {'exact ms':>10} {'ann ms':>10}")
+    for nprobe in args.nprobe:
+        report = recall_at_k(index, matrix, queries, top_k=args.k, nprobe=nprobe)
+        print(f"{nprobe:>8} {report['recall']:>10.3f} {report['exact_ms']:>10.3f} {report['ann_ms']:>10.3f}")
+
+
+def blocking(args: Namespace):
+    """Compare the trigram-blocked fuzzy runner with the full scan, in latency and in recall."""
+    from fuzzywuzzy import fuzz
+
+    rng = np.random.default_rng(args.seed)
+    names = synthetic_names(args.size, seed=args.seed)
+    queries = [perturb(names[idx], rng) for idx in rng.integers(0, len(names), size=args.queries)]
+
+    started = time.perf_counter()
+    index = TrigramIndex(names)
+    print(f"Built trigram index over {len(names)} names in {time.perf_counter() - started:.2f}s")
+
+    def screen(query, rows):
+        normalized = index.normalize(query)
+        return {row for row in rows if fuzz.token_sort_ratio(normalized, index.normalized[row]) >= args.threshold}
+
+    started = time.perf_counter()
+    exact = [screen(query, range(len(index))) for query in queries]
+    full_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"Full scan: {full_ms:.2f} ms/query")
+
+    for min_overlap in args.min_overlap:
+        started = time.perf_counter()
+        blocked = [
+            screen(query, index.candidates(query, min_overlap=min_overlap, max_candidates=args.max_candidates))
+            for query in queries
+        ]
+        blocked_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        found = sum(len(truth & got) for truth, got in zip(exact, blocked))
+        recall = found / max(1, sum(len(truth) for truth in exact))
+        print(f"min_overlap={min_overlap:.2f}: {blocked_ms:.2f} ms/query "
+              f"({full_ms / blocked_ms:.1f}x), recall {recall:.3f}")
+
+
+def respell(name: str) -> str:
+    """Return ``name`` with its given and family names replaced by another transliteration."""
+    for original, variant in RESPELLINGS.items():
+        name = re.sub(rf"\b{original}\b", variant, name)
+    return name
+
+
+def phonetic(args: Namespace):
+    """Candidate set size and recall of the phonetic key index on respelled names."""
+    from controllers.phonetics import PhoneticEncoder, PhoneticIndex
+
+    rng = np.random.default_rng(args.seed)
+    names = synthetic_names(args.size, seed=args.seed)
+    targets = rng.integers(0, len(names), size=args.queries)
+    queries = [respell(names[idx]) for idx in targets]
+
+    encoder = PhoneticEncoder()
+    started = time.perf_counter()
+    index = PhoneticIndex(encoder).build(np.arange(len(names)), [encoder.serialize(name) for name in names])
+    print(f"Built phonetic index over {len(names)} names in {time.perf_counter() - started:.2f}s")
+
+    for min_tokens in args.min_tokens:
+        started = time.perf_counter()
+        candidates = [
+            index.candidates(query, min_tokens=min_tokens, max_candidates=args.max_candidates) for query in queries
+        ]
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([target in found for target, found in zip(targets, candidates)])
+        size = np.mean([len(found) for found in candidates])
+        print(f"min_tokens={min_tokens}: {elapsed_ms:.2f} ms/query, {size:.0f} candidates "
+              f"({size / len(names):.1%} of the list), recall {recall:.3f}")
+
+
+def fuzzy(args: Namespace):
+    """Compare the pair-by-pair fuzzywuzzy loop with the bulk multi-threaded scorer."""
+    from fuzzywuzzy import fuzz
+
+    from controllers.pools import ShardedFuzzyPool
+    from controllers.scorers import BulkFuzzyScorer
+
+    rng = np.random.default_rng(args.seed)
+    names = synthetic_names(args.size, seed=args.seed)
+    queries = [perturb(names[idx], rng) for idx in rng.integers(0, len(names), size=args.queries)]
+
+    started = time.perf_counter()
+    loop = [[name for name in names if fuzz.token_sort_ratio(query, name) >= args.threshold] for query in queries]
+    loop_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"fuzzywuzzy loop: {loop_ms:.2f} ms/query")
+
+    scorer = BulkFuzzyScorer(names, workers=args.workers)
+    started = time.perf_counter()
+    bulk = scorer.search(queries, score_cutoff=args.threshold)
+    bulk_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    agreement = np.mean([len(expected) == len(rows) for expected, (rows, _) in zip(loop, bulk)])
+    print(f"bulk scorer ({args.workers} workers): {bulk_ms:.2f} ms/query ({loop_ms / bulk_ms:.1f}x), "
+          f"same match count for {agreement:.1%} of the queries")
+
+    for processes in args.processes:
+        with ShardedFuzzyPool(names, workers=processes) as pool:
+            started = time.perf_counter()
+            sharded = pool.search(queries, score_cutoff=args.threshold)
+            sharded_ms = (time.perf_counter() - started) * 1000 / len(queries)
+            agreement = np.mean([len(expected) == len(rows) for expected, (rows, _) in zip(loop, sharded)])
+            print(f"sharded pool ({pool.workers} processes): {sharded_ms:.2f} ms/query "
+                  f"({loop_ms / sharded_ms:.1f}x), same match count for {agreement:.1%} of the queries, "
+                  f"per-shard ms {[round(ms, 1) for ms in pool.stats()['last_ms']]}")
+
+
+def quantization(args: Namespace):
+    """Report memory footprint, latency and recall of the int8 and binary codes against float32."""
+    matrix = load_embeddings(args.config, args.size) if args.config \
+        else synthetic_embeddings(args.size, args.dim, seed=args.seed)
+    matrix = np.asarray(matrix, dtype=np.float32)
+
+    rng = np.random.default_rng(args.seed + 1)
+    picked = matrix[rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)]
+    queries = SanctionsMatrix.normalize(picked + args.noise * rng.normal(size=picked.shape))
+
+    started = time.perf_counter()
+    exact = exact_top_k(matrix, queries, args.k)
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    print(f"{'codes':>8} {'MiB':>8} {'ms/query':>10} {'recall@' + str(args.k):>10}")
+    print(f"{'float32':>8} {matrix.nbytes / 2 ** 20:>8.1f} {exact_ms:>10.3f} {1:>10.3f}")
+    for mode in QuantizedMatrix.MODES:
+        quantized = QuantizedMatrix(mode=mode, rescore_k=args.rescore_k).build(matrix)
+        started = time.perf_counter()
+        found = quantized.search(queries, top_k=args.k)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([
+            len(set(truth.tolist()) & set(rows.tolist())) / len(truth) for truth, (rows, _) in zip(exact, found)
+        ])
+        print(f"{mode:>8} {quantized.nbytes / 2 ** 20:>8.1f} {elapsed_ms:>10.3f} {recall:>10.3f}")
+
+
+def backends(args: Namespace):
+    """Check the embeddings parity and encode latency of every encoder backend against eager torch."""
+    from controllers.backends import check_parity, load_encoder
+    from controllers.screeners import NameScreener
+
+    names = synthetic_names(args.queries, seed=args.seed)
+    reference = load_encoder(NameScreener._model_name, backend="torch")
+
+    failed = False
+    for backend in args.backends:
+        candidate = load_encoder(NameScreener._model_name, backend=backend, cache_dir=args.cache)
+        report = check_parity(reference, candidate, names, tolerance=args.tolerance)
+        failed |= not report["ok"]
+        print(f"{backend:>10}: max score error {report['max_error']:.4f} (tolerance {args.tolerance}), "
+              f"min self cosine {report['min_self_cosine']:.4f}, "
+              f"{report['reference_ms']:.2f} -> {report['candidate_ms']:.2f} ms/encode")
+
+    if failed:
+        raise SystemExit("Backend parity check failed.")
+
+
+def translator_backends(args: Namespace):
+    """Check the translations parity and latency of every translator backend against eager torch."""
+    from controllers.backends import check_translation_parity
+    from controllers.translators import NameTranslator
+
+    names = synthetic_arabic_names(args.names, seed=args.seed)
+    options = dict(transliterate=False, backend_cache=args.cache, batch_size=args.batch_size)
+    reference = NameTranslator(device="cpu", **options)
+
+    failed = False
+    for backend in args.backends:
+        candidate = NameTranslator(backend=backend, **options)
+        report = check_translation_parity(reference, candidate, names, tolerance=args.tolerance)
+        failed |= not report["ok"]
+        print(f"{backend:>10}: {report['exact']:.1%} identical translations (tolerance {args.tolerance:.0%}), "
+              f"mean token_sort_ratio {report['mean_ratio']:.1f}, "
+              f"{report['reference_ms']:.2f} -> {report['candidate_ms']:.2f} ms/name")
+        for name, expected, actual in report["differences"][:args.show]:
+            print(f"            {name}: {expected!r} -> {actual!r}")
+
+    if failed:
+        raise SystemExit("Translator backend parity check failed.")
+
+
+def batching(args: Namespace):
+    """Throughput and p99 latency of concurrent single-name encodes, direct versus micro-batched."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from controllers.backends import load_encoder
+    from controllers.batchers import MicroBatcher
+    from controllers.screeners import NameScreener
+
+    names = synthetic_names(args.requests, seed=args.seed)
+    model = load_encoder(NameScreener._model_name, backend=args.backend, cache_dir=args.cache)
+    model.encode(names[:8])  # warm-up
+
+    batcher = MicroBatcher(
+        lambda batch: list(model.encode(batch, batch_size=len(batch), normalize_embeddings=True)),
+        max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+    )
+    modes = {
+        "direct": lambda name: model.encode(name, normalize_embeddings=True),
+        "batched": batcher,
+    }
+    for mode, encode in modes.items():
+        def timed(name):
+            started = time.perf_counter()
+            encode(name)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            latencies = np.asarray(list(executor.map(timed, names)))
+        elapsed = time.perf_counter() - started
+        print(f"{mode:>8}: {len(names) / elapsed:.1f} req/s, p50 {np.percentile(latencies, 50):.1f} ms, "
+              f"p99 {np.percentile(latencies, 99):.1f} ms")
+    print(f"Batcher stats: {batcher.stats()}")
+
+
+def synthetic_arabic_names(size: int, seed: int = 0) -> list[str]:
+    """Return ``size`` random Arabic-script person names."""
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join([*rng.choice(ARABIC_GIVEN_NAMES, size=int(rng.integers(1, 3))), rng.choice(ARABIC_FAMILY_NAMES)])
+        for _ in range(size)
+    ]
+
+
+def translation(args: Namespace):
+    """Per-name default generate versus the length-sorted, batched and tuned translate_batch."""
+    from controllers.translators import NameTranslator
+
+    names = synthetic_arabic_names(args.names, seed=args.seed)
+    translator = NameTranslator(batch_size=args.batch_size, num_beams=args.num_beams,
+                                max_new_tokens=args.max_new_tokens)
+    tokenizer, model = translator.tokenizer_ar_en, translator.model_ar_en
+
+    started = time.perf_counter()
+    reference = [
+        tokenizer.decode(model.generate(**tokenizer([name], return_tensors="pt"))[0], skip_special_tokens=True)
+        for name in names
+    ]
+    default_ms = (time.perf_counter() - started) * 1000 / len(names)
+    print(f"default generate, one name per call: {default_ms:.2f} ms/name")
+
+    started = time.perf_counter()
+    batched = translator.translate_batch(names)
+    batched_ms = (time.perf_counter() - started) * 1000 / len(names)
+    agreement = np.mean([expected == actual for expected, actual in zip(reference, batched)])
+    print(f"translate_batch (batch {args.batch_size}, beams {args.num_beams}, max_new_tokens {args.max_new_tokens}): "
+          f"{batched_ms:.2f} ms/name ({default_ms / batched_ms:.1f}x), same output for {agreement:.1%} of the names")
+
+
+def held_out_arabic_names(size: int, seed: int = 0) -> list[tuple[str, str]]:
+    """Return ``size`` random Arabic-script person names missing from the transliterator tables, with their Latin."""
+    from controllers.transliterators import NameTransliterator
+
+    # a held-out name the tables resolve after all would make the hit ratio circular again
+    transliterator = NameTransliterator()
+    given, family = [
+        [(arabic, latin) for arabic, latin in names.items() if transliterator.transliterate(arabic)[1] < 1.0]
+        for names in (HELD_OUT_GIVEN_NAMES, HELD_OUT_FAMILY_NAMES)
+    ]
+    rng = np.random.default_rng(seed)
+    names = []
+    for _ in range(size):
+        parts = [given[idx] for idx in rng.choice(len(given), size=int(rng.integers(1, 3)), replace=False)]
+        parts.append(family[int(rng.integers(len(family)))])
+        names.append((" ".join(arabic for arabic, _ in parts), " ".join(latin for _, latin in parts)))
+    return names
+
+
+def transliteration(args: Namespace):
+    """
+    Hit ratio and latency of the rule-based transliteration fast path, optionally against the model.
+
+    The names drawn from the transliterator tables always hit, so they are mixed with a ``held_out``
+    fraction of names missing from the tables: their hit ratio and the accuracy of their hits against
+    the usual Latin spelling show how the fast path behaves on the names it does not know.
+    """
+    from rapidfuzz import fuzz
+
+    from controllers.transliterators import NameTransliterator
+
+    held_out_size = int(round(args.names * args.held_out))
+    held_out = held_out_arabic_names(held_out_size, seed=args.seed)
+    names = synthetic_arabic_names(args.names - held_out_size, seed=args.seed) + [name for name, _ in held_out]
+    transliterator = NameTransliterator(min_confidence=args.min_confidence)
+
+    started = time.perf_counter()
+    resolved = transliterator.resolve(names)
+    elapsed_us = (time.perf_counter() - started) * 1e6 / len(names)
+    stats = transliterator.stats()
+    print(f"rule-based transliteration: {elapsed_us:.1f} us/name, fast path hit ratio {stats['hit_ratio']:.1%} "
+          f"({args.held_out:.0%} held-out names)")
+
+    def similarity(latin: str, reference: str) -> float:
+        return fuzz.token_sort_ratio(latin.lower().replace("-", " "), reference.lower().replace("-", " "))
+
+    if held_out:
+        held_out_resolved = resolved[len(names) - held_out_size:]
+        hits = [(latin, reference) for latin, (_, reference) in zip(held_out_resolved, held_out) if latin is not None]
+        accuracy = np.mean([similarity(latin, reference) for latin, reference in hits]) if hits else float("nan")
+        # the letter renderings the threshold sends to the model, scored as if they had been kept
+        rendered = np.mean([
+            similarity(transliterator.transliterate(name)[0], reference) for name, reference in held_out
+        ])
+        print(f"held-out names: hit ratio {len(hits) / held_out_size:.1%}, mean token_sort_ratio of the hits "
+              f"to the usual spelling {accuracy:.1f}, of all the rule renderings {rendered:.1f}")
+
+    if args.compare:
+        from controllers.translators import NameTranslator
+
+        hits = [idx for idx, latin in enumerate(resolved) if latin is not None]
+        translator = NameTranslator(transliterate=False)
+        started = time.perf_counter()
+        translations = translator.translate_batch([names[idx] for idx in hits])
+        model_ms = (time.perf_counter() - started) * 1000 / max(len(hits), 1)
+        agreement = np.mean([
+            fuzz.token_sort_ratio(resolved[idx].lower(), translation.lower())
+            for idx, translation in zip(hits, translations)
+        ]) if hits else 0.0
+        print(f"model on the fast path names: {model_ms:.2f} ms/name, "
+              f"mean token_sort_ratio to the transliterations {agreement:.1f}")
+
+
+def cli() -> Namespace:
+    """Configure argument parser and parse cli arguments."""
+
+    parser = ArgumentParser(description="FinTech Name Screener Benchmarks.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    ann_parser = subparsers.add_parser("ann", help="Recall and latency of the ANN index versus the exact scan.")
+    ann_parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="The path to the config .json file, embeds the real sanctions instead of synthetic vectors.",
+    )
+    ann_parser.add_argument("--size", type=int, default=100000, help="Number of indexed vectors.")
+    ann_parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic vectors.")
+    ann_parser.add_argument("--queries", type=int, default=500, help="Number of queries.")
+    ann_parser.add_argument("--noise", type=float, default=0.1, help="Noise added to the sampled queries.")
+    ann_parser.add_argument("--nlist", type=int, default=None, help="Number of IVF cells.")
+    ann_parser.add_argument("--nprobe", type=int, nargs='+', default=[1, 4, 8, 16, 32], help="nprobe values.")
+    ann_parser.add_argument("--k", type=int, default=10, help="Recall cut-off.")
+    ann_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    ann_parser.set_defaults(func=ann)
+
+    blocking_parser = subparsers.add_parser("blocking", help="Trigram-blocked versus full-scan fuzzy matching.")
+    blocking_parser.add_argument("--size", type=int, default=20000, help="Number of sanction names.")
+    blocking_parser.add_argument("--queries", type=int, default=100, help="Number of queries.")
+    blocking_parser.add_argument("--threshold", type=int, default=80, help="token_sort_ratio threshold.")
+    blocking_parser.add_argument("--min-overlap", type=float, nargs='+', default=[0.2, 0.3, 0.5],
+                                 help="Minimum trigram overlap values.")
+    blocking_parser.add_argument("--max-candidates", type=int, default=1000, help="Candidate cap per query.")
+    blocking_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    blocking_parser.set_defaults(func=blocking)
+
+    phonetic_parser = subparsers.add_parser("phonetic", help="Phonetic key candidates of respelled names.")
+    phonetic_parser.add_argument("--size", type=int, default=20000, help="Number of sanction names.")
+    phonetic_parser.add_argument("--queries", type=int, default=500, help="Number of queries.")
+    phonetic_parser.add_argument("--min-tokens", type=int, nargs='+', default=[1, 2, 3],
+                                 help="Minimum query tokens sharing a key.")
+    phonetic_parser.add_argument("--max-candidates", type=int, default=None, help="Candidate cap per query.")
+    phonetic_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    phonetic_parser.set_defaults(func=phonetic)
+
+    fuzzy_parser = subparsers.add_parser("fuzzy", help="fuzzywuzzy loop versus the bulk fuzzy scorer.")
+    fuzzy_parser.add_argument("--size", type=int, default=20000, help="Number of sanction names.")
+    fuzzy_parser.add_argument("--queries", type=int, default=50, help="Number of queries.")
+    fuzzy_parser.add_argument("--threshold", type=int, default=80, help="token_sort_ratio threshold.")
+    fuzzy_parser.add_argument("--workers", type=int, default=-1, help="Scoring threads, -1 for all cores.")
+    fuzzy_parser.add_argument("--processes", type=int, nargs='*', default=[], help="Sharded pool sizes.")
+    fuzzy_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    fuzzy_parser.set_defaults(func=fuzzy)
+
+    quantization_parser = subparsers.add_parser("quantization", help="int8 / binary codes versus float32.")
+    quantization_parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="The path to the config .json file, embeds the real sanctions instead of synthetic vectors.",
+    )
+    quantization_parser.add_argument("--size", type=int, default=100000, help="Number of vectors.")
+    quantization_parser.add_argument("--dim", type=int, default=384, help="Dimension of the synthetic vectors.")
+    quantization_parser.add_argument("--queries", type=int, default=200, help="Number of queries.")
+    quantization_parser.add_argument("--noise", type=float, default=0.1, help="Noise added to the sampled queries.")
+    quantization_parser.add_argument("--rescore-k", type=int, default=200, help="Candidates rescored in float.")
+    quantization_parser.add_argument("--k", type=int, default=10, help="Recall cut-off.")
+    quantization_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    quantization_parser.set_defaults(func=quantization)
+
+    backends_parser = subparsers.add_parser("backends", help="Encoder backends parity and latency versus torch.")
+    backends_parser.add_argument("--backends", type=str, nargs='+', default=["quantized", "onnx"],
+                                 help="Backends compared with eager torch.")
+    backends_parser.add_argument("--cache", type=str, default="stores/backends", help="ONNX export cache.")
+    backends_parser.add_argument("--queries", type=int, default=200, help="Number of names encoded.")
+    backends_parser.add_argument("--tolerance", type=float, default=0.02, help="Maximum score error.")
+    backends_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    backends_parser.set_defaults(func=backends)
+
+    translator_parser = subparsers.add_parser("translator-backends",
+                                              help="Translator backends parity and latency versus torch.")
+    translator_parser.add_argument("--backends", type=str, nargs='+', default=["quantized", "onnx"],
+                                   help="Backends compared with eager torch.")
+    translator_parser.add_argument("--cache", type=str, default="stores/backends", help="ONNX export cache.")
+    translator_parser.add_argument("--names", type=int, default=200, help="Number of Arabic names translated.")
+    translator_parser.add_argument("--batch-size", type=int, default=32, help="Names per generate call.")
+    translator_parser.add_argument("--tolerance", type=float, default=0.95,
+                                   help="Minimum share of translations identical to torch.")
+    translator_parser.add_argument("--show", type=int, default=5, help="Differing translations printed.")
+    translator_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    translator_parser.set_defaults(func=translator_backends)
+
+    batching_parser = subparsers.add_parser("batching", help="Direct versus micro-batched concurrent encodes.")
+    batching_parser.add_argument("--backend", type=str, default="torch", help="Encoder backend.")
+    batching_parser.add_argument("--cache", type=str, default="stores/backends", help="ONNX export cache.")
+    batching_parser.add_argument("--requests", type=int, default=1000, help="Number of single-name requests.")
+    batching_parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients.")
+    batching_parser.add_argument("--max-batch", type=int, default=32, help="Maximum names per batch.")
+    batching_parser.add_argument("--max-wait-ms", type=float, default=5, help="Batching window.")
+    batching_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    batching_parser.set_defaults(func=batching)
+
+    translation_parser = subparsers.add_parser("translation", help="Per-name versus batched name translation.")
+    translation_parser.add_argument("--names", type=int, default=200, help="Number of Arabic names.")
+    translation_parser.add_argument("--batch-size", type=int, default=32, help="Names per generate call.")
+    translation_parser.add_argument("--num-beams", type=int, default=1, help="Beams, 1 for greedy.")
+    translation_parser.add_argument("--max-new-tokens", type=int, default=32, help="Generated tokens per name.")
+    translation_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    translation_parser.set_defaults(func=translation)
+
+    transliteration_parser = subparsers.add_parser("transliteration", help="Rule-based transliteration fast path.")
+    transliteration_parser.add_argument("--names", type=int, default=1000, help="Number of Arabic names.")
+    transliteration_parser.add_argument("--min-confidence", type=float, default=0.9, help="Fast path threshold.")
+    transliteration_parser.add_argument("--held-out", type=float, default=0.5,
+                                        help="Fraction of the names missing from the transliterator tables.")
+    transliteration_parser.add_argument("--compare", action="store_true",
+                                        help="Also translate the fast path names with the model.")
+    transliteration_parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    transliteration_parser.set_defaults(func=transliteration)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = cli()
+
+    if getattr(args, "config", None) and (not os.path.isfile(args.config) or not args.config.endswith('.json')):
+        raise ValueError("Provided Config path 1- Not exists or,\n2- Not a file or,\n3- Not JSON file.")
+
+    args.func(args)
@@ -0,0 +1,428 @@
+import logging
+import os
+import re
+import time
+
+import numpy as np
+
+ENCODER_BACKENDS = ("torch", "quantized", "onnx")
+TRANSLATOR_BACKENDS = ("torch", "quantized", "onnx")
+
+
+def _export_options(torch) -> dict:
+    """``torch.onnx.export`` options keeping the TorchScript exporter, the one taking ``dynamic_axes``."""
+    import inspect
+
+    return {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+
+
+class OnnxSentenceEncoder:
+    """
+    Sentence encoder running an exported transformer graph with ONNX Runtime.
+
+    It mirrors the part of the ``SentenceTransformer`` API the screener uses (``encode`` and
+    ``get_sentence_embedding_dimension``) and applies the mean pooling of the
+    ``sentence-transformers/all-MiniLM-L6-v2`` family on the token embeddings.
+
+    The graph and tokenizer are exported to ``<cache_dir>/<model name>/`` on first use and
+    loaded from there afterwards.
+    """
+
+    GRAPH_FILE = "model.onnx"
+
+    def __init__(self, model_name: str, cache_dir: str, max_length: int = 128, threads: int = None,
+                 logger: logging.Logger = None):
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+        self._max_length = max_length
+
+        if not os.path.exists(os.path.join(self._path, self.GRAPH_FILE)):
+            self.export(model_name, self._path, logger=self._logger)
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self._path)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(self._path, self.GRAPH_FILE), options, providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {node.name for node in self._session.get_inputs()}
+        self._dim = self._session.get_outputs()[0].shape[-1]
+
+    @classmethod
+    def export(cls, model_name: str, path: str, logger: logging.Logger = None):
+        """Export the transformer of ``model_name`` and its tokenizer to ``path``."""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        logger = logger if logger else logging.getLogger(__name__)
+        logger.info(f"Exporting {model_name} to ONNX in '{path}'")
+        os.makedirs(path, exist_ok=True)
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+        sample = tokenizer(["sample name"], return_tensors="pt")
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        axes = {name: {0: "batch", 1: "sequence"} for name in names}
+
+        class Graph(torch.nn.Module):
+            # the inputs are passed by name, their position in the model forward varies across versions
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(names, inputs))).last_hidden_state
+
+        with torch.inference_mode():
+            torch.onnx.export(
+                Graph(), tuple(sample[name] for name in names), os.path.join(path, cls.GRAPH_FILE),
+                input_names=names, output_names=["last_hidden_state"],
+                dynamic_axes={**axes, "last_hidden_state": {0: "batch", 1: "sequence"}},
+                opset_version=14, **_export_options(torch),
+            )
+        tokenizer.save_pretrained(path)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._dim
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """Encode one sentence or a list of sentences into mean-pooled float32 embeddings."""
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+
+        embeddings = np.zeros((len(sentences), self._dim), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            inputs = self._tokenizer(
+                sentences[start:start + batch_size], padding=True, truncation=True,
+                max_length=self._max_length, return_tensors="np",
+            )
+            feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self._inputs}
+            tokens = self._session.run(None, feed)[0]
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            embeddings[start:start + len(tokens)] = (tokens * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.where(norms == 0, 1.0, norms)
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(model_name: str, backend: str = "torch", cache_dir: str = "stores/backends",
+                 logger: logging.Logger = None):
+    """
+    Load the sentence encoder of ``model_name`` on the given CPU inference backend.
+
+    Args:
+        model_name (str): The sentence-transformers model name.
+        backend (str): ``torch`` for the eager model, ``quantized`` for torch dynamic int8
+            quantization of its Linear layers, ``onnx`` for an exported ONNX Runtime graph.
+        cache_dir (str): Where the ONNX export is cached.
+        logger (logging.Logger): Optional logger.
+    """
+    logger = logger if logger else logging.getLogger(__name__)
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unsupported encoder backend '{backend}', expected one of {ENCODER_BACKENDS}.")
+
+    logger.info(f"Loading {model_name} on the '{backend}' backend")
+    if backend == "onnx":
+        return OnnxSentenceEncoder(model_name, cache_dir=cache_dir, logger=logger)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu" if backend == "quantized" else None)
+    if backend == "quantized":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def check_parity(reference, candidate, sentences: list[str], tolerance: float = 0.02) -> dict:
+    """
+    Compare the embeddings of two encoders on ``sentences``.
+
+    Returns:
+        dict: ``max_error`` (largest absolute difference of the pairwise cosine similarities),
+        ``min_self_cosine`` (lowest cosine between the two embeddings of a sentence), the mean
+        encode latency of each encoder and ``ok``, whether ``max_error`` is within ``tolerance``.
+    """
+    timings = {}
+    embeddings = {}
+    for label, encoder in (("reference", reference), ("candidate", candidate)):
+        started = time.perf_counter()
+        embeddings[label] = np.asarray(
+            [encoder.encode(sentence, normalize_embeddings=True) for sentence in sentences], dtype=np.float32,
+        )
+        timings[f"{label}_ms"] = (time.perf_counter() - started) * 1000 / len(sentences)
+
+    expected = embeddings["reference"] @ embeddings["reference"].T
+    actual = embeddings["candidate"] @ embeddings["candidate"].T
+    max_error = float(np.abs(expected - actual).max())
+    return {
+        "max_error": max_error,
+        "min_self_cosine": float((embeddings["reference"] * embeddings["candidate"]).sum(axis=1).min()),
+        **timings,
+        "ok": max_error <= tolerance,
+    }
+
+
+def _as_cache(past):
+    """
+    Wraps per-layer (self key, self value, cross key, cross value) tuples in the `EncoderDecoderCache`
+    the decoders of recent transformers expect, older ones take the tuples as they are.
+    """
+    try:
+        from transformers.cache_utils import EncoderDecoderCache
+    except ImportError:
+        return past
+    if past is None:
+        return None
+    if hasattr(EncoderDecoderCache, "from_legacy_cache"):
+        return EncoderDecoderCache.from_legacy_cache(past)
+    return EncoderDecoderCache(past)  # transformers 5 builds it from the tuples directly
+
+
+def _as_legacy_cache(past) -> tuple:
+    """Returns the per-layer (self key, self value, cross key, cross value) tuples of a decoder cache."""
+    if hasattr(past, "to_legacy_cache"):
+        return past.to_legacy_cache()
+    # transformers 5 iterates (key, value, sliding window) of the self then the cross attention of every layer
+    return tuple(tuple(layer) if len(layer) == 4 else (*layer[:2], *layer[3:5]) for layer in past)
+
+
+class OnnxSeq2SeqModel:
+    """
+    MarianMT translation model running exported encoder and decoder graphs with ONNX Runtime.
+
+    It mirrors the part of the ``MarianMTModel`` API the translator uses (greedy ``generate``).
+    Three graphs are exported to ``<cache_dir>/<model name>/`` on first use and loaded from there
+    afterwards:
+        - ``encoder.onnx``: the source tokens to the encoder hidden states,
+        - ``decoder.onnx``: the first decoding step, which also returns the cross-attention keys
+          and values of every layer, computed once per batch,
+        - ``decoder_with_past.onnx``: the next steps, fed with the last token only and the
+          key / value cache of the previous steps.
+    """
+
+    ENCODER_FILE = "encoder.onnx"
+    DECODER_FILE = "decoder.onnx"
+    DECODER_WITH_PAST_FILE = "decoder_with_past.onnx"
+    CACHE_NAMES = ("self_key", "self_value", "cross_key", "cross_value")
+
+    def __init__(self, model_name: str, cache_dir: str, threads: int = None, logger: logging.Logger = None):
+        import onnxruntime
+        from transformers import AutoConfig
+
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+        if not os.path.exists(os.path.join(self._path, self.DECODER_WITH_PAST_FILE)):
+            self.export(model_name, self._path, logger=self._logger)
+
+        self.config = AutoConfig.from_pretrained(self._path)
+        self._layers = self.config.decoder_layers
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self._encoder, self._decoder, self._decoder_with_past = (
+            onnxruntime.InferenceSession(os.path.join(self._path, name), options, providers=["CPUExecutionProvider"])
+            for name in (self.ENCODER_FILE, self.DECODER_FILE, self.DECODER_WITH_PAST_FILE)
+        )
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @classmethod
+    def _cache_names(cls, prefix: str, layers: int) -> list[str]:
+        return [f"{prefix}.{layer}.{name}" for layer in range(layers) for name in cls.CACHE_NAMES]
+
+    @classmethod
+    def export(cls, model_name: str, path: str, logger: logging.Logger = None):
+        """Export the encoder and decoder graphs of ``model_name``, with its tokenizer and config, to ``path``."""
+        import torch
+        from transformers import MarianMTModel, MarianTokenizer
+
+        logger = logger if logger else logging.getLogger(__name__)
+        logger.info(f"Exporting {model_name} to ONNX in '{path}'")
+        os.makedirs(path, exist_ok=True)
+
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = MarianMTModel.from_pretrained(model_name).eval()
+        layers = model.config.decoder_layers
+
+        class Graph(torch.nn.Module):
+            # the model is a submodule, so the tracer takes its weights as parameters
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+        class Encoder(Graph):
+            def forward(self, input_ids, attention_mask):
+                return self.model.get_encoder()(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+        class Decoder(Graph):
+            def forward(self, decoder_input_ids, encoder_hidden_states, encoder_attention_mask, *cache):
+                past = tuple(tuple(cache[layer * 4:layer * 4 + 4]) for layer in range(layers)) if cache else None
+                outputs = self.model.get_decoder()(
+                    input_ids=decoder_input_ids, encoder_hidden_states=encoder_hidden_states,
+                    encoder_attention_mask=encoder_attention_mask, past_key_values=_as_cache(past), use_cache=True,
+                )
+                logits = self.model.lm_head(outputs.last_hidden_state[:, -1]) + self.model.final_logits_bias
+                return (logits, *(tensor for layer in _as_legacy_cache(outputs.past_key_values) for tensor in layer))
+
+        sample = tokenizer(["محمد علي"], return_tensors="pt")
+        start = torch.full((1, 1), model.config.decoder_start_token_id, dtype=torch.long)
+        present = cls._cache_names("present", layers)
+        past = cls._cache_names("past", layers)
+        cache_axes = {
+            name: {0: "batch", 2: "encoder_sequence" if "cross" in name else "past_sequence"}
+            for name in past + present
+        }
+        batch_axes = {"batch": {0: "batch"}, "sequence": {0: "batch", 1: "sequence"}}
+
+        with torch.inference_mode():
+            hidden = Encoder()(sample["input_ids"], sample["attention_mask"])
+            torch.onnx.export(
+                Encoder(), (sample["input_ids"], sample["attention_mask"]), os.path.join(path, cls.ENCODER_FILE),
+                input_names=["input_ids", "attention_mask"], output_names=["encoder_hidden_states"],
+                dynamic_axes={name: batch_axes["sequence"] for name in
+                              ("input_ids", "attention_mask", "encoder_hidden_states")},
+                opset_version=14, **_export_options(torch),
+            )
+
+            first = (start, hidden, sample["attention_mask"])
+            torch.onnx.export(
+                Decoder(), first, os.path.join(path, cls.DECODER_FILE),
+                input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask"],
+                output_names=["logits", *present],
+                dynamic_axes={
+                    "decoder_input_ids": batch_axes["batch"], "logits": batch_axes["batch"],
+                    "encoder_hidden_states": batch_axes["sequence"], "encoder_attention_mask": batch_axes["sequence"],
+                    **{name: axes for name, axes in cache_axes.items() if name in present},
+                },
+                opset_version=14, **_export_options(torch),
+            )
+
+            cache = Decoder()(*first)[1:]
+            torch.onnx.export(
+                Decoder(), (*first, *cache), os.path.join(path, cls.DECODER_WITH_PAST_FILE),
+                input_names=["decoder_input_ids", "encoder_hidden_states", "encoder_attention_mask", *past],
+                output_names=["logits", *present],
+                dynamic_axes={
+                    "decoder_input_ids": batch_axes["batch"], "logits": batch_axes["batch"],
+                    "encoder_hidden_states": batch_axes["sequence"], "encoder_attention_mask": batch_axes["sequence"],
+                    **cache_axes,
+                },
+                opset_version=14, **_export_options(torch),
+            )
+        tokenizer.save_pretrained(path)
+        model.config.save_pretrained(path)
+
+    def generate(self, input_ids, attention_mask, num_beams: int = 1, max_new_tokens: int = 32, **kwargs) -> np.ndarray:
+        """
+        Greedy decoding of the given source tokens, reusing the key / value cache across steps.
+
+        Returns:
+            np.ndarray: The generated token ids, starting with the decoder start token.
+        """
+        if num_beams > 1:
+            self._logger.warning(f"The ONNX translation backend decodes greedily, ignoring num_beams={num_beams}")
+        input_ids = np.asarray(input_ids, dtype=np.int64)
+        attention_mask = np.asarray(attention_mask, dtype=np.int64)
+        batch = len(input_ids)
+        pad, eos = self.config.pad_token_id, self.config.eos_token_id
+        forced_eos = getattr(self.config, "forced_eos_token_id", None)
+
+        hidden = self._encoder.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+        encoder = {"encoder_hidden_states": hidden, "encoder_attention_mask": attention_mask}
+        generated = np.full((batch, 1), self.config.decoder_start_token_id, dtype=np.int64)
+        finished = np.zeros(batch, dtype=bool)
+        cache = None
+        for step in range(max_new_tokens):
+            feed = {"decoder_input_ids": generated[:, -1:], **encoder}
+            if cache is None:
+                logits, *cache = self._decoder.run(None, feed)
+            else:
+                feed.update(zip(self._cache_names("past", self._layers), cache))
+                logits, *cache = self._decoder_with_past.run(None, feed)
+            logits[:, pad] = -np.inf  # the padding token is never generated
+            tokens = logits.argmax(axis=-1)
+            if forced_eos is not None and step == max_new_tokens - 1:
+                tokens[:] = forced_eos  # like MarianMTModel.generate, a sequence cut short still ends
+            tokens = np.where(finished, pad, tokens)
+            generated = np.concatenate([generated, tokens[:, None]], axis=1)
+            finished |= tokens == eos
+            if finished.all():
+                break
+        return generated
+
+
+def load_translator(model_name: str, backend: str = "torch", cache_dir: str = "stores/backends",
+                    device: str = "cpu", logger: logging.Logger = None) -> tuple:
+    """
+    Load the MarianMT tokenizer and model of ``model_name`` on the given inference backend.
+
+    Args:
+        model_name (str): The MarianMT model name.
+        backend (str): ``torch`` for the eager model on ``device``, ``quantized`` for torch dynamic
+            int8 quantization of its Linear layers on CPU, ``onnx`` for exported ONNX Runtime graphs.
+        cache_dir (str): Where the ONNX export is cached.
+        device (str): Torch device of the eager model.
+        logger (logging.Logger): Optional logger.
+
+    Returns:
+        tuple: The tokenizer and the model.
+    """
+    from transformers import MarianMTModel, MarianTokenizer
+
+    logger = logger if logger else logging.getLogger(__name__)
+    if backend not in TRANSLATOR_BACKENDS:
+        raise ValueError(f"Unsupported translator backend '{backend}', expected one of {TRANSLATOR_BACKENDS}.")
+
+    logger.info(f"Loading translation model {model_name} on the '{backend}' backend")
+    if backend == "onnx":
+        model = OnnxSeq2SeqModel(model_name, cache_dir=cache_dir, logger=logger)
+        return MarianTokenizer.from_pretrained(model.path), model
+
+    tokenizer = MarianTokenizer.from_pretrained(model_name)
+    model = MarianMTModel.from_pretrained(model_name).eval()
+    if backend == "quantized":
+        import torch
+
+        return tokenizer, torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model.to(device)
+
+
+def check_translation_parity(reference, candidate, names: list[str], tolerance: float = 0.95) -> dict:
+    """
+    Compare the translations of two translators on ``names``.
+
+    Returns:
+        dict: ``exact`` (share of identical translations), ``mean_ratio`` (mean token_sort_ratio
+        of the translations), the mean translation latency of each translator, the differing
+        translations and ``ok``, whether ``exact`` is at least ``tolerance``.
+    """
+    from rapidfuzz import fuzz
+
+    timings = {}
+    translations = {}
+    for label, translator in (("reference", reference), ("candidate", candidate)):
+        started = time.perf_counter()
+        translations[label] = translator.translate_batch(names)
+        timings[f"{label}_ms"] = (time.perf_counter() - started) * 1000 / len(names)
+
+    pairs = list(zip(names, translations["reference"], translations["candidate"]))
+    exact = float(np.mean([expected == actual for _, expected, actual in pairs]))
+    return {
+        "exact": exact,
+        "mean_ratio": float(np.mean([fuzz.token_sort_ratio(expected, actual) for _, expected, actual in pairs])),
+        **timings,
+        "differences": [pair for pair in pairs if pair[1] != pair[2]],
+        "ok": exact >= tolerance,
+    }
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class MicroBatcher:
+    """
+    Coalesces the items submitted by concurrent callers into batched calls of ``function``.
+
+    A background thread waits for a first item, then keeps collecting for at most ``max_wait_ms``
+    milliseconds or until ``max_batch`` items are pending, calls ``function`` once on the whole
+    batch and fans its results back out to the waiting callers. Every future of a batch is resolved,
+    whatever ``function`` does: when the batched call fails, the items are retried one by one so an
+    exception only reaches the callers of the items raising it. A worker stopped by a
+    ``BaseException`` is restarted by the next ``submit``.
+
+    Attributes:
+        batches (int): Number of batched calls so far.
+        items (int): Number of items processed so far.
+    """
+
+    def __init__(self, function: Callable[[list], list], max_batch: int = 32, max_wait_ms: float = 5,
+                 name: str = "batcher", logger: logging.Logger = None):
+        """
+        Args:
+            function: Called with a list of items, returns the list of their results in the same order.
+            max_batch (int): Maximum items per call.
+            max_wait_ms (float): Maximum time the first item of a batch waits for others, in milliseconds.
+            name (str): Name of the batching thread, for the logs.
+            logger (logging.Logger): Optional logger.
+        """
+        self._function = function
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._queue: queue.Queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._name = name
+        self._lock = threading.Lock()  # guards the restart of the worker
+        self._thread: threading.Thread = None
+        self._start()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Queues ``item`` and returns the future of its result, restarting the worker if it died."""
+        if not self._thread.is_alive():
+            with self._lock:
+                if not self._thread.is_alive():
+                    self._logger.warning(f"The {self._name} worker died, restarting it.")
+                    self._start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any, timeout: float = None) -> Any:
+        """
+        Queues ``item`` and waits for its result.
+
+        Raises:
+            TimeoutError: When the result is not ready within ``timeout`` seconds.
+        """
+        return self.submit(item).result(timeout=timeout)
+
+    def _collect(self) -> list:
+        """Blocks for a first item, then collects the others arriving within the batching window."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _call(self, items: list) -> list:
+        """Calls ``function`` on ``items``, raising when it does not return one result per item."""
+        results = list(self._function(items))
+        if len(results) != len(items):
+            raise RuntimeError(f"Batched call returned {len(results)} results for {len(items)} items.")
+        return results
+
+    def _run(self):
+        while True:
+            # the items cancelled by their callers while queued are dropped, the others can't be cancelled anymore
+            batch = [(item, future) for item, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            outcomes = [None] * len(batch)  # (result, error) of each item, None while unresolved
+            try:
+                try:
+                    outcomes = [(result, None) for result in self._call([item for item, _ in batch])]
+                except Exception as error:
+                    self._logger.error(f"Batched call of {len(batch)} items failed: {error}")
+                    if len(batch) == 1:
+                        raise
+                    # retried one by one, so only the callers of the failing items see an error
+                    for idx, (item, _) in enumerate(batch):
+                        try:
+                            outcomes[idx] = (self._call([item])[0], None)
+                        except Exception as item_error:
+                            outcomes[idx] = (None, item_error)
+                self.batches += 1
+                self.items += len(batch)
+            except BaseException as error:
+                # the callers get the exception of their item, or a RuntimeError when the worker itself stops
+                failure = error if isinstance(error, Exception) else RuntimeError(f"The {self._name} worker stopped.")
+                outcomes = [outcome if outcome else (None, failure) for outcome in outcomes]
+                if failure is not error:
+                    raise  # the next submit restarts the worker
+            finally:
+                for (_, future), outcome in zip(batch, outcomes):
+                    result, error = outcome if outcome else (None, RuntimeError("The batched call was interrupted."))
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+
+    def stats(self) -> dict:
+        """Returns the number of batched calls and items, and the mean batch size."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch": self.items / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
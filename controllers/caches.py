@@ -0,0 +1,179 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded least-recently-used cache with an optional time-to-live.
+
+    Attributes:
+        maxsize (int): Maximum number of entries, the least recently used one is evicted beyond it.
+        ttl (float): Seconds an entry stays valid, None for no expiry.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups not found (or expired) in the cache.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 10000, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached for ``key``, or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is not self._MISSING and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = self._MISSING
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """Cache ``value`` under ``key``, evicting the least recently used entries beyond ``maxsize``."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry, the hit and miss counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return the size, hit and miss counters and hit rate of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TranslationCache:
+    """
+    Two-level cache of name translations: an in-process `LRUCache` in front of a SQLite file.
+
+    Entries are keyed by the model name and the normalized source name (NFKC, collapsed
+    whitespace), so a model change never serves stale translations. The SQLite file, in WAL
+    mode, is shared by every worker process and survives restarts, each thread uses its own
+    connection to it.
+
+    Attributes:
+        memory (LRUCache): The in-process level.
+        path (str): The SQLite file of the persistent level, None to keep only the in-process one.
+        disk_hits (int): Number of lookups missed in memory and served from the SQLite file.
+    """
+
+    def __init__(self, path: str = None, maxsize: int = 10000, logger: logging.Logger = None):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.path = path
+        self.disk_hits = 0
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._local = threading.local()
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._connection() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "model TEXT NOT NULL, source TEXT NOT NULL, translation TEXT NOT NULL, created_at REAL NOT NULL, "
+                    "PRIMARY KEY (model, source))"
+                )
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Returns the cache form of a source name: NFKC normalized, with collapsed whitespace."""
+        return " ".join(unicodedata.normalize("NFKC", name).split())
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, model: str, names: list[str]) -> dict[str, str]:
+        """
+        Looks the given names up, in memory first then in the SQLite file.
+
+        Returns:
+            dict[str, str]: The cached translations, by normalized source name.
+        """
+        found, missing = {}, []
+        for source in dict.fromkeys(self.normalize(name) for name in names):
+            translation = self.memory.get((model, source))
+            if translation is None:
+                missing.append(source)
+            else:
+                found[source] = translation
+
+        if missing and self.path:
+            connection = self._connection()
+            for start in range(0, len(missing), 500):  # below the SQLite bound parameters limit
+                chunk = missing[start:start + 500]
+                rows = connection.execute(
+                    f"SELECT source, translation FROM translations WHERE model = ? "
+                    f"AND source IN ({', '.join('?' * len(chunk))})",
+                    (model, *chunk),
+                ).fetchall()
+                for source, translation in rows:
+                    self.memory.put((model, source), translation)
+                    found[source] = translation
+                self.disk_hits += len(rows)
+        return found
+
+    def put_many(self, model: str, translations: dict[str, str]):
+        """Stores the translations of the given source names in both levels."""
+        translations = {self.normalize(name): translation for name, translation in translations.items()}
+        for source, translation in translations.items():
+            self.memory.put((model, source), translation)
+        if translations and self.path:
+            now = time.time()
+            with self._connection() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO translations (model, source, translation, created_at) VALUES (?, ?, ?, ?)",
+                    [(model, source, translation, now) for source, translation in translations.items()],
+                )
+
+    def __len__(self):
+        """Number of translations in the SQLite file, or in memory without one."""
+        if not self.path:
+            return len(self.memory)
+        return self._connection().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns the in-memory and on-disk hit counters, and the overall hit rate."""
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        misses = memory["misses"] - self.disk_hits
+        return {
+            "path": self.path,
+            "memory": memory,
+            "disk_hits": self.disk_hits,
+            "misses": misses,
+            "hit_rate": (lookups - misses) / lookups if lookups else 0.0,
+        }
@@ -4,8 +4,51 @@ from enum import Enum
 # Constants
 OFAC_API_URL = "https://api.treasury.gov/ofac/sanctions/list"
 THRESHOLD = 80  # Fuzzy matching threshold
+DEFAULT_TOP_K = 20  # matches returned per screened name when the caller does not ask for a top_k
+MAX_TOP_K = 100  # upper bound of the top_k a caller may ask for
+
+# Screening results cache of the API service
+CACHE_MAXSIZE = 10000
+CACHE_TTL = 3600  # seconds
+VERSION_CHECK_INTERVAL = 30  # seconds between two checks of the latest sanctions list version
+
+# Micro-batching of the concurrent /process requests
+BATCH_MAX_SIZE = 32  # requests coalesced into one encode / translate call
+BATCH_MAX_WAIT_MS = 5  # longest a request waits for others to join its batch
+BATCH_TIMEOUT = 30  # seconds a request waits for its batched encode / translate result
 API_KEY = "your_ofac_api_key_here"
 
+# Approximate nearest neighbour index over the sanctions embeddings
+ANN_NLIST = None  # number of IVF cells, None for sqrt(list size)
+ANN_NPROBE = 8  # cells scanned per query, higher is slower with better recall
+QUANTIZED_RESCORE_K = 200  # candidates of the int8 / binary prefilter rescored with the float embeddings
+
+# Trigram blocking in front of the fuzzy runner
+TRIGRAM_MIN_OVERLAP = 0.3  # fraction of the query trigrams a candidate must share
+TRIGRAM_MAX_CANDIDATES = 1000  # candidates passed to the fuzzy scorer per query
+
+# Phonetic key blocking of transliterated names
+PHONETIC_MIN_TOKENS = 2  # query tokens a candidate must share a phonetic key with, at most all of them
+PHONETIC_MAX_CANDIDATES = 2000  # candidates passed to the scorers per query
+
+# Screening cascade budgets: lexical prefilter -> bi-encoder -> cross-encoder rerank
+CASCADE_LEXICAL_K = 500
+CASCADE_DENSE_K = 50
+CASCADE_RERANK_K = 10
+
+# Batched MarianMT name translation
+TRANSLATION_BATCH_SIZE = 32  # names per generate call
+TRANSLATION_NUM_BEAMS = 1  # 1 for greedy decoding, names rarely gain from beam search
+TRANSLATION_MAX_NEW_TOKENS = 32  # generated tokens per name, names are short
+TRANSLATION_MAX_LENGTH = 64  # source tokens per name, longer names are truncated
+TRANSLATION_CACHE_MAXSIZE = 50000  # translations kept in memory, in front of the shared SQLite file
+TRANSLATION_CACHE_PATH = "stores/translations.sqlite"
+TRANSLITERATION_MIN_CONFIDENCE = 0.9  # names transliterated with less confidence go to the translation model
+
+# Batched pairwise classifier inference
+PAIR_BATCH_SIZE = 64
+PAIR_MAX_LENGTH = 64  # tokens per (name, sanction) pair, names are short
+
 
 ALL = "ALL"
 
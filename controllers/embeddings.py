@@ -0,0 +1,329 @@
+import hashlib
+import logging
+
+import numpy as np
+
+
+def sanction_name(sanction) -> str:
+    """
+    Return the display name of a sanction as '<first_name> <last_name>', skipping empty parts.
+
+    The ``full_name`` column precomputed at ingest is used when present, so no string is built.
+    """
+    full_name = getattr(sanction, "full_name", None)
+    if full_name:
+        return full_name
+    return " ".join(part for part in (sanction.first_name, sanction.last_name) if part)
+
+
+def sanction_group(sanction) -> int:
+    """Return the uid of the sanction a row belongs to, the owning sanction uid for an alias."""
+    group = getattr(sanction, "sanction_uid", None)
+    return int(group if group is not None else sanction.uid)
+
+
+def sanction_key(sanction) -> int:
+    """Return the row key of a sanction or alias, aliases use their negated uid so both never collide."""
+    return -int(sanction.uid) if getattr(sanction, "sanction_uid", None) is not None else int(sanction.uid)
+
+
+def content_hash(sanction) -> str:
+    """Return a digest of the name fields of a sanction, it changes whenever its embedding would."""
+    content = f"{sanction.first_name}\x1f{sanction.last_name}"
+    if getattr(sanction, "sanction_uid", None) is not None:
+        content += f"\x1f{sanction.sanction_uid}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def sanctions_version(uids, hashes) -> str:
+    """Return a digest identifying a sanctions list by its (uid, content hash) pairs, in any order."""
+    digest = hashlib.sha256()
+    for uid, value in sorted(zip((int(uid) for uid in uids), hashes)):
+        digest.update(f"{uid}\t{value}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def select_top_k(rows: np.ndarray, scores: np.ndarray, k: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """Return the ``k`` best (rows, scores), all of them when ``k`` is None, sorted by descending score."""
+    rows, scores = np.asarray(rows), np.asarray(scores)
+    if k is not None and len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+        rows, scores = rows[best], scores[best]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+def collapse_groups(rows: np.ndarray, scores: np.ndarray, groups: np.ndarray,
+                    k: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the best-scoring of the ``rows`` of each group (sanction), at most ``k`` of them, by descending score."""
+    rows, scores = select_top_k(np.asarray(rows), np.asarray(scores))
+    _, first = np.unique(np.asarray(groups)[rows], return_index=True)
+    first.sort()
+    return rows[first][:k], scores[first][:k]
+
+
+class SanctionsMatrix:
+    """
+    Row-aligned, L2-normalized float32 embeddings of a sanctions list.
+
+    Row ``i`` of ``matrix`` is the embedding of ``names[i]`` whose row key is ``uids[i]``,
+    so a cosine similarity against the whole list is a single matrix-vector product.
+
+    The aliases of a sanction get their own rows, keyed by `sanction_key`, and ``groups[i]``
+    is the uid of the sanction owning row ``i``. Retrieval keeps the best-scoring row of
+    every sanction, see `collapse`.
+
+    The matrix can be updated incrementally with `apply_delta`: rows of deleted or changed
+    sanctions are tombstoned in ``alive`` and new embeddings are appended, until `compacted`
+    drops the dead rows.
+
+    Attributes:
+        uids (np.ndarray): int64 array of row keys, the sanction uid for primary names.
+        groups (np.ndarray): int64 array of the uids of the sanctions owning the rows.
+        names (list[str]): Sanction display names.
+        hashes (list[str]): Content hashes of the sanction name fields.
+        matrix (np.ndarray): float32 array of shape (len(uids), dim) with unit-norm rows.
+        alive (np.ndarray): bool array, False for tombstoned rows.
+    """
+
+    def __init__(self, uids, names: list[str], matrix: np.ndarray, hashes: list[str] = None,
+                 alive: np.ndarray = None, groups=None):
+        if len(uids) != len(names) or len(names) != matrix.shape[0]:
+            raise ValueError("uids, names and matrix rows must be aligned.")
+        self.uids = np.asarray(uids, dtype=np.int64)
+        self.groups = self.uids if groups is None else np.asarray(groups, dtype=np.int64)
+        self.grouped = bool(np.any(self.groups != self.uids))  # whether some rows are aliases
+        self.names = list(names)
+        self.hashes = list(hashes) if hashes is not None else [""] * len(self.names)
+        self.matrix = matrix
+        self.alive = np.ones(len(self.names), dtype=bool) if alive is None else np.asarray(alive, dtype=bool)
+        self._version = None
+        self._row_of: dict = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def dead(self) -> int:
+        """Number of tombstoned rows."""
+        return int(len(self.alive) - self.alive.sum())
+
+    @property
+    def version(self) -> str:
+        """The `sanctions_version` of the live rows."""
+        if self._version is None:
+            rows = np.flatnonzero(self.alive)
+            self._version = sanctions_version(self.uids[rows], [self.hashes[row] for row in rows])
+        return self._version
+
+    @staticmethod
+    def version_of(sanctions) -> str:
+        """The `sanctions_version` of a list of sanction objects."""
+        return sanctions_version(
+            [sanction_key(sanction) for sanction in sanctions], [content_hash(sanction) for sanction in sanctions],
+        )
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize the rows of ``vectors`` into a float32 array."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @classmethod
+    def build(cls, model, sanctions, batch_size: int = 256, logger: logging.Logger = None) -> 'SanctionsMatrix':
+        """
+        Encode every sanction name once with ``model`` and return the resulting matrix.
+
+        Args:
+            model: A SentenceTransformer-like object exposing ``encode``.
+            sanctions (list): Sanction objects with attributes first_name, last_name, and uid, and the
+                alias objects with an additional sanction_uid.
+            batch_size (int): Number of names per encode batch.
+            logger (logging.Logger): Optional logger.
+        """
+        logger = logger if logger else logging.getLogger(__name__)
+        uids = [sanction_key(sanction) for sanction in sanctions]
+        names = [sanction_name(sanction) for sanction in sanctions]
+        logger.info(f"Encoding {len(names)} sanction names into the embeddings matrix.")
+        if names:
+            matrix = model.encode(
+                names, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True,
+            )
+        else:
+            matrix = np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return cls(uids=uids, names=names, matrix=cls.normalize(matrix),
+                   hashes=[content_hash(sanction) for sanction in sanctions],
+                   groups=[sanction_group(sanction) for sanction in sanctions])
+
+    def apply_delta(self, model, sanctions, batch_size: int = 256,
+                    logger: logging.Logger = None) -> tuple['SanctionsMatrix', dict]:
+        """
+        Return a matrix for ``sanctions`` that re-encodes only their new or changed entries.
+
+        Rows of sanctions whose uid disappeared or whose name fields changed are tombstoned,
+        the new embeddings are appended after the existing rows.
+
+        Returns:
+            tuple[SanctionsMatrix, dict]: The updated matrix and the ``added``, ``changed`` and
+            ``removed`` counts.
+        """
+        current = {int(self.uids[row]): row for row in np.flatnonzero(self.alive)}
+        alive = self.alive.copy()
+
+        pending, changed = [], 0
+        for sanction in sanctions:
+            row = current.pop(sanction_key(sanction), None)
+            if row is not None and self.hashes[row] == content_hash(sanction):
+                continue
+            if row is not None:
+                alive[row] = False
+                changed += 1
+            pending.append(sanction)
+        removed = list(current.values())
+        alive[removed] = False
+
+        stats = {"added": len(pending) - changed, "changed": changed, "removed": len(removed)}
+        if not pending:
+            return SanctionsMatrix(self.uids, self.names, self.matrix, hashes=self.hashes, alive=alive,
+                                   groups=self.groups), stats
+
+        delta = SanctionsMatrix.build(model, pending, batch_size=batch_size, logger=logger)
+        return SanctionsMatrix(
+            uids=np.concatenate([self.uids, delta.uids]),
+            names=self.names + delta.names,
+            matrix=np.concatenate([np.asarray(self.matrix, dtype=np.float32), delta.matrix]),
+            hashes=self.hashes + delta.hashes,
+            alive=np.concatenate([alive, delta.alive]),
+            groups=np.concatenate([self.groups, delta.groups]),
+        ), stats
+
+    def rows_of(self, uids) -> np.ndarray:
+        """Returns the live rows, aliases included, of the given sanction uids, unknown or removed uids are skipped."""
+        if self._row_of is None:
+            self._row_of = {}
+            for row in np.flatnonzero(self.alive).tolist():
+                self._row_of.setdefault(int(self.groups[row]), []).append(row)
+        rows = [row for uid in dict.fromkeys(map(int, uids)) for row in self._row_of.get(uid, ())]
+        return np.asarray(rows, dtype=np.int64)
+
+    def collapse(self, rows: np.ndarray, scores: np.ndarray, k: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """Keeps the best-scoring row of each sanction, at most ``k`` of them, sorted by descending score."""
+        if not self.grouped:
+            return select_top_k(rows, scores, k)
+        return collapse_groups(rows, scores, self.groups, k)
+
+    def compacted(self) -> 'SanctionsMatrix':
+        """Return a copy of this matrix without its tombstoned rows."""
+        rows = np.flatnonzero(self.alive)
+        return SanctionsMatrix(
+            uids=self.uids[rows],
+            names=[self.names[row] for row in rows],
+            matrix=np.ascontiguousarray(self.matrix[rows], dtype=np.float32),
+            hashes=[self.hashes[row] for row in rows],
+            groups=self.groups[rows],
+        )
+
+    def score(self, query: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        """
+        Return cosine similarities of a normalized ``query`` vector against every row.
+
+        The rows are scored ``block_size`` at a time, so a float16 (memory-mapped) matrix is cast to
+        float32 one block at a time instead of as a whole on every query.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ query
+        scores = np.empty(len(self.matrix), dtype=np.float32)
+        for start in range(0, len(self.matrix), block_size):
+            scores[start:start + block_size] = self.matrix[start:start + block_size].astype(np.float32) @ query
+        return scores
+
+    def select(self, scores: np.ndarray, threshold: float, k: int = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the (at most ``k``) best live rows scoring at least ``threshold``, one per sanction,
+        sorted by descending score.
+        """
+        rows = np.flatnonzero((scores >= threshold) & self.alive)
+        return self.collapse(rows, scores[rows], k)
+
+    def to_matches(self, rows, scores) -> list:
+        """Return ``[name, score, uid]`` for each of the given rows, ``uid`` being the uid of its sanction."""
+        return [[self.names[row], float(score), int(self.groups[row])] for row, score in zip(rows, scores)]
+
+    def select_batch(self, queries: np.ndarray, threshold: float, block_size: int = 4096,
+                     k: int = None) -> list[list]:
+        """
+        Score a batch of normalized query vectors against every row, one block of rows at a time.
+
+        Only a (len(queries), block_size) slice of the similarity matrix is alive at once, so the
+        memory stays bounded regardless of the list size. With ``k``, the ``k`` best rows of every
+        query are taken from each block with an ``argpartition`` and merged with the ones kept so
+        far. With aliases, the ``k`` best sanctions (by their best row) are kept instead.
+
+        Args:
+            queries (np.ndarray): float32 array of shape (n, dim) with unit-norm rows.
+            threshold (float): Cosine similarity threshold for a match.
+            block_size (int): Number of sanction rows scored per block.
+            k (int): Optional maximum matches per query.
+
+        Returns:
+            list[list]: For each query, its matches as ``[name, score, uid]`` sorted by descending score.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.grouped:
+            return self._select_batch_grouped(queries, threshold, block_size, k)
+
+        n_queries = queries.shape[0]
+        best_rows = np.zeros((n_queries, 0), dtype=np.int64)
+        best_scores = np.zeros((n_queries, 0), dtype=np.float32)
+        for start in range(0, len(self), block_size):
+            block = (self.matrix[start:start + block_size] @ queries.T).T.astype(np.float32, copy=False)
+            # misses are pushed below any threshold, so they sort last and are dropped at the end
+            block[~((block >= threshold) & self.alive[start:start + block_size])] = -np.inf
+            rows = np.broadcast_to(np.arange(start, start + block.shape[1]), block.shape)
+            if k is not None and block.shape[1] > k:
+                top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                block, rows = np.take_along_axis(block, top, axis=1), np.take_along_axis(rows, top, axis=1)
+            elif k is None:
+                # every hit is kept, only the rows hit by some query are carried over
+                hit = np.isfinite(block).any(axis=0)
+                block, rows = block[:, hit], rows[:, hit]
+            best_scores = np.concatenate([best_scores, block], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if k is not None and best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_rows = np.take_along_axis(best_rows, top, axis=1)
+
+        matches = []
+        for rows, scores in zip(best_rows, best_scores):
+            keep = np.isfinite(scores)
+            rows, scores = select_top_k(rows[keep], scores[keep])
+            matches.append(self.to_matches(rows, scores))
+        return matches
+
+    def _select_batch_grouped(self, queries: np.ndarray, threshold: float, block_size: int,
+                              k: int = None) -> list[list]:
+        """
+        `select_batch` keeping the best row of every sanction, for matrices holding aliases.
+
+        A sanction among the ``k`` best overall is among the ``k`` best of the block holding its best
+        row, so only the ``k`` best sanctions of each block are merged into the running ones.
+        """
+        best = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in range(queries.shape[0])]
+        for start in range(0, len(self), block_size):
+            block = (self.matrix[start:start + block_size] @ queries.T).T.astype(np.float32, copy=False)
+            hits = (block >= threshold) & self.alive[start:start + block_size]
+            for query in np.flatnonzero(hits.any(axis=1)):
+                rows = np.flatnonzero(hits[query])
+                rows, scores = collapse_groups(rows + start, block[query, rows], self.groups, k)
+                rows, scores = np.concatenate([best[query][0], rows]), np.concatenate([best[query][1], scores])
+                # without k, every sanction is kept and the rows are only collapsed once, at the end
+                best[query] = collapse_groups(rows, scores, self.groups, k) if k is not None else (rows, scores)
+        return [self.to_matches(*collapse_groups(rows, scores, self.groups, k)) for rows, scores in best]
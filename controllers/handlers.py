@@ -26,6 +26,49 @@ class NameHandler:
         # Generate the SHA-256 hash and convert it to an integer.
         return int(hashlib.sha256(composite.encode('utf-8')).hexdigest(), 16)
 
+    def _initials(self, name: str) -> list[str]:
+        """Returns the first letter of every token of the cleaned name."""
+        return [token[0] for token in self.clean(name).split()]
+
+    @staticmethod
+    def _blocking_key(kind: str, type, initials) -> str:
+        """Composes a blocking key from its kind, the record type, the token count and the sorted initials."""
+        type = str(type if type else RecoType.ENTITY.name).upper()
+        return f"{kind}:{type}:{len(initials)}:{''.join(sorted(initials))}"
+
+    @staticmethod
+    def _drop_one(initials: list[str]) -> set[tuple]:
+        """Returns the distinct initials obtained by dropping one token."""
+        if len(initials) < 2:
+            return set()
+        return {tuple(initials[:idx] + initials[idx + 1:]) for idx in range(len(initials))}
+
+    def blocking_keys(self, name: str, type=None) -> list[str]:
+        """
+        Returns the blocking keys stored for a sanction name.
+
+        Unlike `hash`, the initials are sorted, so reordered tokens (e.g. swapped first and last
+        names) share the ``F`` (full) key. The ``D`` (dropped) keys, one per token left out, let a
+        query missing one of the sanction tokens find it, see `probe_keys`.
+        """
+        initials = self._initials(name)
+        keys = [self._blocking_key("F", type, initials)]
+        keys += sorted(self._blocking_key("D", type, variant) for variant in self._drop_one(initials))
+        return keys
+
+    def probe_keys(self, name: str, type=None) -> list[str]:
+        """
+        Returns the blocking keys a query name probes, the union of their buckets holds the
+        sanctions with the same initials in any order, or with one token more or less.
+        """
+        initials = self._initials(name)
+        keys = {
+            self._blocking_key("F", type, initials),  # same tokens, in any order
+            self._blocking_key("D", type, initials),  # the sanction has one more token
+        }
+        keys.update(self._blocking_key("F", type, variant) for variant in self._drop_one(initials))  # one less
+        return sorted(keys)
+
     def detect_language(self, name: str) -> str:
         """Detects whether the name is in Arabic or English."""
         from langdetect import detect
@@ -35,6 +78,22 @@ class NameHandler:
         except Exception:
             return "unknown"
 
+    @staticmethod
+    def normalize(value) -> str:
+        """Lower-cases a name part and collapses its whitespace, None for an empty or missing (NaN) value."""
+        if not isinstance(value, str) or not value.strip():
+            return None
+        return " ".join(value.lower().split())
+
+    def name_fields(self, first_name, last_name) -> dict:
+        """Returns the normalized name columns stored at ingest: the name parts and the full name."""
+        first_name, last_name = self.normalize(first_name), self.normalize(last_name)
+        return {
+            "first_name": first_name,
+            "last_name": last_name,
+            "full_name": " ".join(part for part in (first_name, last_name) if part),
+        }
+
     def clean(self, name: str):
         # name =
         return name.strip(' ",|-=#$%&*').upper()
@@ -0,0 +1,320 @@
+import logging
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from controllers.scorers import BulkFuzzyScorer
+from controllers.transliterators import fold_arabic
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file (IVF-flat) approximate nearest neighbour index over unit-norm vectors.
+
+    The vectors are clustered with spherical k-means into ``nlist`` cells; a query is only scored
+    exactly against the vectors of its ``nprobe`` closest cells. Raising ``nprobe`` trades latency
+    for recall, ``nprobe == nlist`` is an exhaustive scan.
+
+    Attributes:
+        nlist (int): Number of cells (k-means centroids).
+        nprobe (int): Number of cells scanned per query by default.
+    """
+
+    def __init__(self, nlist: int = None, nprobe: int = 8, iterations: int = 20, seed: int = 0,
+                 logger: logging.Logger = None):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._iterations = iterations
+        self._seed = seed
+        self._logger = logger if logger else logging.getLogger(__name__)
+
+        self._centroids: np.ndarray = None
+        self._vectors: np.ndarray = None  # vectors reordered so that each cell is contiguous
+        self._ids: np.ndarray = None  # original row of every reordered vector
+        self._offsets: np.ndarray = None  # cell ``c`` spans ``_offsets[c]:_offsets[c + 1]``
+        self._uids: np.ndarray = None
+
+    def __len__(self):
+        return 0 if self._ids is None else len(self._ids)
+
+    @property
+    def uids(self) -> np.ndarray:
+        return self._uids
+
+    def _kmeans(self, vectors: np.ndarray, nlist: int) -> np.ndarray:
+        rng = np.random.default_rng(self._seed)
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 256), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self._iterations):
+            assignment = self._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1.0, norms)
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + block_size] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), block_size)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def build(self, matrix: np.ndarray, uids=None) -> 'IVFFlatIndex':
+        """
+        Cluster and index the rows of ``matrix``.
+
+        Args:
+            matrix (np.ndarray): float32 array of shape (n, dim) with unit-norm rows.
+            uids: Optional uids row-aligned with ``matrix``, kept to validate a reloaded index.
+
+        An empty ``matrix`` gives an empty index, with no cell, whose searches match nothing.
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        nlist = self.nlist or max(1, int(np.sqrt(len(matrix))))
+        self.nlist = min(nlist, len(matrix))  # k-means needs a row per centroid
+        started = time.perf_counter()
+
+        self._centroids = self._kmeans(matrix, self.nlist) if len(matrix) \
+            else np.zeros((0, matrix.shape[1] if matrix.ndim == 2 else 0), dtype=np.float32)
+        assignment = self._assign(matrix, self._centroids)
+        order = np.argsort(assignment, kind="stable")
+        self._ids = order.astype(np.int64)
+        self._vectors = matrix[order]
+        self._offsets = np.searchsorted(assignment[order], np.arange(self.nlist + 1)).astype(np.int64)
+        self._uids = None if uids is None else np.asarray(uids, dtype=np.int64)
+
+        self._logger.info(f"Built IVF index over {len(matrix)} vectors with {self.nlist} cells "
+                          f"in {time.perf_counter() - started:.2f}s")
+        return self
+
+    def search(self, queries: np.ndarray, top_k: int = 10, threshold: float = None, nprobe: int = None):
+        """
+        Return the approximate nearest rows of each query.
+
+        Args:
+            queries (np.ndarray): A unit-norm vector of shape (dim,) or a batch of shape (n, dim).
+            top_k (int): Maximum results per query, or None for every probed row over ``threshold``.
+            threshold (float): Optional minimum cosine similarity.
+            nprobe (int): Cells scanned per query, defaults to ``self.nprobe``.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: For each query, the matched row ids and their scores,
+            sorted by descending score.
+        """
+        if self._centroids is None:
+            raise RuntimeError("The index has not been built or loaded.")
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if not self.nlist:
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        cell_scores = queries @ self._centroids.T
+        probes = np.argpartition(-cell_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+        results = []
+        for query, cells in zip(queries, probes):
+            rows = np.concatenate([np.arange(self._offsets[c], self._offsets[c + 1]) for c in cells])
+            scores = self._vectors[rows] @ query
+            if threshold is not None:
+                keep = scores >= threshold
+                rows, scores = rows[keep], scores[keep]
+            if top_k is not None and len(scores) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                rows, scores = rows[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            results.append((self._ids[rows[order]], scores[order]))
+        return results
+
+    def save(self, path: str):
+        """Persist the index to ``path`` as an uncompressed .npz archive."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(
+            path, centroids=self._centroids, vectors=self._vectors, ids=self._ids, offsets=self._offsets,
+            uids=self._uids if self._uids is not None else np.zeros(0, dtype=np.int64),
+            params=np.array([self.nlist, self.nprobe], dtype=np.int64),
+        )
+        self._logger.info(f"Saved IVF index to '{path}'")
+
+    @classmethod
+    def load(cls, path: str, logger: logging.Logger = None) -> 'IVFFlatIndex':
+        """Load an index previously written with `save`."""
+        with np.load(path) as data:
+            nlist, nprobe = (int(value) for value in data["params"])
+            index = cls(nlist=nlist, nprobe=nprobe, logger=logger)
+            index._centroids = data["centroids"]
+            index._vectors = data["vectors"]
+            index._ids = data["ids"]
+            index._offsets = data["offsets"]
+            index._uids = data["uids"] if len(data["uids"]) else None
+        return index
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index used to block candidates before fuzzy scoring.
+
+    Every name is lowercased once and split into tokens; each token padded as `` token `` contributes
+    its trigrams, so the grams do not depend on the token order (like ``token_sort_ratio``).
+
+    Attributes:
+        names (list[str]): The indexed names, as given.
+        normalized (list[str]): The lowercased names, row-aligned with ``names``.
+    """
+
+    def __init__(self, names: list[str] = None):
+        self.names: list[str] = []
+        self.normalized: list[str] = []
+        self._postings: dict[str, np.ndarray] = {}
+        if names is not None:
+            self.build(names)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return " ".join(name.lower().split())
+
+    @staticmethod
+    def trigrams(normalized: str) -> set[str]:
+        grams = set()
+        for token in normalized.split():
+            padded = f" {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    def build(self, names: list[str]) -> 'TrigramIndex':
+        """Index ``names``, replacing any previous content."""
+        self.names = list(names)
+        self.normalized = [self.normalize(name) for name in self.names]
+        postings = defaultdict(list)
+        for idx, normalized in enumerate(self.normalized):
+            for gram in self.trigrams(normalized):
+                postings[gram].append(idx)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        return self
+
+    def candidates(self, name: str, min_overlap: float = 0.3, max_candidates: int = 1000) -> np.ndarray:
+        """
+        Return the rows sharing enough trigrams with ``name``.
+
+        Args:
+            name (str): The query name.
+            min_overlap (float): Minimum fraction of the query trigrams a candidate must share.
+            max_candidates (int): Cap on the returned rows, the ones sharing the most trigrams are kept.
+
+        Returns:
+            np.ndarray: Candidate rows, most overlapping first.
+        """
+        grams = self.trigrams(self.normalize(name))
+        postings = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not postings:
+            return np.zeros(0, dtype=np.int64)
+
+        counts = np.bincount(np.concatenate(postings), minlength=len(self.names))
+        required = max(1, int(np.ceil(min_overlap * len(grams))))
+        rows = np.flatnonzero(counts >= required)
+        if max_candidates is not None and len(rows) > max_candidates:
+            rows = rows[np.argpartition(-counts[rows], max_candidates - 1)[:max_candidates]]
+        return rows[np.argsort(-counts[rows], kind="stable")]
+
+
+class ArabicNameIndex:
+    """
+    Fuzzy matching index of the Arabic-script renderings of the sanctions, so Arabic queries are
+    screened without being translated first.
+
+    Names are folded (marks, hamza carrying alefs, final ya) once at build time, candidates are
+    blocked on their trigrams and scored with ``token_sort_ratio``. Matches are reported with the
+    Latin name of the sanction, and a single row per sanction (the best of its aliases).
+
+    Attributes:
+        names (list[str]): The Arabic renderings, as given.
+        labels (list[str]): The names reported for the rows, row-aligned with ``names``.
+        groups (np.ndarray): The uids of the sanctions owning the rows, row-aligned with ``names``.
+    """
+
+    def __init__(self, names: list[str], labels: list[str], groups):
+        self.names = list(names)
+        self.labels = list(labels)
+        self.groups = np.asarray(groups, dtype=np.int64)
+        folded = [self.fold(name) for name in self.names]
+        self._trigrams = TrigramIndex(folded)
+        self._scorer = BulkFuzzyScorer(folded)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def fold(name: str) -> str:
+        return " ".join(fold_arabic(token) for token in name.split())
+
+    def search(self, name: str, threshold: float = 80, top_k: int = None, min_overlap: float = 0.3,
+               max_candidates: int = 1000) -> list:
+        """
+        Match an Arabic-script name against the indexed renderings.
+
+        Args:
+            name (str): The query name, in Arabic script.
+            threshold (float): Minimum ``token_sort_ratio`` (0-100) of a match.
+            top_k (int): Optional cap on the returned matches.
+            min_overlap (float): Minimum fraction of the query trigrams a candidate must share.
+            max_candidates (int): Cap on the scored candidates.
+
+        Returns:
+            list: ``[name, score, uid]`` per matching sanction, the score on the 0-1 scale, sorted by
+            descending score.
+        """
+        folded = self.fold(name)
+        rows = self._trigrams.candidates(folded, min_overlap=min_overlap, max_candidates=max_candidates)
+        if not len(rows):
+            return []
+        scores = self._scorer.score_matrix([folded], score_cutoff=threshold, rows=rows)[0]
+        keep = scores >= threshold
+        rows, scores = rows[keep], scores[keep]
+
+        matches, seen = [], set()
+        for row, score in sorted(zip(rows, scores), key=lambda match: -match[1]):
+            group = int(self.groups[row])
+            if group in seen:
+                continue
+            seen.add(group)
+            matches.append([self.labels[row], float(score) / 100, group])
+            if top_k is not None and len(matches) >= top_k:
+                break
+        return matches
+
+
+def exact_top_k(matrix: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Return the exact top-k row ids of each query by brute force."""
+    scores = np.atleast_2d(queries) @ matrix.T
+    top_k = min(top_k, matrix.shape[0])
+    return np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+
+
+def recall_at_k(index: IVFFlatIndex, matrix: np.ndarray, queries: np.ndarray, top_k: int = 10,
+                nprobe: int = None) -> dict:
+    """
+    Measure the recall of ``index`` against an exact scan of ``matrix``.
+
+    Returns:
+        dict: ``recall`` (mean fraction of the exact top-k found), ``exact_ms`` and ``ann_ms``
+        (mean per-query latencies).
+    """
+    queries = np.atleast_2d(queries)
+
+    started = time.perf_counter()
+    exact = exact_top_k(matrix, queries, top_k)
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    started = time.perf_counter()
+    approx = index.search(queries, top_k=top_k, nprobe=nprobe)
+    ann_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    hits = [len(set(truth.tolist()) & set(ids.tolist())) / len(truth) for truth, (ids, _) in zip(exact, approx)]
+    return {"recall": float(np.mean(hits)), "exact_ms": exact_ms, "ann_ms": ann_ms}
@@ -0,0 +1,197 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# Latin rendering of the Arabic letters, short vowels and tatweel are dropped
+ARABIC_TO_LATIN = {
+    "ا": "A", "أ": "A", "إ": "I", "آ": "A", "ٱ": "A", "ى": "A", "ة": "A", "ء": "", "ع": "",
+    "ب": "B", "ت": "T", "ث": "TH", "ج": "J", "ح": "H", "خ": "KH", "د": "D", "ذ": "DH", "ر": "R",
+    "ز": "Z", "س": "S", "ش": "SH", "ص": "S", "ض": "D", "ط": "T", "ظ": "Z", "غ": "GH", "ف": "F",
+    "ق": "Q", "ك": "K", "ل": "L", "م": "M", "ن": "N", "ه": "H", "و": "W", "ؤ": "W", "ي": "Y",
+    "ئ": "Y", "پ": "P", "چ": "CH", "گ": "G", "ڤ": "V",
+}
+ARABIC_MARKS = re.compile("[\u0610-\u061A\u0640\u064B-\u065F\u0670]")
+# Arabic article glued to a name written in Arabic script, e.g. الحسن, but not the ال of الله
+ARABIC_ARTICLE = re.compile("^ال(?!له$)(?=..)")
+
+# Name particles whose spelling varies too much to be useful as blocking keys
+PARTICLES = {
+    "AL", "EL", "UL", "BIN", "BEN", "IBN", "BINT", "BENT", "DE", "LA", "VON", "VAN",
+    "BN", "BNT", "ABN",  # بن, بنت and ابن rendered from the Arabic script
+}
+
+# "Abd" compounds written as one token (ABDULRAHMAN, ABDELAZIZ, ABDURRAHMAN with the article assimilated
+# to a sun letter, BDALRHMN romanized from the Arabic script whose ain is silent), split into ABD and the
+# name they lead so they share keys with the spaced spellings
+ABD_COMPOUND = re.compile(r"^(?:ABD|BD(?=AL|$))(?:[AEIOU](?P<sun>[TDSZRN])(?=(?P=sun))|[AEIOU]L?)?(?P<rest>[A-Z]*)$")
+# Glued "Abd Allah" remainders, e.g. the LAH of ABDULLAH or the LH of the romanized عبدالله
+ALLAH = re.compile(r"^L?LA?H?$")
+
+# Transliteration digraphs, as (primary, alternate) renderings
+DIGRAPHS = {
+    "PH": ("F", "F"), "KH": ("K", "K"), "GH": ("K", "K"), "CK": ("K", "K"), "SH": ("X", "X"),
+    "CH": ("X", "K"), "TH": ("T", "S"), "DH": ("D", "S"), "OU": ("U", "U"), "EE": ("I", "I"),
+}
+# Single letters, as (primary, alternate) renderings, the alternate keys cover the Egyptian and
+# Levantine readings of the same Arabic letters (Gamal / Jamal, Zakir / Dhakir)
+LETTERS = {
+    "B": ("B", "B"), "D": ("D", "D"), "F": ("F", "F"), "G": ("K", "J"), "J": ("J", "K"), "K": ("K", "K"),
+    "L": ("L", "L"), "M": ("M", "M"), "N": ("N", "N"), "P": ("B", "B"), "Q": ("K", "K"), "R": ("R", "R"),
+    "S": ("S", "S"), "T": ("T", "T"), "V": ("F", "F"), "X": ("KS", "KS"), "Z": ("S", "S"), "H": ("H", "H"),
+}
+VOWELS = set("AEIOUWY")
+
+
+class PhoneticEncoder:
+    """
+    Double-Metaphone style encoder of name tokens, tuned for transliterated Arabic names.
+
+    Every token is reduced to a consonant skeleton with a primary and an alternate reading, so the
+    usual spelling variants of a name share at least one key (``Mohammed``, ``Muhammad`` and
+    ``Mohamad`` are all ``MHMD``, ``Youssef`` and ``Yusuf`` are ``YSF``). Arabic script is first
+    rendered to Latin letters, so Arabic and transliterated spellings share keys too.
+    """
+
+    def __init__(self, max_length: int = 6):
+        self._max_length = max_length
+
+    @staticmethod
+    def romanize(name: str) -> str:
+        """Renders the Arabic letters of ``name`` with Latin letters, other characters are kept."""
+        name = ARABIC_MARKS.sub("", name)
+        return "".join(ARABIC_TO_LATIN.get(char, char) for char in name)
+
+    def tokens(self, name: str) -> list[str]:
+        """
+        Splits ``name`` into upper-case Latin tokens, without the name particles.
+
+        Only a separated article (AL-HASSAN, EL AMIN) or one glued to an Arabic-script name is dropped,
+        Latin names starting with the same letters (ALBERT, ELIZABETH) are kept whole.
+        """
+        tokens = []
+        for word in ARABIC_MARKS.sub("", name).split():
+            word = ARABIC_ARTICLE.sub("", word)
+            for token in re.split(r"[^A-Z]+", self.romanize(word).upper()):
+                tokens.extend(part for part in self.split_compound(token) if part and part not in PARTICLES)
+        return tokens
+
+    @staticmethod
+    def split_compound(token: str) -> list[str]:
+        """Splits an "Abd" compound token into ABD and the name it leads, ABDULLAH is ABD and ALLAH."""
+        match = ABD_COMPOUND.match(token)
+        if not match:
+            return [token]
+        rest = match.group("rest")
+        if ALLAH.match(rest):
+            return ["ABD", "ALLAH"]
+        # shorter remainders are endings of the same name (ABDOU, ABDI), not a second one
+        return ["ABD", rest] if len(rest) > 2 else ["ABD"]
+
+    def encode(self, token: str) -> tuple[str, str]:
+        """Returns the (primary, alternate) keys of an upper-case Latin token."""
+        token = re.sub(r"(.)\1+", r"\1", token)  # MOHAMMED -> MOHAMED
+        primary, alternate = [], []
+        index = 0
+        while index < len(token):
+            pair = token[index:index + 2]
+            char = token[index]
+            if pair in DIGRAPHS:
+                first, second = DIGRAPHS[pair]
+                index += 2
+            elif char in VOWELS:
+                # an initial vowel is kept as A, an initial Y or W as itself, the others are dropped
+                first = second = ("A" if char in "AEIOU" else char) if index == 0 else ""
+                index += 1
+            elif char == "C":
+                first = second = "S" if token[index + 1:index + 2] in ("E", "I", "Y") else "K"
+                index += 1
+            else:
+                first, second = LETTERS.get(char, ("", ""))
+                index += 1
+            if first in VOWELS and primary:
+                first = second = ""  # vowel digraphs after the first letter
+            primary.append(first)
+            alternate.append(second)
+
+        keys = []
+        for key in ("".join(primary), "".join(alternate)):
+            key = re.sub(r"(.)\1+", r"\1", key)
+            key = key[:-1] if len(key) > 2 and key.endswith("H") else key  # FATIMAH -> FATIMA
+            keys.append(key[:self._max_length])
+        return keys[0], keys[1]
+
+    def keys(self, name: str) -> list[set[str]]:
+        """Returns the set of phonetic keys of every token of ``name``."""
+        return [set(key for key in self.encode(token) if key) for token in self.tokens(name)]
+
+    def serialize(self, name: str) -> str:
+        """Returns the phonetic keys of ``name`` as a space separated string, for storage at ingest."""
+        return " ".join(sorted(set().union(*self.keys(name)))) if name else ""
+
+
+class PhoneticIndex:
+    """
+    In-memory inverted index from phonetic key to sanction uids, for candidate generation.
+
+    A sanction is a candidate of a query when at least ``min_tokens`` of the query tokens share a
+    phonetic key with it. Candidates are ranked by the number of tokens they share, so the
+    expensive scorers only rank a small, high-recall subset of the list.
+    """
+
+    def __init__(self, encoder: PhoneticEncoder = None):
+        self.encoder = encoder if encoder else PhoneticEncoder()
+        self.uids = np.zeros(0, dtype=np.int64)
+        self._postings: dict[str, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.uids)
+
+    def build(self, uids, keys: list[str]) -> 'PhoneticIndex':
+        """
+        Builds the index from the space separated phonetic keys of each uid.
+
+        Args:
+            uids: The sanction uids.
+            keys (list[str]): The `PhoneticEncoder.serialize` keys of each sanction, row-aligned with ``uids``.
+        """
+        self.uids = np.asarray(uids, dtype=np.int64)
+        postings = defaultdict(list)
+        for row, row_keys in enumerate(keys):
+            for key in (row_keys or "").split():
+                postings[key].append(row)
+        self._postings = {key: np.asarray(rows, dtype=np.int64) for key, rows in postings.items()}
+        return self
+
+    @classmethod
+    def from_sanctions(cls, sanctions, encoder: PhoneticEncoder = None) -> 'PhoneticIndex':
+        """
+        Builds the index of sanction (and alias) objects, from their ingested ``phonetic_keys`` when
+        available. Aliases are indexed under the uid of their sanction.
+        """
+        from controllers.embeddings import sanction_group, sanction_name
+
+        index = cls(encoder)
+        keys = [
+            getattr(sanction, "phonetic_keys", None) or index.encoder.serialize(sanction_name(sanction))
+            for sanction in sanctions
+        ]
+        return index.build([sanction_group(sanction) for sanction in sanctions], keys)
+
+    def candidates(self, name: str, min_tokens: int = 1, max_candidates: int = None) -> np.ndarray:
+        """
+        Returns the uids of the sanctions sharing a phonetic key with at least ``min_tokens`` tokens
+        of ``name`` (all of them for shorter names), by descending number of shared tokens.
+        """
+        keys = self.encoder.keys(name)
+        counts = np.zeros(len(self.uids), dtype=np.int32)
+        for token_keys in keys:
+            rows = [self._postings[key] for key in token_keys if key in self._postings]
+            if rows:
+                counts[np.unique(np.concatenate(rows))] += 1
+
+        rows = np.flatnonzero(counts >= max(min(min_tokens, len(keys)), 1))
+        rows = rows[np.argsort(-counts[rows], kind="stable")]
+        uids = self.uids[rows]
+        _, first = np.unique(uids, return_index=True)  # a sanction matched through several aliases
+        return uids[np.sort(first)][:max_candidates]
@@ -0,0 +1,189 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from controllers.embeddings import select_top_k
+from controllers.scorers import BulkFuzzyScorer
+
+
+def _shard_worker(connection, names: list[str], offset: int, scorer):
+    """
+    Worker loop of one shard: scores the received queries against its names until it gets None.
+
+    The shard names are given at process start, so under the ``fork`` start method they are
+    inherited copy-on-write instead of being pickled. A ``("load", names, offset)`` task replaces
+    them with the shard of a new list.
+    """
+    shard = BulkFuzzyScorer(names, scorer=scorer, workers=1)
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        if task[0] == "load":
+            _, names, offset = task
+            shard = BulkFuzzyScorer(names, scorer=scorer, workers=1)
+            connection.send(len(names))
+            continue
+        _, queries, score_cutoff, k = task
+        started = time.perf_counter()
+        results = [(rows + offset, scores) for rows, scores in shard.search(queries, score_cutoff=score_cutoff, k=k)]
+        connection.send((results, (time.perf_counter() - started) * 1000))
+    connection.close()
+
+
+class ShardedFuzzyPool:
+    """
+    Persistent worker processes, each scoring a contiguous shard of the sanction names.
+
+    Every query batch is scattered to all the shards and their top matches gathered back and
+    merged, so the scoring of a batch uses ``workers`` cores regardless of the GIL.
+
+    The workers are forked once, by the constructor: create the pool before the process starts
+    any thread, and ship the next lists to the same workers with `load`. When a worker dies, or
+    once the pool is closed, the pool scores in-process with a `BulkFuzzyScorer` instead of
+    forking again.
+
+    Attributes:
+        names (list[str]): The sanction names, as given.
+        workers (int): Number of shards, and of worker processes.
+        timings (list[float]): Per-shard scoring time of the last batch, in milliseconds.
+        totals (list[float]): Per-shard cumulated scoring time, in milliseconds.
+    """
+
+    def __init__(self, names: list[str] = None, workers: int = None, scorer=fuzz.token_sort_ratio,
+                 logger: logging.Logger = None):
+        """
+        Args:
+            names (list[str]): The sanction names to score against, none until `load` by default.
+            workers (int): Number of worker processes, all cores by default, at most one per name.
+            scorer: A rapidfuzz scorer, ``token_sort_ratio`` by default.
+            logger (logging.Logger): Optional logger.
+        """
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self.names = list(names) if names else []
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.workers = min(self.workers, len(self.names)) if self.names else self.workers
+        self.timings = [0.0] * self.workers
+        self.totals = [0.0] * self.workers
+        self.batches = 0
+        self._scorer = scorer
+        self._fallback: BulkFuzzyScorer = None  # in-process scorer, once the workers are gone
+        self._lock = threading.Lock()  # one scatter / gather, load or close at a time over the pipes
+
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self._connections, self._processes = [], []
+        for start, stop in self._shards():
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_shard_worker, args=(child, self.names[start:stop], int(start), scorer), daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._logger.info(f"Started {self.workers} fuzzy screening workers over {len(self.names)} names")
+
+    def __len__(self):
+        return len(self.names)
+
+    def _shards(self) -> list[tuple[int, int]]:
+        bounds = np.linspace(0, len(self.names), self.workers + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _degrade(self, error: BaseException = None):
+        """Stops the workers and scores in-process from now on, after a worker failure or `close`."""
+        if error is not None:
+            self._logger.error(f"Fuzzy screening worker lost ({error!r}), scoring in-process from now on")
+        self._stop()
+        self._fallback = BulkFuzzyScorer(self.names, scorer=self._scorer)
+
+    def load(self, names: list[str]):
+        """Replaces the sanction names, sending every worker its new shard."""
+        with self._lock:
+            self.names = list(names)
+            if self._fallback is not None or not self._processes:
+                self._fallback = BulkFuzzyScorer(self.names, scorer=self._scorer)
+                return
+            try:
+                for connection, (start, stop) in zip(self._connections, self._shards()):
+                    connection.send(("load", self.names[start:stop], start))
+                for connection in self._connections:
+                    connection.recv()
+            except (EOFError, OSError) as error:
+                self._degrade(error)
+            self._logger.info(f"Loaded {len(self.names)} names into the {self.workers} fuzzy screening workers")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, queries: list[str], score_cutoff: float = 0, k: int = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Score ``queries`` against every shard and merge their matches.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Per query, the matched sanction rows and their scores,
+            sorted by descending score, like `BulkFuzzyScorer.search`.
+        """
+        queries = list(queries)
+        with self._lock:
+            if self._fallback is None and not self._processes:
+                self._degrade()  # closed
+            if self._fallback is None:
+                try:
+                    for connection in self._connections:
+                        connection.send(("search", queries, score_cutoff, k))
+                    gathered = []
+                    for shard, connection in enumerate(self._connections):
+                        results, elapsed = connection.recv()
+                        self.timings[shard] = elapsed
+                        self.totals[shard] += elapsed
+                        gathered.append(results)
+                    self.batches += 1
+                except (EOFError, OSError) as error:
+                    # the other shards may still have a reply in flight, so the whole pool is dropped
+                    self._degrade(error)
+            if self._fallback is not None:
+                return self._fallback.search(queries, score_cutoff=score_cutoff, k=k)
+
+        merged = []
+        for query in range(len(queries)):
+            rows = np.concatenate([results[query][0] for results in gathered])
+            scores = np.concatenate([results[query][1] for results in gathered])
+            merged.append(select_top_k(rows, scores, k))
+        return merged
+
+    def stats(self) -> dict:
+        """Return the worker count and the per-shard timings of the last batch and on average."""
+        return {
+            "workers": self.workers if self._fallback is None else 0,
+            "batches": self.batches,
+            "last_ms": list(self.timings),
+            "mean_ms": [total / self.batches if self.batches else 0.0 for total in self.totals],
+        }
+
+    def close(self):
+        """Stop the worker processes, once the running search is done. Later searches are scored in-process."""
+        with self._lock:
+            self._stop()
+
+    def _stop(self):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+                connection.close()
+            except (OSError, BrokenPipeError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._connections, self._processes = [], []
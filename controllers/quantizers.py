@@ -0,0 +1,143 @@
+import logging
+
+import numpy as np
+
+# Number of set bits of every byte value, for Hamming distances over packed codes
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+class QuantizedMatrix:
+    """
+    Quantized copy of a sanctions embeddings matrix with float rescoring of the survivors.
+
+    Two codes are supported:
+        - ``int8``: every vector is stored as int8 codes with its own float32 scale (4x smaller),
+          candidates are ranked by the dequantized dot product;
+        - ``binary``: every vector is stored as the packed signs of its components (32x smaller),
+          candidates are ranked by Hamming distance to the signs of the query.
+
+    Only the best ``rescore_k`` candidates are rescored exactly against the float matrix, which
+    can stay memory-mapped on disk (see `EmbeddingStore`) since just those rows are read.
+
+    It exposes the same ``search`` interface as `IVFFlatIndex`.
+    """
+
+    MODES = ("int8", "binary")
+
+    def __init__(self, mode: str = "int8", rescore_k: int = 200, block_size: int = 16384,
+                 logger: logging.Logger = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported quantization mode '{mode}', expected one of {self.MODES}.")
+        self.mode = mode
+        self.rescore_k = rescore_k
+        self._block_size = block_size
+        self._logger = logger if logger else logging.getLogger(__name__)
+
+        self._matrix: np.ndarray = None  # float rows used for rescoring
+        self._codes: np.ndarray = None
+        self._scales: np.ndarray = None
+
+    def __len__(self):
+        return 0 if self._codes is None else len(self._codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the quantized codes, excluding the float matrix used for rescoring."""
+        return self._codes.nbytes + (self._scales.nbytes if self._scales is not None else 0)
+
+    def build(self, matrix: np.ndarray, rescore_from: np.ndarray = None) -> 'QuantizedMatrix':
+        """
+        Quantize the rows of ``matrix``.
+
+        Args:
+            matrix (np.ndarray): The float rows to quantize, read block by block.
+            rescore_from (np.ndarray): The row-aligned float rows the candidates are rescored
+                against, kept by reference: the memory-mapped store rows, so the float matrix stays
+                on disk. ``matrix`` itself by default.
+        """
+        self._matrix = matrix if rescore_from is None else rescore_from
+        if len(self._matrix) != len(matrix):
+            raise ValueError(f"{len(self._matrix)} rescoring rows are not aligned with the {len(matrix)} matrix rows.")
+        codes, scales = [], []
+        for start in range(0, len(matrix), self._block_size):
+            block = np.asarray(matrix[start:start + self._block_size], dtype=np.float32)
+            if self.mode == "int8":
+                scale = np.abs(block).max(axis=1) / 127
+                scale[scale == 0] = 1.0
+                codes.append(np.round(block / scale[:, None]).astype(np.int8))
+                scales.append(scale.astype(np.float32))
+            else:
+                codes.append(self._pack(block))
+        if codes:
+            self._codes = np.concatenate(codes)
+        else:
+            self._codes = np.zeros((0, matrix.shape[1]), dtype=np.int8) if self.mode == "int8" \
+                else self._pack(np.zeros((0, matrix.shape[1]), dtype=np.float32))
+        self._scales = np.concatenate(scales) if scales else None
+        self._logger.info(f"Quantized {len(matrix)} vectors to {self.mode} ({self.nbytes / 2 ** 20:.1f} MiB)")
+        return self
+
+    @staticmethod
+    def _pack(vectors: np.ndarray) -> np.ndarray:
+        """Pack the signs of ``vectors`` into uint64 words, zero-padded to a whole word."""
+        bits = np.packbits(vectors > 0, axis=-1)
+        padding = -bits.shape[-1] % 8
+        if padding:
+            bits = np.pad(bits, [(0, 0)] * (bits.ndim - 1) + [(0, padding)])
+        return np.ascontiguousarray(bits).view(np.uint64)
+
+    @staticmethod
+    def _popcount(words: np.ndarray) -> np.ndarray:
+        """Return the number of set bits of every row of ``words``."""
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+        return POPCOUNT[words.view(np.uint8)].sum(axis=-1, dtype=np.int32)
+
+    def _approximate(self, queries: np.ndarray) -> np.ndarray:
+        """Return the (len(queries), len(self)) approximate similarities, higher is closer."""
+        scores = np.empty((len(queries), len(self._codes)), dtype=np.float32)
+        if self.mode == "binary":
+            bits = self._pack(queries)[:, None, :]
+        for start in range(0, len(self._codes), self._block_size):
+            codes = self._codes[start:start + self._block_size]
+            stop = start + len(codes)
+            if self.mode == "int8":
+                scores[:, start:stop] = (queries @ codes.T.astype(np.float32)) * self._scales[start:stop]
+            else:
+                scores[:, start:stop] = -self._popcount(codes[None, :, :] ^ bits)
+        return scores
+
+    def search(self, queries: np.ndarray, top_k: int = 10, threshold: float = None, nprobe: int = None,
+               query_batch: int = 64):
+        """
+        Return the nearest rows of each query.
+
+        Args:
+            queries (np.ndarray): A unit-norm vector of shape (dim,) or a batch of shape (n, dim).
+            top_k (int): Maximum results per query, or None for every rescored row over ``threshold``.
+            threshold (float): Optional minimum cosine similarity, applied to the rescored values.
+            nprobe (int): Unused, accepted for interface compatibility with `IVFFlatIndex`.
+            query_batch (int): Queries prefiltered together, bounds the approximate scores memory.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: For each query, the matched row ids and their exact
+            scores, sorted by descending score.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        budget = min(max(self.rescore_k, top_k or 0), len(self))
+
+        results = []
+        for start in range(0, len(queries), query_batch):
+            batch = queries[start:start + query_batch]
+            approximate = self._approximate(batch)
+            for query, row_scores in zip(batch, approximate):
+                rows = np.argpartition(-row_scores, budget - 1)[:budget] if budget else np.zeros(0, dtype=np.int64)
+                rows.sort()  # sequential reads of the float rows
+
+                scores = np.asarray(self._matrix[rows], dtype=np.float32) @ query
+                if threshold is not None:
+                    keep = scores >= threshold
+                    rows, scores = rows[keep], scores[keep]
+                order = np.argsort(-scores, kind="stable")[:top_k]
+                results.append((rows[order], scores[order]))
+        return results
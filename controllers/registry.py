@@ -0,0 +1,118 @@
+import gc
+import logging
+import threading
+import time
+from typing import Any, Callable, Hashable
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of the lazily loaded models.
+
+    A model is loaded by its loader on the first `get` of its key (or by `warm`), and the same
+    instance is then shared by every caller asking for that key, e.g. every `NameScreener`
+    using the same encoder. Models unused for longer than ``idle_timeout`` seconds can be
+    unloaded, either explicitly with `unload_idle` or by the background janitor, and are loaded
+    again on their next use.
+
+    Callers should not keep a reference to the returned models beyond a call, otherwise their
+    memory is not released when they are unloaded.
+    """
+
+    def __init__(self, idle_timeout: float = None, logger: logging.Logger = None):
+        self.idle_timeout = idle_timeout
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._models: dict[Hashable, Any] = {}
+        self._last_used: dict[Hashable, float] = {}
+        self._loaders: dict[Hashable, Callable[[], Any]] = {}
+        self._locks: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._janitor: threading.Thread = None
+
+    def register(self, key: Hashable, loader: Callable[[], Any]):
+        """Registers the loader of ``key``, without loading it."""
+        with self._lock:
+            self._loaders.setdefault(key, loader)
+            self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key: Hashable, loader: Callable[[], Any] = None) -> Any:
+        """Returns the model of ``key``, loading it first when needed, with ``loader`` or the registered one."""
+        if loader is not None:
+            self.register(key, loader)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._last_used[key] = time.monotonic()
+                return model
+            if key not in self._loaders:
+                raise KeyError(f"No loader registered for model {key}.")
+            lock = self._locks[key]
+
+        with lock:  # a single load per key, other keys stay available meanwhile
+            model = self._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = self._loaders[key]()
+                self._logger.info(f"Loaded model {key} in {time.perf_counter() - started:.2f}s")
+                with self._lock:
+                    self._models[key] = model
+            with self._lock:
+                self._last_used[key] = time.monotonic()
+            return model
+
+    def warm(self, *keys: Hashable):
+        """Loads the given registered models now, all of them when no key is given."""
+        for key in keys if keys else list(self._loaders):
+            self.get(key)
+
+    def is_loaded(self, key: Hashable) -> bool:
+        return key in self._models
+
+    def unload(self, key: Hashable) -> bool:
+        """Drops the model of ``key``, it is loaded again on its next use."""
+        with self._lock:
+            model = self._models.pop(key, None)
+            self._last_used.pop(key, None)
+        if model is None:
+            return False
+        del model
+        gc.collect()
+        self._logger.info(f"Unloaded model {key}")
+        return True
+
+    def unload_idle(self, idle_timeout: float = None) -> list:
+        """Unloads the models unused for more than ``idle_timeout`` seconds, the registry one by default."""
+        idle_timeout = idle_timeout if idle_timeout is not None else self.idle_timeout
+        if idle_timeout is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, used in self._last_used.items() if now - used > idle_timeout]
+        return [key for key in idle if self.unload(key)]
+
+    def start_janitor(self, interval: float = 60):
+        """Starts a daemon thread calling `unload_idle` every ``interval`` seconds."""
+        if self._janitor is not None or self.idle_timeout is None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.unload_idle()
+
+        self._janitor = threading.Thread(target=run, name="model-registry-janitor", daemon=True)
+        self._janitor.start()
+
+    def stats(self) -> dict:
+        """Returns the registered and loaded models, with the seconds since their last use."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "registered": [str(key) for key in self._loaders],
+                "loaded": {str(key): round(now - self._last_used.get(key, now), 1) for key in self._models},
+                "idle_timeout": self.idle_timeout,
+            }
+
+
+# Registry shared by every screener and translator of the process
+REGISTRY = ModelRegistry()
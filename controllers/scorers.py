@@ -0,0 +1,130 @@
+import numpy as np
+from rapidfuzz import fuzz, process, utils
+
+
+class BulkFuzzyScorer:
+    """
+    Many-to-many fuzzy scorer over a fixed list of sanction names.
+
+    Scores come from rapidfuzz's C++ ``process.cdist`` running on ``workers`` threads, with the
+    same ``token_sort_ratio`` semantics (0-100) the fuzzywuzzy runner used. The choices are
+    pre-processed (lowercased, punctuation stripped) once, when the scorer is built.
+
+    Attributes:
+        names (list[str]): The sanction names, as given.
+        processed (list[str]): The pre-processed names, row-aligned with ``names``.
+    """
+
+    def __init__(self, names: list[str], scorer=fuzz.token_sort_ratio, workers: int = -1, chunk_size: int = 1024):
+        """
+        Args:
+            names (list[str]): The sanction names to score against.
+            scorer: A rapidfuzz scorer, ``token_sort_ratio`` by default.
+            workers (int): Number of scoring threads, -1 for all cores.
+            chunk_size (int): Queries scored per ``cdist`` call, bounds the score matrix memory.
+        """
+        self.names = list(names)
+        self.processed = [utils.default_process(name) for name in self.names]
+        self._scorer = scorer
+        self._workers = workers
+        self._chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.names)
+
+    def score_matrix(self, queries: list[str], score_cutoff: float = None, rows=None) -> np.ndarray:
+        """
+        Return the (len(queries), len(rows)) float32 score matrix, scores under ``score_cutoff`` are 0.
+
+        Args:
+            queries (list[str]): The names to screen.
+            score_cutoff (float): Scores below it are pruned by rapidfuzz and reported as 0.
+            rows: Optional subset of sanction rows to score, all of them by default.
+        """
+        choices = self.processed if rows is None else [self.processed[row] for row in rows]
+        return process.cdist(
+            [utils.default_process(query) for query in queries], choices,
+            scorer=self._scorer, processor=None, score_cutoff=score_cutoff,
+            dtype=np.float32, workers=self._workers,
+        )
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int = None, score_cutoff: float = 0) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Extract, for every row of ``scores``, the columns scoring at least ``score_cutoff``.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Per row, at most ``k`` column ids and their scores,
+            sorted by descending score.
+        """
+        results = []
+        for row in np.atleast_2d(scores):
+            columns = np.flatnonzero(row >= score_cutoff) if score_cutoff else np.arange(len(row))
+            if k is not None and len(columns) > k:
+                columns = columns[np.argpartition(-row[columns], k - 1)[:k]]
+            columns = columns[np.argsort(-row[columns], kind="stable")]
+            results.append((columns, row[columns]))
+        return results
+
+    def search(self, queries: list[str], score_cutoff: float = 0, k: int = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Score ``queries`` against every sanction, ``chunk_size`` queries at a time.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Per query, the matched sanction rows and their scores,
+            sorted by descending score.
+        """
+        results = []
+        for start in range(0, len(queries), self._chunk_size):
+            scores = self.score_matrix(queries[start:start + self._chunk_size], score_cutoff=score_cutoff)
+            results.extend(self.top_k(scores, k=k, score_cutoff=score_cutoff))
+        return results
+
+
+class PairScorer:
+    """
+    Batched (name, sanction) pair inference for sequence-classification models.
+
+    Pairs are sorted by length so every batch is padded only to its own longest pair, scored under
+    ``torch.inference_mode`` and mapped to a match probability: a sigmoid for single-logit models
+    (cross-encoders), the softmax of the positive class otherwise.
+    """
+
+    POSITIVE_LABELS = ('LABEL_1', '1', 'MATCH')
+
+    def __init__(self, tokenizer, model, batch_size: int = 64, max_length: int = 64):
+        """
+        Args:
+            tokenizer: A Hugging Face tokenizer.
+            model: A Hugging Face sequence-classification model.
+            batch_size (int): Number of pairs per forward pass.
+            max_length (int): Maximum tokens per pair, longer pairs are truncated.
+        """
+        self._tokenizer = tokenizer
+        self._model = model.eval()
+        self._batch_size = batch_size
+        self._max_length = max_length
+
+        labels = {str(label).upper(): int(idx) for idx, label in (model.config.id2label or {}).items()}
+        self._positive = next((labels[label] for label in self.POSITIVE_LABELS if label in labels), 1)
+
+    def score(self, pairs: list[tuple[str, str]]) -> np.ndarray:
+        """Return the match probability of every pair, in the input order."""
+        import torch
+
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        order = sorted(range(len(pairs)), key=lambda idx: len(pairs[idx][0]) + len(pairs[idx][1]))
+        for start in range(0, len(order), self._batch_size):
+            batch = order[start:start + self._batch_size]
+            inputs = self._tokenizer(
+                [pairs[idx][0] for idx in batch], [pairs[idx][1] for idx in batch],
+                return_tensors="pt", padding=True, truncation=True, max_length=self._max_length,
+            )
+            with torch.inference_mode():
+                logits = self._model(**inputs).logits
+                if logits.shape[-1] == 1:
+                    probabilities = torch.sigmoid(logits[:, 0])
+                else:
+                    probabilities = torch.softmax(logits, dim=-1)[:, self._positive]
+            scores[batch] = probabilities.float().numpy()
+        return scores
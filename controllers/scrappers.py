@@ -4,7 +4,7 @@ import xml.etree.ElementTree as ET
 import pandas as pd
 
 from controllers.consts import SupportedLanguage, RecoType
-from models.models import SCHEMA, Sanctions
+from models.models import SCHEMA, Sanctions, SanctionAliases, SanctionKeys, SanctionsVersions
 
 
 class OFACDataProcessor:
@@ -16,14 +16,18 @@ class OFACDataProcessor:
         xml_file (str): Local filename to store the downloaded XML.
     """
 
-    def __init__(self, url, xml_file="sdn.xml", connection=None, factory=None):
+    def __init__(self, url, xml_file="sdn.xml", connection=None, factory=None, translator=None):
         """
         Initialize the OFACDataProcessor with download and storage parameters.
+
+        With a `NameTranslator`, the Arabic-script renderings of the sanctions are stored too, see
+        `store_arabic_names`.
         """
         self.url = url
         self.xml_file = xml_file
         self.connection = connection
         self.factory = factory
+        self.translator = translator
 
     def download_xml(self, timeout=300):
         """
@@ -78,6 +82,24 @@ class OFACDataProcessor:
                     items[new_key] = text
         return items
 
+    @staticmethod
+    def parse_aliases(elem):
+        """
+        Extracts the aliases of an sdnEntry element, one dictionary per aka entry.
+        Args:
+            elem (xml.etree.ElementTree.Element): The sdnEntry element.
+        Returns:
+            list[dict]: The uid, type, category, firstName and lastName of every alias.
+        """
+        aliases = []
+        for child in elem.iter():
+            if child.tag.split('}')[-1] != "aka":
+                continue
+            alias = {field.tag.split('}')[-1]: (field.text or "").strip() for field in child}
+            if alias.get("uid") and alias.get("lastName"):
+                aliases.append(alias)
+        return aliases
+
     def parse_xml_to_dataframe(self):
         """
         Parse the full XML file and convert its records to a pandas DataFrame.
@@ -94,6 +116,7 @@ class OFACDataProcessor:
                 # Adjust the tag check according to your XML schema
                 if elem.tag.endswith("sdnEntry"):
                     record = self.flatten_element(elem)
+                    record["aliases"] = self.parse_aliases(elem)
                     records.append(record)
                     elem.clear()  # Free memory for processed elements
             print(f"Parsed {len(records)} records from XML.")
@@ -162,59 +185,167 @@ class OFACDataProcessor:
         df = self.parse_xml_to_dataframe()
 
         self.orm_insertion(df)
+        if self.translator is not None:
+            self.store_arabic_names()
         # self.save_csv(df)
         # self.save_to_db(df)
+        self.record_version()
         return df
 
-    def orm_insertion(self, df):
+    def record_version(self):
+        """
+        Record the version of the sanctions list now stored, aliases included, so the API services
+        can detect the new list and invalidate what they cached for the previous one.
+        """
+        from controllers.embeddings import content_hash, sanction_key, sanctions_version
+
+        sanctions = self.factory.session.query(Sanctions).all() + self.factory.session.query(SanctionAliases).all()
+        # the Arabic renderings are part of the version, so the services reload them once stored
+        version = sanctions_version(
+            [sanction_key(sanction) for sanction in sanctions],
+            [f"{content_hash(sanction)}\x1f{sanction.arabic_name or ''}" for sanction in sanctions],
+        )
+        self.factory.add(SanctionsVersions(version=version, count=len(sanctions)))
+        self.factory.commit()
+        print(f"Recorded sanctions list version {version} ({len(sanctions)} sanctions).")
+        return version
+
+    def store_arabic_names(self, chunk_size: int = 1000):
+        """
+        Store the Arabic-script rendering of every sanction and alias still missing one, translated
+        once here so the API services match Arabic names against them instead of translating the
+        queries, see `NameScreener.arabic_runner`.
+
+        Args:
+            chunk_size (int): The number of distinct names translated and stored per commit.
+        """
+        from controllers.embeddings import sanction_name
+
+        session = self.factory.session
+        for model in (Sanctions, SanctionAliases):
+            rows = session.query(model.id, model.first_name, model.last_name, model.full_name) \
+                .filter(model.arabic_name.is_(None)).all()
+            by_name = {}
+            for row in rows:
+                by_name.setdefault(sanction_name(row).title(), []).append(row.id)
+
+            names = list(by_name)
+            for start in range(0, len(names), chunk_size):
+                chunk = names[start:start + chunk_size]
+                mappings = [
+                    dict(id=id, arabic_name=arabic)
+                    for name, arabic in zip(chunk, self.translator.translate_to_arabic(chunk))
+                    for id in by_name[name]
+                ]
+                session.bulk_update_mappings(model, mappings)
+                self.factory.commit()
+                print(f"Stored the Arabic renderings of {len(mappings)} {model.__tablename__} rows.")
+
+    def orm_insertion(self, df, chunk_size: int = 1000):
+        """
+        Store the sanctions, their aliases and blocking keys, with their normalized name columns
+        computed once here, using bulk inserts of ``chunk_size`` rows.
+
+        The stored list is replaced in a single transaction: the rows of the previous load are deleted
+        first, so loading a new list (or the same one again) neither duplicates nor half-replaces it.
+        The Arabic renderings of the names left unchanged are carried over, matched on the uid (an int,
+        the XML gives it as text) and the full name.
 
+        Args:
+            df (pd.DataFrame): The parsed sdnEntry records.
+            chunk_size (int): The number of sanctions inserted per bulk insert.
+        """
         from controllers.handlers import NameHandler
+        from controllers.phonetics import PhoneticEncoder
         name_handler = NameHandler()
+        phonetic_encoder = PhoneticEncoder()
+
+        session = self.factory.session
+        arabic_names = {
+            model: {
+                (int(row.uid), row.full_name): row.arabic_name
+                for row in session.query(model.uid, model.full_name, model.arabic_name)
+                .filter(model.arabic_name.isnot(None))
+            }
+            for model in (Sanctions, SanctionAliases)
+        }
+        try:
+            for model in (SanctionKeys, SanctionAliases, Sanctions):
+                session.query(model).delete(synchronize_session=False)
+            self._insert_rows(df, name_handler, phonetic_encoder, arabic_names, chunk_size)
+            self.factory.commit()
+        except Exception:
+            session.rollback()
+            raise
 
+    def _insert_rows(self, df, name_handler, phonetic_encoder, arabic_names: dict, chunk_size: int):
+        """Insert the sanction, alias and blocking key rows of ``df``, ``chunk_size`` sanctions at a time."""
+        sanctions, aliases, keys = [], [], []
         for idx, row in enumerate(df.itertuples(index=False)):
 
+            fields = name_handler.name_fields(row.firstName, row.lastName)
             if row.sdnType.upper() == RecoType.ENTITY.name:
-                name = row.lastName
+                name = fields["last_name"]
                 # language = name_handler.detect_language(name)
             elif row.sdnType.upper() == RecoType.INDIVIDUAL.name:
-                name = f"{row.firstName} {row.lastName}"
+                name = fields["full_name"]
                 # language = name_handler.detect_language(name)
             else:
                 # print(row.sdnType)
                 print("Unknown 'sdnType' for the user")
                 continue
 
-
             # if language not in [rt.value for rt in SupportedLanguage]:
             #     print(language)
             #     print("Unsupported language for the user")
             #     continue
 
-
             hash = name_handler.hash(
                 name=name,
                 type=row.sdnType,
                 # language=language
             )
 
-            print(row.uid, row.firstName, row.lastName, row.sdnType, hash)
-            sanc = Sanctions(
-                uid=row.uid,
-                first_name=row.firstName,
-                last_name=row.lastName,
-                type=row.sdnType,
+            sanctions.append(dict(
+                fields,
+                uid=int(row.uid),
+                type=row.sdnType.lower(),
                 # language=language,
                 search_hash=str(hash),
-            )
-
-
-            self.factory.add(sanc)
-
-            if idx % 999 == 0:
-                self.factory.commit()
-        self.factory.commit()
-        pass
-
+                phonetic_keys=phonetic_encoder.serialize(name),
+                arabic_name=arabic_names[Sanctions].get((int(row.uid), fields["full_name"])),
+            ))
+            row_keys = set(name_handler.blocking_keys(name=name, type=row.sdnType))
+
+            # Every alias gets its own row, screened alongside the primary name
+            for aka in row.aliases if isinstance(row.aliases, list) else []:
+                alias_fields = name_handler.name_fields(aka.get("firstName"), aka["lastName"])
+                aliases.append(dict(
+                    alias_fields,
+                    uid=int(aka["uid"]),
+                    sanction_uid=int(row.uid),
+                    type=aka.get("type"),
+                    category=aka.get("category"),
+                    phonetic_keys=phonetic_encoder.serialize(alias_fields["full_name"]),
+                    arabic_name=arabic_names[SanctionAliases].get((int(aka["uid"]), alias_fields["full_name"])),
+                ))
+                row_keys.update(name_handler.blocking_keys(name=alias_fields["full_name"], type=row.sdnType))
+
+            keys.extend(dict(uid=int(row.uid), key=key) for key in sorted(row_keys))
+
+            if len(sanctions) >= chunk_size:
+                self._bulk_insert(sanctions, aliases, keys)
+                sanctions, aliases, keys = [], [], []
+        self._bulk_insert(sanctions, aliases, keys)
+
+    def _bulk_insert(self, sanctions: list[dict], aliases: list[dict], keys: list[dict]):
+        """Insert a chunk of sanction, alias and blocking key rows, flushed but left to the caller to commit."""
+        session = self.factory.session
+        session.bulk_insert_mappings(Sanctions, sanctions)
+        session.bulk_insert_mappings(SanctionAliases, aliases)
+        session.bulk_insert_mappings(SanctionKeys, keys)
+        session.flush()
+        print(f"Inserted {len(sanctions)} sanctions, {len(aliases)} aliases and {len(keys)} blocking keys.")
 
 if __name__ == "__main__":
     # Example usage:
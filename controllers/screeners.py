@@ -1,16 +1,28 @@
 import logging
+import os
+import threading
+import time
 
 # import pandas as pd
-from fuzzywuzzy import fuzz
-from transformers import AutoTokenizer, AutoModel, AutoModelForSequenceClassification, pipeline
-from sentence_transformers import SentenceTransformer, util
+# torch, transformers and sentence_transformers are imported when a model is first loaded,
+# so the fuzzy-only screening does not pay for them
 
 # from controllers.consts import THRESHOLD
 # from models.models import Sanctions
-import torch.nn.functional as F
-import torch
-from torch.nn.functional import softmax
-
+import numpy as np
+
+from controllers.backends import load_encoder
+from controllers.consts import ANN_NLIST, ANN_NPROBE, TRIGRAM_MIN_OVERLAP, TRIGRAM_MAX_CANDIDATES, \
+    CASCADE_LEXICAL_K, CASCADE_DENSE_K, CASCADE_RERANK_K, PAIR_BATCH_SIZE, PAIR_MAX_LENGTH, QUANTIZED_RESCORE_K, \
+    PHONETIC_MIN_TOKENS, PHONETIC_MAX_CANDIDATES
+from controllers.embeddings import SanctionsMatrix, collapse_groups, sanction_group, sanction_name, select_top_k
+from controllers.indexes import ArabicNameIndex, IVFFlatIndex, TrigramIndex
+from controllers.phonetics import PhoneticIndex
+from controllers.pools import ShardedFuzzyPool
+from controllers.quantizers import QuantizedMatrix
+from controllers.registry import REGISTRY, ModelRegistry
+from controllers.scorers import BulkFuzzyScorer, PairScorer
+from controllers.stores import EmbeddingStore
 from models.models import Sanctions
 
 use_auth_token = None
@@ -21,8 +33,14 @@ class NameScreener:
     # _model_name = "Launchpad/ditto"
     # _model_name = "cross-encoder/quora-distilroberta-base"
     _model_name = "sentence-transformers/all-MiniLM-L6-v2"
-
-    def __init__(self, logger: logging.Logger = None):
+    _pair_model_name = "cross-encoder/quora-distilroberta-base"
+
+    def __init__(self, logger: logging.Logger = None, use_index: bool = False, nprobe: int = ANN_NPROBE,
+                 index_path: str = None, pair_batch_size: int = PAIR_BATCH_SIZE,
+                 pair_max_length: int = PAIR_MAX_LENGTH, store_path: str = None, store_dtype: str = "float32",
+                 quantization: str = None, rescore_k: int = QUANTIZED_RESCORE_K, backend: str = "torch",
+                 backend_cache: str = "stores/backends", fuzzy_workers: int = None,
+                 registry: ModelRegistry = None):
         # self._factory = factory
         # self._connection = connection
         self._logger = logger if logger else logging.getLogger(__file__)
@@ -59,7 +77,57 @@ class NameScreener:
         #     # resume_download=True,  # Resume failed downloads instead of restarting
         # )
 
-        self.model = SentenceTransformer(self._model_name)
+        self._backend = backend
+        # Models are loaded on first use and shared through the registry, see `model` and `warm`
+        self._registry = registry if registry else REGISTRY
+        self._encoder_key = ("encoder", self._model_name, backend)
+        self._registry.register(self._encoder_key, lambda: load_encoder(
+            self._model_name, backend=backend, cache_dir=backend_cache, logger=self._logger,
+        ))
+        self._pair_key = ("pair", self._pair_model_name)
+        self._registry.register(self._pair_key, self._load_pair_model)
+        self._matrix: SanctionsMatrix = None
+        self._matrix_source = None  # sanctions list object the matrix was last checked against
+        # guards the first build and the swap of the matrix and index by the background compaction
+        self._lock = threading.RLock()
+
+        # Optional memory-mapped store of the matrix, keyed by model name and list version
+        # (non-eager backends embed slightly differently, so they get their own store)
+        self._store = EmbeddingStore(
+            store_path, self._model_name if backend == "torch" else f"{self._model_name}@{backend}",
+            dtype=store_dtype, logger=self._logger,
+        ) if store_path else None
+
+        # Optional IVF index, or quantized codes ("int8" or "binary"), in front of the exhaustive matrix scan
+        self._use_index = use_index
+        self._nprobe = nprobe
+        self._index_path = index_path
+        self._quantization = quantization
+        self._rescore_k = rescore_k
+        self._index: IVFFlatIndex | QuantizedMatrix = None
+
+        # Trigram blocking index and bulk scorer of the fuzzy runner, rebuilt when the sanction strings change
+        self._trigram_index: TrigramIndex = None
+        self._fuzzy_scorer: BulkFuzzyScorer = None
+        self._fuzzy_source = None  # sanction strings list object the scorer was last checked against
+        # Optional sharded process pool running the full-scan fuzzy matching, see ShardedFuzzyPool. Its workers
+        # are forked here, before the service starts any thread, and get the sanction strings once known
+        self._fuzzy_workers = fuzzy_workers
+        self._fuzzy_pool = ShardedFuzzyPool(workers=fuzzy_workers, logger=self._logger) if fuzzy_workers else None
+        self._fuzzy_lock = threading.RLock()  # guards the swap of the fuzzy structures and the pool searches
+        # Bulk scorer over the matrix rows of the cascade lexical stage, kept apart from the one of the
+        # sanction strings so the two runners don't rebuild each other's
+        self._cascade_scorer: BulkFuzzyScorer = None
+        self._cascade_key: tuple = None  # (list version, row count) of the matrix the scorer was built for
+        self._phonetic_index: PhoneticIndex = None
+        self._phonetic_version: str = None  # list version the phonetic index was built for
+        # Index of the Arabic-script renderings stored at ingest, rebuilt when the sanctions change
+        self._arabic_index: ArabicNameIndex = None
+        self._arabic_source = None  # sanctions list object the Arabic index was built from
+
+        # Pairwise classifier of the pair runners and the cascade rerank, loaded on first use
+        self._pair_batch_size = pair_batch_size
+        self._pair_max_length = pair_max_length
 
         # self.classifier = pipeline(
         #     "text-classification",
@@ -67,21 +135,131 @@ class NameScreener:
         #     return_all_scores=True
         # )
 
-    def runner(self, name, threshold=0.5, sanctions: list[str] = None, ):
+    @property
+    def model(self):
+        """The sentence encoder, loaded on first use."""
+        return self._registry.get(self._encoder_key)
 
-        sanctions = sanctions.copy() if sanctions else []
+    def warm(self, pair: bool = False):
+        """Loads the sentence encoder, and the pairwise classifier with `pair`, ahead of the first request."""
+        self._registry.warm(self._encoder_key, *((self._pair_key,) if pair else ()))
 
-        matches = []
-        for sanction in sanctions:
-            try:
-                similarity_score = fuzz.token_sort_ratio(name.lower(), sanction.lower())
-                if similarity_score >= threshold:
-                    matches.append(sanction)
-            except Exception as e:
-                self._logger.info(f"Error processing customer {name}: {e}")
-        return matches
+    def _ensure_fuzzy(self, sanctions: list[str]) -> tuple[TrigramIndex, BulkFuzzyScorer]:
+        """
+        Returns the cached trigram index and bulk scorer, rebuilding them when the sanction strings change,
+        and loading the new strings into the process pool.
+        """
+        with self._fuzzy_lock:
+            if sanctions is self._fuzzy_source:
+                return self._trigram_index, self._fuzzy_scorer
+            if self._fuzzy_scorer is None or self._fuzzy_scorer.names != sanctions:
+                self._trigram_index = TrigramIndex(sanctions)
+                self._fuzzy_scorer = BulkFuzzyScorer(sanctions)
+                if self._fuzzy_pool is not None:
+                    self._fuzzy_pool.load(sanctions)
+            self._fuzzy_source = sanctions
+            return self._trigram_index, self._fuzzy_scorer
+
+    def _fuzzy_search(self, queries: list[str], sanctions: list[str], score_cutoff: float, k: int = None):
+        """
+        Full-scan `token_sort_ratio` search of ``queries`` over the sanction strings, on the process pool
+        when there is one.
+
+        Returns:
+            tuple[list, BulkFuzzyScorer]: The `BulkFuzzyScorer.search` results, and the scorer whose
+            names their rows refer to.
+        """
+        with self._fuzzy_lock:
+            _, scorer = self._ensure_fuzzy(sanctions)
+            if self._fuzzy_pool is not None:
+                # under the lock, so the pool is not loaded with another list before the rows are looked up
+                return self._fuzzy_pool.search(queries, score_cutoff=score_cutoff, k=k), scorer
+        return scorer.search(queries, score_cutoff=score_cutoff, k=k), scorer
+
+    def _ensure_cascade_scorer(self, matrix: SanctionsMatrix) -> BulkFuzzyScorer:
+        """Returns the cached bulk scorer over the matrix rows, rebuilding it when the matrix version or rows change."""
+        # a compaction keeps the version but drops the tombstoned rows, hence the row count in the key
+        key = (matrix.version, len(matrix.names))
+        if self._cascade_scorer is None or self._cascade_key != key:
+            self._cascade_scorer = BulkFuzzyScorer(matrix.names)
+            self._cascade_key = key
+        return self._cascade_scorer
+
+    def fuzzy_stats(self) -> dict:
+        """Returns the per-shard timings of the fuzzy screening pool, None when it is not used."""
+        return self._fuzzy_pool.stats() if self._fuzzy_pool is not None else None
+
+    def close(self):
+        """Stops the fuzzy screening pool workers, if any."""
+        with self._fuzzy_lock:
+            if self._fuzzy_pool is not None:
+                self._fuzzy_pool.close()
+                self._fuzzy_pool = None
+
+    def runner(self, name, threshold=0.5, sanctions: list[str] = None, blocking: bool = True,
+               min_overlap: float = TRIGRAM_MIN_OVERLAP, max_candidates: int = TRIGRAM_MAX_CANDIDATES,
+               top_k: int = None):
+        """
+        Matches a given name against sanction strings with `token_sort_ratio`.
+
+        With `blocking`, only the sanctions sharing at least `min_overlap` of the name trigrams
+        (at most `max_candidates` of them) are scored, instead of the whole list. The scoring
+        itself is done in bulk by `BulkFuzzyScorer`, or by the sharded process pool for a full
+        scan when the screener was created with `fuzzy_workers`. The (at most `top_k`) matching strings
+        are returned by descending score.
+        """
+        sanctions = sanctions if sanctions else []
+        if not blocking and self._fuzzy_pool is not None:
+            results, scorer = self._fuzzy_search([name], sanctions, score_cutoff=threshold, k=top_k)
+            return [scorer.names[row] for row in results[0][0]]
+        index, scorer = self._ensure_fuzzy(sanctions)
+
+        rows = index.candidates(name, min_overlap=min_overlap, max_candidates=max_candidates) if blocking else None
+        if rows is not None and not len(rows):
+            return []
+
+        scores = scorer.score_matrix([name], score_cutoff=threshold, rows=rows)[0]
+        rows = np.arange(len(scorer)) if rows is None else rows
+        keep = scores >= threshold
+        rows, _ = select_top_k(rows[keep], scores[keep], top_k)
+        return [scorer.names[row] for row in rows]
+
+    def fuzzy_batch_runner(self, names: list[str], threshold=80, sanctions: list[str] = None, top_k: int = None,
+                           groups=None):
+        """
+        Matches a batch of names against sanction strings with the multi-threaded bulk `token_sort_ratio`,
+        scattered over the sharded process pool when the screener was created with `fuzzy_workers`.
+
+        Args:
+            names (list[str]): The names to screen.
+            threshold (float): Minimum `token_sort_ratio` (0-100) for a match.
+            sanctions (list[str]): The sanction strings.
+            top_k (int): Optional cap on the matches returned per name.
+            groups: The uids of the sanctions owning the strings (see `sanction_group`), row-aligned
+                    with `sanctions`. The matches keep the best string of each sanction.
+
+        Returns:
+            list: For each name, its matches as [sanction_name, score, sanction uid] with the score on
+            the 0-1 scale, sorted by descending score. The uid is None without `groups`.
+        """
+        sanctions = sanctions if sanctions else []
+        groups = np.asarray(groups, dtype=np.int64) if groups is not None else None
+        found, scorer = self._fuzzy_search(names, sanctions, score_cutoff=threshold,
+                                           k=None if groups is not None else top_k)
+
+        results = []
+        for rows, scores in found:
+            if groups is not None:
+                rows, scores = collapse_groups(rows, scores, groups, top_k)
+            results.append([
+                [scorer.names[row], float(score) / 100, int(groups[row]) if groups is not None else None]
+                for row, score in zip(rows, scores)
+            ])
+        return results
 
     def jelly_fish_runner(self, name, threshold=0.5, sanctions: list[Sanctions] = None, ):
+        import torch
+        import torch.nn.functional as F
 
         sanctions = sanctions.copy() if sanctions else []
 
@@ -101,7 +279,7 @@ class NameScreener:
                     self._logger.warning(f"Invalid sanction name: {sanction}")
                     continue
 
-                sanc_name = f"{sanction.first_name} {sanction.last_name}"
+                sanc_name = sanction_name(sanction)
 
                 inputs = self.tokenizer(
                     [name.lower(), sanc_name.lower()],
@@ -130,100 +308,388 @@ class NameScreener:
                 self._logger.info(f"Error processing customer {name}: {e}")
         return matches
 
-    def ditto_runner(self, name: str, threshold=0.5, sanctions: list[Sanctions] = None, ):
+    def ditto_runner(self, name: str, threshold=0.5, sanctions: list[Sanctions] = None, top_k: int = None):
+        """Matches a given name against a list of sanctions with the pairwise classifier, in batches."""
+        sanctions = sanctions if sanctions else []
+        sanc_names = [sanction_name(sanction) for sanction in sanctions]
+        scores = self.pair_scores(name, sanc_names)
 
-        # Load tokenizer and model
-        # tokenizer = AutoTokenizer.from_pretrained(model_name)
-        # model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        matches = []
-        for idx, sanction in enumerate(sanctions):
-            self._logger.info("-" * 100)
-            self._logger.info(f"Processing {idx} reco")
-            sanc_name = f"{sanction.first_name} {sanction.last_name}"
-            # Tokenize the input pair
-            inputs = self.tokenizer(name, sanc_name, return_tensors="pt", truncation=True)
+        rows, scores = select_top_k(np.flatnonzero(scores >= threshold), scores[scores >= threshold], top_k)
+        return [[sanc_names[row], float(score), sanction_group(sanctions[row])] for row, score in zip(rows, scores)]
 
-            # Run inference
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                # Calculate probability for class 1 (match)
-                probabilities = softmax(logits, dim=1)
-                similarity_score = probabilities[0, 1].item()
+    def distl_roberta_runner(self, name: str, sanctions, threshold: float = 0.5, top_k: int = None):
+        """Matches a given name against a list of sanctions with the pairwise classifier, in batches."""
+        sanc_names = [sanction_name(sanction) for sanction in sanctions]
+        scores = self.pair_scores(name, sanc_names)
 
-            if similarity_score >= threshold:
-                matches.append([sanc_name, similarity_score, sanction.uid])
+        matches = []
+        rows, scores = select_top_k(np.flatnonzero(scores >= threshold), scores[scores >= threshold], top_k)
+        for row, match_score in zip(rows, scores):
+            self._logger.info(f"Match score for {sanc_names[row]}: {match_score:.3f}")
+            matches.append([sanc_names[row], float(match_score), sanction_group(sanctions[row])])
 
         return matches
 
-    def distl_roberta_runner(self, name: str, sanctions, threshold: float = 0.5):
-        matches = []
-        for idx, sanction in enumerate(sanctions):
-            self._logger.info("-" * 100)
-            self._logger.info(f"Processing {idx} reco")
-            sanc_name = f"{sanction.first_name} {sanction.last_name}"
-            result = self.classifier({"text": name, "text_pair": sanc_name})
-
-            # result[0] may be a list with one or two dictionaries.
-            # If only one is returned, infer the positive class probability:
-            match_score = None
-            if len(result[0]) == 1:
-                top = result[0][0]
-                label = top.get('label', '').upper()
-                score = top.get('score', 0.0)
-                # If the model returns the negative label, assume positive prob is (1 - score)
-                if label in ['LABEL_1', '1', 'MATCH']:
-                    match_score = score
-                elif label in ['LABEL_0', '0', 'NON-MATCH']:
-                    match_score = 1 - score
+    def build_matrix(self, sanctions, batch_size: int = 256) -> SanctionsMatrix:
+        """
+        Encodes the sanctions list once into a normalized embeddings matrix used by `sbert_runner`.
+
+        When the screener has a `store_path`, the stored matrix of the same model is memory-mapped
+        instead of encoding. A store written for another list version is brought up to date with
+        `SanctionsMatrix.apply_delta`, so only new or changed sanctions are encoded, and saved back.
+
+        Args:
+            sanctions (list): A list of sanction objects with attributes first_name, last_name, and uid.
+            batch_size (int): Number of sanction names per encode batch.
+
+        Returns:
+            SanctionsMatrix: The matrix, row-aligned with the sanction uids.
+        """
+        version = SanctionsMatrix.version_of(sanctions)
+        matrix = self._store.load() if self._store else None
+        if matrix is None:
+            matrix = SanctionsMatrix.build(self.model, sanctions, batch_size=batch_size, logger=self._logger)
+            if self._store:
+                matrix = self._saved(matrix)
+        elif matrix.version != version:
+            matrix, stats = matrix.apply_delta(self.model, sanctions, batch_size=batch_size, logger=self._logger)
+            self._logger.info(f"Applied sanctions delta to the stored matrix: {stats}")
+            matrix = self._saved(matrix.compacted())
+
+        index = self.build_index(matrix) if self._use_index or self._quantization else None
+        with self._lock:
+            self._matrix, self._index = matrix, index
+        return self._matrix
+
+    def refresh_matrix(self, sanctions, batch_size: int = 256, background: bool = True) -> dict:
+        """
+        Brings the cached matrix up to date with `sanctions`, encoding only new or changed entries.
+
+        The updated matrix is used right away with its tombstones; the compaction (dropping the dead
+        rows, rebuilding the index and saving the store) runs in a background thread unless
+        `background` is False.
+
+        Returns:
+            dict: The ``added``, ``changed`` and ``removed`` counts.
+        """
+        if self._matrix is None:
+            self.build_matrix(sanctions, batch_size=batch_size)
+            return {"added": len(self._matrix), "changed": 0, "removed": 0}
+
+        matrix, stats = self._matrix.apply_delta(self.model, sanctions, batch_size=batch_size, logger=self._logger)
+        with self._lock:
+            self._matrix = matrix
+        self._logger.info(f"Applied sanctions delta: {stats}")
+
+        if background:
+            threading.Thread(target=self._compact, args=(matrix,), daemon=True).start()
+        else:
+            self._compact(matrix)
+        return stats
+
+    def _saved(self, matrix: SanctionsMatrix) -> SanctionsMatrix:
+        """
+        Saves `matrix` to the store and returns it re-opened as a memory map, so the workers share the
+        stored pages instead of each keeping its own in-RAM copy.
+        """
+        self._store.save(matrix)
+        stored = self._store.load(list_version=matrix.version)
+        return stored if stored is not None else matrix
+
+    def _compact(self, matrix: SanctionsMatrix):
+        """Replaces `matrix` by its compacted copy (and index), unless a newer delta replaced it meanwhile."""
+        started = time.perf_counter()
+        compacted = matrix.compacted()
+        if self._store:
+            with self._lock:
+                superseded = self._matrix is not matrix
+            if superseded:
+                self._logger.info("Skipped the compaction of a superseded sanctions matrix")
+                return
+            compacted = self._saved(compacted)
+        index = self.build_index(compacted) if self._use_index or self._quantization else None
+
+        with self._lock:
+            if self._matrix is not matrix:
+                self._logger.info("Skipped the compaction of a superseded sanctions matrix")
+                return
+            self._matrix, self._index = compacted, index
+        self._logger.info(f"Compacted the sanctions matrix to {len(compacted)} rows "
+                          f"in {time.perf_counter() - started:.2f}s")
+
+    def build_index(self, matrix: SanctionsMatrix, nlist: int = ANN_NLIST) -> IVFFlatIndex | QuantizedMatrix:
+        """
+        Builds the approximate search structure over `matrix`: quantized codes when the screener
+        has a `quantization` mode, the IVF index otherwise.
+
+        When an `index_path` was given, a saved IVF index built for the same uids is loaded instead,
+        and a freshly built one is saved there.
+        """
+        if self._quantization:
+            # the candidates are rescored against the memory-mapped store rows, never an in-RAM float copy
+            rescore_from = matrix.matrix
+            if not isinstance(rescore_from, np.memmap):
+                stored = self._store.load(list_version=matrix.version) if self._store else None
+                if stored is not None:
+                    rescore_from = stored.matrix
                 else:
-                    self._logger.error(f"Unexpected label '{label}' for sanction {sanc_name}")
-                    continue
-            else:
-                # When multiple dictionaries are returned, search for the positive label.
-                for score_dict in result[0]:
-                    if isinstance(score_dict, dict) and score_dict.get('label', '').upper() in ['LABEL_1', '1',
-                                                                                                'MATCH']:
-                        match_score = score_dict.get('score')
-                        break
-
-            if match_score is None:
-                self._logger.warning(f"No positive label found for record {idx} with sanction {sanc_name}")
-                continue
-
-            self._logger.info(f"Match score for {sanc_name}: {match_score:.3f}")
-            if match_score >= threshold:
-                matches.append([sanc_name, match_score, sanction.uid])
+                    self._logger.warning("No embeddings store, the quantized codes rescore from the in-RAM matrix")
+            return QuantizedMatrix(mode=self._quantization, rescore_k=self._rescore_k, logger=self._logger).build(
+                matrix.matrix, rescore_from=rescore_from,
+            )
+
+        if self._index_path and os.path.exists(self._index_path):
+            index = IVFFlatIndex.load(self._index_path, logger=self._logger)
+            if index.uids is not None and np.array_equal(index.uids, matrix.uids):
+                index.nprobe = self._nprobe
+                self._logger.info(f"Loaded IVF index from '{self._index_path}'")
+                return index
+            self._logger.info(f"Stale IVF index at '{self._index_path}', rebuilding it")
+
+        index = IVFFlatIndex(nlist=nlist, nprobe=self._nprobe, logger=self._logger).build(
+            matrix.matrix, uids=matrix.uids,
+        )
+        if self._index_path:
+            index.save(self._index_path)
+        return index
+
+    def _ensure_matrix(self, sanctions) -> SanctionsMatrix:
+        """
+        Returns the cached matrix, updating it only when the given sanctions differ from the cached ones.
+
+        The same list object as the previous call (e.g. the snapshot the API service keeps until the
+        sanctions list version changes) is not hashed again.
+        """
+        if sanctions is self._matrix_source and self._matrix is not None:
+            return self._matrix
+        if self._matrix is None:
+            with self._lock:
+                # the concurrent first requests wait for a single build instead of each encoding the list
+                if self._matrix is None:
+                    self.build_matrix(sanctions)
+                    self._matrix_source = sanctions
+                    return self._matrix
+        if self._matrix.version != SanctionsMatrix.version_of(sanctions):
+            self.refresh_matrix(sanctions)
+        self._matrix_source = sanctions
+        return self._matrix
+
+    def _dense_search(self, name_embedding: np.ndarray, threshold: float,
+                      top_k: int = None, uids=None) -> tuple[SanctionsMatrix, list]:
+        """
+        Returns the cached matrix and the (at most `top_k`) best matches of a query embedding
+        against its live rows, one per sanction (its best-scoring alias), by descending score.
+
+        With an index or quantized codes, the rows appended by a delta after they were built are scanned
+        exhaustively. With `uids`, only the rows of those candidate sanctions are scored.
+        """
+        with self._lock:
+            matrix, index = self._matrix, self._index
+
+        if uids is not None:
+            rows = matrix.rows_of(uids)
+            scores = np.asarray(matrix.matrix[rows], dtype=np.float32) @ name_embedding
+            keep = scores >= threshold
+            rows, scores = matrix.collapse(rows[keep], scores[keep], top_k)
+        elif index is None:
+            rows, scores = matrix.select(matrix.score(name_embedding), threshold, k=top_k)
+        else:
+            rows, scores = index.search(name_embedding, top_k=None, threshold=threshold)[0]
+            if len(matrix) > len(index):
+                tail = matrix.matrix[len(index):] @ name_embedding
+                tail_rows = np.flatnonzero(tail >= threshold)
+                rows = np.concatenate([rows, tail_rows + len(index)])
+                scores = np.concatenate([scores, tail[tail_rows]])
+            keep = matrix.alive[rows]
+            rows, scores = matrix.collapse(rows[keep], scores[keep], top_k)
+        return matrix, matrix.to_matches(rows, scores)
+
+    def _ensure_arabic(self, sanctions) -> ArabicNameIndex:
+        """Returns the Arabic-script index of the sanctions having a rendering, rebuilt when the sanctions change."""
+        if sanctions is not self._arabic_source:
+            rendered = [sanction for sanction in sanctions if getattr(sanction, "arabic_name", None)]
+            self._arabic_index = ArabicNameIndex(
+                [sanction.arabic_name for sanction in rendered],
+                [sanction_name(sanction) for sanction in rendered],
+                [sanction_group(sanction) for sanction in rendered],
+            )
+            self._arabic_source = sanctions
+            self._logger.info(f"Indexed the Arabic renderings of {len(rendered)} of {len(sanctions)} sanctions")
+        return self._arabic_index
+
+    def has_arabic(self, sanctions) -> bool:
+        """Whether any of the sanctions has an Arabic-script rendering to match Arabic names against."""
+        return len(self._ensure_arabic(sanctions)) > 0
+
+    def arabic_runner(self, name: str, sanctions, threshold: float = 0.8, top_k: int = None) -> list:
+        """
+        Matches an Arabic-script name against the Arabic renderings of the sanctions, without translating it.
 
+        Args:
+            name (str): The input name, in Arabic script.
+            sanctions (list): Sanction objects, with the ``arabic_name`` column stored at ingest.
+            threshold (float): Minimum `token_sort_ratio` for a match, on the 0-1 scale.
+            top_k (int): Optional maximum number of matches.
+
+        Returns:
+            list: A list of matches as [sanction_name, score, sanction.uid], by descending score.
+        """
+        index = self._ensure_arabic(sanctions)
+        matches = index.search(name, threshold=threshold * 100, top_k=top_k)
+        self._logger.info(f"Screened {name} against {len(index)} Arabic renderings -> {len(matches)} matches")
         return matches
 
-    def sbert_runner(self, name: str, sanctions, threshold: float = 0.7):
+    def encode(self, names, batch_size: int = 32):
+        """Encodes one name or a list of names into normalized float32 embeddings."""
+        return self.model.encode(
+            names, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True,
+        )
+
+    def sbert_runner(self, name: str, sanctions, threshold: float = 0.7, top_k: int = None, uids=None,
+                     embedding: np.ndarray = None):
         """
         Matches a given name against a list of sanctions using Sentence-BERT.
 
+        The sanction names are embedded once into a cached matrix, so a call costs one
+        query encode plus a single matrix-vector product over the list, or over the probed
+        cells or the rescored candidates only when the screener was created with `use_index`
+        or `quantization`.
+
         Args:
             name (str): The input entity description.
             sanctions (list): A list of sanction objects with attributes first_name, last_name, and uid.
             threshold (float): Cosine similarity threshold for a match.
+            top_k (int): Optional maximum number of matches.
+            uids: Optional candidate sanction uids (e.g. from the blocking keys), the only ones scored.
+            embedding (np.ndarray): Optional normalized embedding of `name`, e.g. from a batched encode.
 
         Returns:
-            list: A list of matches as [sanction_name, similarity_score, sanction.uid].
+            list: A list of matches as [sanction_name, similarity_score, sanction.uid], by descending score.
         """
-        matches = []
-        # Encode the input name only once
-        name_embedding = self.model.encode(name, convert_to_tensor=True)
+        self._ensure_matrix(sanctions)
+        embedding = embedding if embedding is not None else self.encode(name)
+        matrix, matches = self._dense_search(embedding, threshold, top_k=top_k, uids=uids)
+        screened = len(matrix) if uids is None else len(uids)
+        self._logger.info(f"Screened {name} against {screened} sanctions -> {len(matches)} matches")
+        return matches
 
-        for idx, sanction in enumerate(sanctions):
-            sanc_name = f"{sanction.first_name} {sanction.last_name}"
-            # Encode each sanction name
-            sanction_embedding = self.model.encode(sanc_name, convert_to_tensor=True)
-            # Compute cosine similarity between the two embeddings
-            similarity = util.cos_sim(name_embedding, sanction_embedding).item()
+    def sbert_batch_runner(self, names: list[str], sanctions, threshold: float = 0.7,
+                           batch_size: int = 64, block_size: int = 4096, top_k: int = None):
+        """
+        Matches a batch of names against a list of sanctions using Sentence-BERT.
 
-            self._logger.info(f"Processing record {idx}: {sanc_name} -> similarity: {similarity:.3f}")
-            if similarity >= threshold:
-                matches.append([sanc_name, similarity, sanction.uid])
+        Names are encoded `batch_size` at a time and each batch is scored against the cached
+        sanctions matrix `block_size` rows at a time, so memory stays bounded for large batches.
 
-        return matches
+        Args:
+            names (list[str]): The input entity descriptions.
+            sanctions (list): A list of sanction objects with attributes first_name, last_name, and uid.
+            threshold (float): Cosine similarity threshold for a match.
+            batch_size (int): Number of names encoded and scored together.
+            block_size (int): Number of sanction rows scored per block.
+            top_k (int): Optional maximum number of matches per name.
 
+        Returns:
+            list: For each name, a list of matches as [sanction_name, similarity_score, sanction.uid],
+            by descending score.
+        """
+        matrix = self._ensure_matrix(sanctions)
+        results = []
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            embeddings = self.encode(batch, batch_size=batch_size)
+            results.extend(matrix.select_batch(embeddings, threshold, block_size=block_size, k=top_k))
+            self._logger.info(f"Screened names {start} to {start + len(batch)} of {len(names)}")
+        return results
+
+    def _load_pair_model(self) -> tuple:
+        """Loads the tokenizer and model of the pairwise classifier of the pair runners and the cascade rerank."""
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self._logger.info(f"Loading pair model {self._pair_model_name}")
+        return (
+            AutoTokenizer.from_pretrained(self._pair_model_name),
+            AutoModelForSequenceClassification.from_pretrained(self._pair_model_name).eval(),
+        )
+
+    def pair_scores(self, name: str, candidates: list[str]) -> np.ndarray:
+        """Scores every (name, candidate) pair with the pairwise classifier, see `PairScorer`."""
+        tokenizer, model = self._registry.get(self._pair_key)
+        scorer = PairScorer(tokenizer, model, batch_size=self._pair_batch_size, max_length=self._pair_max_length)
+        return scorer.score([(name, candidate) for candidate in candidates])
+
+    def phonetic_candidates(self, name: str, sanctions, min_tokens: int = PHONETIC_MIN_TOKENS,
+                            max_candidates: int = PHONETIC_MAX_CANDIDATES) -> np.ndarray:
+        """
+        Returns the live matrix rows of the sanctions sharing a phonetic key with `name`, see `PhoneticIndex`.
 
+        The phonetic index is built from the keys computed at ingest and rebuilt when the sanctions change.
+        """
+        matrix = self._ensure_matrix(sanctions)
+        if self._phonetic_index is None or self._phonetic_version != matrix.version:
+            self._phonetic_index = PhoneticIndex.from_sanctions(sanctions)
+            self._phonetic_version = matrix.version
+
+        return matrix.rows_of(
+            self._phonetic_index.candidates(name, min_tokens=min_tokens, max_candidates=max_candidates)
+        )
+
+    def cascade_runner(self, name: str, sanctions, threshold: float = 0.5,
+                       lexical_k: int = CASCADE_LEXICAL_K, dense_k: int = CASCADE_DENSE_K,
+                       rerank_k: int = CASCADE_RERANK_K, phonetic: bool = False):
+        """
+        Matches a given name against a list of sanctions through a three-stage cascade.
+
+        1. lexical: bulk `token_sort_ratio` over the whole list, or only over its phonetic candidates
+           with `phonetic`, keeps the best `lexical_k` sanctions.
+        2. dense: the Sentence-BERT matrix rows of those keeps the best `dense_k`, one per sanction.
+        3. rerank: the pairwise classifier scores them and the best `rerank_k` over `threshold` are kept.
+
+        Args:
+            name (str): The input entity description.
+            sanctions (list): A list of sanction objects with attributes first_name, last_name, and uid.
+            threshold (float): Minimum pairwise classifier probability for a match.
+            lexical_k (int): Candidate budget of the lexical stage.
+            dense_k (int): Candidate budget of the bi-encoder stage.
+            rerank_k (int): Maximum matches returned by the rerank stage.
+            phonetic (bool): Restrict the lexical stage to the phonetic key candidates of the name.
+
+        Returns:
+            tuple[list, dict]: The matches as [sanction_name, score, sanction.uid] sorted by descending
+            score, and the per-stage timings in milliseconds.
+        """
+        timings = {}
+
+        started = time.perf_counter()
+        matrix = self._ensure_matrix(sanctions)
+        scorer = self._ensure_cascade_scorer(matrix)
+        if phonetic:
+            candidates = self.phonetic_candidates(name, sanctions)
+        elif not matrix.alive.all():
+            # the rows tombstoned by a delta are left out before the top-k, so they never take a lexical slot
+            candidates = np.flatnonzero(matrix.alive)
+        else:
+            candidates = None
+        if candidates is None:
+            rows, _ = scorer.search([name], k=lexical_k)[0]
+        else:
+            scores = scorer.score_matrix([name], rows=candidates)[0] if len(candidates) else np.zeros(0)
+            rows, _ = select_top_k(candidates, scores, lexical_k)
+        timings["lexical"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        dense_scores = matrix.matrix[rows] @ self.encode(name)
+        rows, dense_scores = matrix.collapse(rows, dense_scores, dense_k)
+        timings["dense"] = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        pair_scores = self.pair_scores(name, [matrix.names[row] for row in rows])
+        order = np.argsort(-pair_scores, kind="stable")[:rerank_k]
+        matches = [
+            [matrix.names[rows[idx]], float(pair_scores[idx]), int(matrix.groups[rows[idx]])]
+            for idx in order if pair_scores[idx] >= threshold
+        ]
+        timings["rerank"] = (time.perf_counter() - started) * 1000
+
+        self._logger.info(f"Cascade for {name}: {len(rows)} reranked -> {len(matches)} matches, timings {timings}")
+        return matches, timings
@@ -0,0 +1,158 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from controllers.embeddings import SanctionsMatrix
+
+
+class EmbeddingStore:
+    """
+    On-disk, memory-mapped store of a sanctions embeddings matrix for one model.
+
+    The store of a model lives in ``<root>/<model name>/`` and holds:
+        - ``embeddings.bin``: the raw row-major float32 or float16 matrix,
+        - ``uids.npy``: the int64 row keys, row-aligned with the matrix,
+        - ``groups.npy``: the int64 uids of the sanctions owning the rows (aliases), row-aligned with the matrix,
+        - ``names.json``: the sanction names, row-aligned with the matrix,
+        - ``hashes.json``: the content hashes of the sanction name fields, row-aligned with the matrix,
+        - ``meta.json``: the header (model name, dimension, dtype, count and list version).
+
+    Opening the matrix with ``np.memmap`` makes startup near-instant and lets every worker
+    process share the same pages of the OS page cache. A store written for another model or
+    dimension, or for another list version when one is requested, is treated as missing.
+    """
+
+    META_FILE = "meta.json"
+    EMBEDDINGS_FILE = "embeddings.bin"
+    UIDS_FILE = "uids.npy"
+    GROUPS_FILE = "groups.npy"
+    NAMES_FILE = "names.json"
+    HASHES_FILE = "hashes.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, root: str, model_name: str, dtype: str = "float32", logger: logging.Logger = None):
+        if np.dtype(dtype) not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported embeddings store dtype '{dtype}'.")
+        self._root = root
+        self._model_name = model_name
+        self._dtype = np.dtype(dtype)
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._path = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self._path, name)
+
+    def meta(self) -> dict:
+        """Return the header of the store, or None when the store does not exist."""
+        try:
+            with open(self._file(self.META_FILE), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def is_valid(self, list_version: str = None) -> bool:
+        """Whether the store exists and was written for this model and list version."""
+        meta = self.meta()
+        return bool(meta) and meta.get("model") == self._model_name \
+            and (list_version is None or meta.get("list_version") == list_version)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """
+        Holds the store lock file, exclusively while saving and shared while loading, so the
+        processes saving concurrently (API workers, their compaction threads, the scraper)
+        never interleave their files and readers never open a half-replaced set.
+        """
+        os.makedirs(self._path, exist_ok=True)
+        with open(self._file(self.LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _temporary(self, name: str) -> str:
+        """Returns a new, unique temporary file next to the store file ``name``."""
+        handle, path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=self._path)
+        os.close(handle)
+        return path
+
+    def load(self, list_version: str = None) -> SanctionsMatrix:
+        """
+        Open the stored matrix as a read-only memory map.
+
+        Returns:
+            SanctionsMatrix: The stored matrix, or None when the store is missing or stale.
+        """
+        with self._locked(exclusive=False):
+            meta = self.meta()
+            if not self.is_valid(list_version=list_version):
+                return None
+            uids = np.load(self._file(self.UIDS_FILE))
+            # stores written before aliases were indexed have no groups, every row is a primary name
+            groups = np.load(self._file(self.GROUPS_FILE)) if os.path.exists(self._file(self.GROUPS_FILE)) else None
+            with open(self._file(self.NAMES_FILE), encoding="utf-8") as file:
+                names = json.load(file)
+            with open(self._file(self.HASHES_FILE), encoding="utf-8") as file:
+                hashes = json.load(file)
+            matrix = np.memmap(
+                self._file(self.EMBEDDINGS_FILE), dtype=np.dtype(meta["dtype"]), mode="r",
+                shape=(meta["count"], meta["dim"]),
+            ) if meta["count"] else np.zeros((0, meta["dim"]), dtype=np.float32)
+        self._logger.info(f"Opened embeddings store '{self._path}' ({meta['count']} x {meta['dim']} {meta['dtype']})")
+        return SanctionsMatrix(uids=uids, names=names, matrix=matrix, hashes=hashes, groups=groups)
+
+    def save(self, matrix: SanctionsMatrix):
+        """
+        Write ``matrix`` to the store, without its tombstoned rows, replacing the previous content.
+
+        Every file is written to a unique temporary file next to its target and moved in place, the
+        header last, under the exclusive store lock, so concurrent saves never mix their files and
+        readers never see a header describing a partially written matrix.
+        """
+        matrix = matrix.compacted() if matrix.dead else matrix
+        os.makedirs(self._path, exist_ok=True)
+
+        with self._locked(exclusive=True):
+            temporary = {name: self._temporary(name) for name in (
+                self.EMBEDDINGS_FILE, self.UIDS_FILE, self.GROUPS_FILE, self.NAMES_FILE, self.HASHES_FILE,
+                self.META_FILE,
+            )}
+            try:
+                np.ascontiguousarray(matrix.matrix, dtype=self._dtype).tofile(temporary[self.EMBEDDINGS_FILE])
+                with open(temporary[self.UIDS_FILE], "wb") as file:
+                    np.save(file, matrix.uids)
+                with open(temporary[self.GROUPS_FILE], "wb") as file:
+                    np.save(file, matrix.groups)
+                with open(temporary[self.NAMES_FILE], "w", encoding="utf-8") as file:
+                    json.dump(matrix.names, file, ensure_ascii=False)
+                with open(temporary[self.HASHES_FILE], "w", encoding="utf-8") as file:
+                    json.dump(matrix.hashes, file)
+                with open(temporary[self.META_FILE], "w", encoding="utf-8") as file:
+                    json.dump({
+                        "model": self._model_name,
+                        "dim": matrix.dim,
+                        "dtype": self._dtype.name,
+                        "count": len(matrix),
+                        "list_version": matrix.version,
+                    }, file)
+
+                if os.path.exists(self._file(self.META_FILE)):
+                    os.remove(self._file(self.META_FILE))
+                for name, path in temporary.items():  # the header last
+                    os.replace(path, self._file(name))
+            finally:
+                for path in temporary.values():
+                    if os.path.exists(path):
+                        os.remove(path)
+        self._logger.info(f"Saved {len(matrix)} embeddings to store '{self._path}'")
@@ -1,7 +1,24 @@
 import logging
 import re
-from transformers import MarianMTModel, MarianTokenizer
-import torch
+
+from controllers.consts import TRANSLATION_BATCH_SIZE, TRANSLATION_NUM_BEAMS, TRANSLATION_MAX_NEW_TOKENS, \
+    TRANSLATION_MAX_LENGTH, TRANSLATION_CACHE_MAXSIZE, TRANSLATION_CACHE_PATH, TRANSLITERATION_MIN_CONFIDENCE
+from controllers.backends import load_translator
+from controllers.caches import TranslationCache
+from controllers.registry import REGISTRY, ModelRegistry
+from controllers.transliterators import NameTransliterator
+
+
+def translation_cache(config: dict, logger: logging.Logger = None) -> TranslationCache:
+    """Builds the translation cache of the config ``translation_cache`` section, None without one."""
+    options = config.get("translation_cache")
+    if options is None or not options.get("enabled", True):
+        return None
+    return TranslationCache(
+        path=options.get("path", TRANSLATION_CACHE_PATH),
+        maxsize=options.get("maxsize", TRANSLATION_CACHE_MAXSIZE),
+        logger=logger,
+    )
 
 
 class NameTranslator:
@@ -17,32 +34,86 @@ class NameTranslator:
 
     ARABIC_MODEL_NAME = "Helsinki-NLP/opus-mt-tc-big-ar-en"
     ENGLISH_MODEL_NAME = "Helsinki-NLP/opus-mt-tc-big-en-ar"
+    # The English-to-Arabic model has several target languages, selected by a token leading every source
+    ARABIC_TARGET_TOKEN = ">>ara<<"
 
-    def __init__(self, device: str = None, logger: logging.Logger = None):
+    def __init__(self, device: str = None, logger: logging.Logger = None, registry: ModelRegistry = None,
+                 batch_size: int = TRANSLATION_BATCH_SIZE, num_beams: int = TRANSLATION_NUM_BEAMS,
+                 max_new_tokens: int = TRANSLATION_MAX_NEW_TOKENS, max_length: int = TRANSLATION_MAX_LENGTH,
+                 cache: TranslationCache = None, transliterate: bool = True,
+                 min_confidence: float = TRANSLITERATION_MIN_CONFIDENCE, backend: str = "torch",
+                 backend_cache: str = "stores/backends"):
         """
-        Initialize models and tokenizers.
+        Register the models and tokenizers, they are loaded on first use (or by `warm`) and
+        shared through the model registry.
 
         Args:
             device (str): Torch device to run the models on, e.g., "cpu" or "cuda".
                           If None, uses "cuda" if available, else "cpu".
+            logger (logging.Logger): Optional logger.
+            registry (ModelRegistry): The model registry, the process-wide one by default.
+            batch_size (int): Names translated per generate call.
+            num_beams (int): 1 for greedy decoding, more for beam search.
+            max_new_tokens (int): Maximum generated tokens per name.
+            max_length (int): Maximum source tokens per name, longer names are truncated.
+            cache (TranslationCache): Optional cache of the translations, looked up before the model.
+            transliterate (bool): Whether names are first transliterated by rules, the model only
+                                  translating the names transliterated with less than ``min_confidence``.
+            min_confidence (float): Minimum confidence of a rule-based transliteration.
+            backend (str): Inference backend of the model, ``torch``, ``quantized`` (dynamic int8)
+                           or ``onnx`` (ONNX Runtime with key / value cache), the last two on CPU.
+            backend_cache (str): Where the ONNX export is cached.
         """
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self._device = device if backend == "torch" else "cpu"
+        self._backend = backend
+        self._backend_cache = backend_cache
+        self.batch_size = batch_size
+        self.num_beams = num_beams
+        self.max_new_tokens = max_new_tokens
+        self.max_length = max_length
+        self.cache = cache
+        self.transliterator = NameTransliterator(min_confidence=min_confidence) if transliterate else None
+        self._logger = logger if logger else logging.getLogger(__name__)
+        self._registry = registry if registry else REGISTRY
+
+        # Arabic-to-English model and tokenizer
+        self._ar_en_key = ("translator", self.ARABIC_MODEL_NAME, backend, self._device)
+        self._registry.register(self._ar_en_key, lambda: self._load(self.ARABIC_MODEL_NAME))
+
+        # English-to-Arabic model and tokenizer, used offline to render the sanctions in Arabic script
+        self._en_ar_key = ("translator", self.ENGLISH_MODEL_NAME, backend, self._device)
+        self._registry.register(self._en_ar_key, lambda: self._load(self.ENGLISH_MODEL_NAME))
 
-        # Load Arabic-to-English model and tokenizer
-        self.tokenizer_ar_en = MarianTokenizer.from_pretrained(
-            self.ARABIC_MODEL_NAME,
-            # timeout=60,  # Increase timeout to 60 seconds
-            # resume_download=True,  # Resume failed downloads instead of restarting
+        # non-eager backends translate slightly differently, so their translations are cached apart
+        self._cache_models = {
+            key: key[1] if backend == "torch" else f"{key[1]}@{backend}" for key in (self._ar_en_key, self._en_ar_key)
+        }
+
+    @property
+    def device(self) -> str:
+        if self._device is None:
+            import torch
+
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    def _load(self, model_name: str) -> tuple:
+        """Loads the tokenizer and model of ``model_name`` on the translator backend and device."""
+        return load_translator(
+            model_name, backend=self._backend, cache_dir=self._backend_cache, device=self.device, logger=self._logger,
         )
-        self.model_ar_en = MarianMTModel.from_pretrained(
-            self.ARABIC_MODEL_NAME,
-            # timeout=60,  # Increase timeout to 60 seconds
-            # resume_download=True,  # duplicated, this is the default behavior
-        ).to(self.device)
 
-        # # Load English-to-Arabic model and tokenizer
-        # self.tokenizer_en_ar = MarianTokenizer.from_pretrained(self.ENGLISH_MODEL_NAME)
-        # self.model_en_ar = MarianMTModel.from_pretrained(self.ENGLISH_MODEL_NAME).to(self.device)
+    @property
+    def tokenizer_ar_en(self):
+        return self._registry.get(self._ar_en_key)[0]
+
+    @property
+    def model_ar_en(self):
+        return self._registry.get(self._ar_en_key)[1]
+
+    def warm(self):
+        """Loads the translation model ahead of the first request."""
+        self._registry.warm(self._ar_en_key)
 
     def translate(self, name: str,) -> str:
 
@@ -53,20 +124,144 @@ class NameTranslator:
         #     tokenizer = self.tokenizer_en_ar
         #     model = self.model_en_ar
 
-        inputs = self.tokenizer_ar_en([name], return_tensors="pt", padding=True).to(self.device)
-        translated_ids = self.model_ar_en.generate(**inputs)
-        translation = self.tokenizer_ar_en.decode(translated_ids[0], skip_special_tokens=True)
-        return translation
+        return self.translate_batch([name])[0]
+
+    def _lookup(self, names: list[str], key: tuple = None) -> tuple[dict[str, str], list[str]]:
+        """Returns the cached translations by normalized name, and the distinct normalized names not cached."""
+        found = self.cache.get_many(self._cache_models[key if key else self._ar_en_key], names)
+        missing = list(dict.fromkeys(source for source in map(self.cache.normalize, names) if source not in found))
+        return found, missing
+
+    def translate_batch(self, names: list[str], batch_size: int = None) -> list[str]:
+        """
+        Translates a list of names, in the input order.
+
+        Names confidently transliterated by rules skip the model. Names found in the translator
+        cache are not translated again, the others are translated once each and cached.
+
+        Args:
+            names (list[str]): The names to translate.
+            batch_size (int): Names per generate call, the translator one by default.
+
+        Returns:
+            list[str]: The translations, aligned with ``names``.
+        """
+        if self.transliterator is not None:
+            translations = self.transliterator.resolve(names)
+            pending = [idx for idx, translation in enumerate(translations) if translation is None]
+            if pending:
+                for idx, translation in zip(pending, self._translate([names[idx] for idx in pending], batch_size)):
+                    translations[idx] = translation
+            return translations
+        return self._translate(names, batch_size)
+
+    def translate_to_arabic(self, names: list[str], batch_size: int = None) -> list[str]:
+        """
+        Translates a list of Latin-script names to Arabic script, in the input order.
+
+        Meant for the offline rendering of the sanctions list, so it goes through the translator
+        cache but not the rule-based transliteration.
+        """
+        return self._translate(names, batch_size, key=self._en_ar_key)
+
+    def _translate(self, names: list[str], batch_size: int = None, key: tuple = None) -> list[str]:
+        """Translates a list of names with the model, through the translator cache when there is one."""
+        if key == self._en_ar_key:
+            # the target token is part of the cache key too, so renderings without it are never served
+            names = [f"{self.ARABIC_TARGET_TOKEN} {name}" for name in names]
+        if self.cache is None:
+            return self._generate(names, batch_size=batch_size, key=key)
+
+        found, missing = self._lookup(names, key=key)
+        if missing:
+            translated = dict(zip(missing, self._generate(missing, batch_size=batch_size, key=key)))
+            self.cache.put_many(self._cache_models[key if key else self._ar_en_key], translated)
+            found.update(translated)
+        return [found[self.cache.normalize(name)] for name in names]
 
+    def prewarm(self, names: list[str], batch_size: int = None) -> int:
+        """
+        Translates and caches the given names ahead of their screening, e.g. the whole customer table.
+
+        Returns:
+            int: Number of names translated by the model, the others being cached or transliterated by rules.
+        """
+        if self.cache is None:
+            raise ValueError("Prewarming needs a translation cache.")
+        if self.transliterator is not None:
+            # the names resolved by rules never reach the model, nor its cache
+            names = [
+                name for name in names
+                if self.transliterator.transliterate(name)[1] < self.transliterator.min_confidence
+            ]
+        _, missing = self._lookup(names)
+        for start in range(0, len(missing), 10 * self.batch_size):
+            chunk = missing[start:start + 10 * self.batch_size]
+            translated = dict(zip(chunk, self._generate(chunk, batch_size=batch_size)))
+            self.cache.put_many(self._cache_models[self._ar_en_key], translated)
+            self._logger.info(f"Prewarmed {start + len(chunk)} of {len(missing)} translations")
+        return len(missing)
+
+    def _generate(self, names: list[str], batch_size: int = None, key: tuple = None) -> list[str]:
+        """
+        Translates a list of names with the model, in the input order.
+
+        Names are sorted by length so every batch is padded only to its own longest name, and
+        decoded with the translator decoding settings, under ``torch.inference_mode`` for the torch
+        backends. The ONNX backend runs on numpy inputs, without importing torch.
+
+        Args:
+            names (list[str]): The names to translate.
+            batch_size (int): Names per generate call, the translator one by default.
+            key (tuple): Registry key of the model, the Arabic-to-English one by default.
+
+        Returns:
+            list[str]: The translations, aligned with ``names``.
+        """
+        batch_size = batch_size if batch_size else self.batch_size
+        tokenizer, model = self._registry.get(key if key else self._ar_en_key)
+        order = sorted(range(len(names)), key=lambda idx: len(names[idx]))
+
+        translations = [None] * len(names)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = tokenizer(
+                [names[idx] for idx in batch], return_tensors="np" if self._backend == "onnx" else "pt",
+                padding=True, truncation=True, max_length=self.max_length,
+            )
+            options = dict(
+                num_beams=self.num_beams, do_sample=False, max_new_tokens=self.max_new_tokens,
+                early_stopping=self.num_beams > 1,
+            )
+            if self._backend == "onnx":
+                # the ONNX backend mirrors MarianMTModel.generate
+                translated_ids = model.generate(**inputs, **options)
+            else:
+                import torch
+
+                with torch.inference_mode():
+                    translated_ids = model.generate(**inputs.to(self.device), **options)
+            for idx, translation in zip(batch, tokenizer.batch_decode(translated_ids, skip_special_tokens=True)):
+                translations[idx] = translation
+        return translations
 
 if __name__ == "__main__":
     # Sample names to translate
     names = [
         "عبدالرحمن محمد المجزوب",  # Arabic name to be translated to English
-        "Jakson Oscar Younes"  # English name to be translated to Arabic
+        "أيمن الظواهري",
+    ]
+    # SDN names rendered in Arabic script at ingest
+    sdn_names = [
+        "Ayman Al-Zawahiri",
+        "Hasan Nasrallah",
+        "Abu Bakr Al-Baghdadi",
+        "Qasem Soleimani",
+        "Abdul Rahman Yasin",
     ]
 
     translator = NameTranslator()
-    for name in names:
-        translated = translator.translate(name)
+    for name, translated in zip(names, translator.translate_batch(names)):
+        print(f"{name}  ==>  {translated}")
+    for name, translated in zip(sdn_names, translator.translate_to_arabic(sdn_names)):
         print(f"{name}  ==>  {translated}")
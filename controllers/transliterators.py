@@ -0,0 +1,208 @@
+import re
+import threading
+
+from controllers.consts import TRANSLITERATION_MIN_CONFIDENCE
+from controllers.phonetics import ARABIC_MARKS
+
+# Usual Latin spelling of common Arabic given names
+GIVEN_NAMES = {
+    "محمد": "Mohammed", "أحمد": "Ahmed", "محمود": "Mahmoud", "مصطفى": "Mustafa", "علي": "Ali", "عمر": "Omar",
+    "عثمان": "Othman", "حسن": "Hassan", "حسين": "Hussein", "حسني": "Hosni", "خالد": "Khaled", "خليل": "Khalil",
+    "إبراهيم": "Ibrahim", "إسماعيل": "Ismail", "يوسف": "Youssef", "يعقوب": "Yacoub", "موسى": "Musa",
+    "عيسى": "Issa", "سليمان": "Suleiman", "داود": "Dawood", "يحيى": "Yahya", "زكريا": "Zakaria", "إلياس": "Elias",
+    "آدم": "Adam", "سعيد": "Saeed", "سعد": "Saad", "سعود": "Saud", "سلمان": "Salman", "سالم": "Salem",
+    "سلطان": "Sultan", "صالح": "Saleh", "طارق": "Tariq", "طه": "Taha", "حمزة": "Hamza", "حامد": "Hamed",
+    "حميد": "Hamid", "أمين": "Amin", "أمير": "Amir", "أنس": "Anas", "أسامة": "Osama", "بكر": "Bakr",
+    "جمال": "Jamal", "جعفر": "Jaafar", "رشيد": "Rashid", "رضا": "Reda", "زياد": "Ziad", "زيد": "Zaid",
+    "سامي": "Sami", "سمير": "Samir", "شريف": "Sharif", "عادل": "Adel", "عامر": "Amer", "عباس": "Abbas",
+    "عزيز": "Aziz", "عصام": "Essam", "عماد": "Emad", "عمار": "Ammar", "عوض": "Awad", "فارس": "Fares",
+    "فاروق": "Farouk", "فهد": "Fahd", "فيصل": "Faisal", "قاسم": "Qasim", "كريم": "Karim", "كمال": "Kamal",
+    "ماجد": "Majed", "مالك": "Malik", "مجدي": "Magdi", "مراد": "Murad", "منصور": "Mansour", "مهدي": "Mahdi",
+    "ناصر": "Nasser", "نبيل": "Nabil", "نصر": "Nasr", "هادي": "Hadi", "هاني": "Hani", "هشام": "Hisham",
+    "وليد": "Walid", "ياسر": "Yasser", "ياسين": "Yassin", "يونس": "Younes", "إدريس": "Idris", "بشير": "Bashir",
+    "بشار": "Bashar", "توفيق": "Tawfiq", "جابر": "Jaber", "جلال": "Jalal", "حافظ": "Hafez", "حبيب": "Habib",
+    "حيدر": "Haidar", "راشد": "Rashed", "رامي": "Rami", "رياض": "Riyad", "سيف": "Saif", "شاكر": "Shaker",
+    "صلاح": "Salah", "عاطف": "Atef", "عبيد": "Obaid", "عدنان": "Adnan", "علاء": "Alaa", "عمرو": "Amr",
+    "غازي": "Ghazi", "فؤاد": "Fouad", "فتحي": "Fathi", "فراس": "Firas", "قيس": "Qais", "مازن": "Mazen",
+    "محسن": "Mohsen", "معاذ": "Muath", "منير": "Munir", "نادر": "Nader", "نزار": "Nizar", "نور": "Nour",
+    "هيثم": "Haitham", "وائل": "Wael", "أيمن": "Ayman", "أنور": "Anwar", "فاطمة": "Fatima", "عائشة": "Aisha",
+    "خديجة": "Khadija", "مريم": "Maryam", "زينب": "Zainab", "ليلى": "Layla", "سارة": "Sara", "نادية": "Nadia",
+    "هدى": "Huda", "أمل": "Amal", "رانيا": "Rania", "سلمى": "Salma", "منى": "Mona", "هند": "Hind",
+}
+
+# Usual Latin spelling of common family names, and of the nisba names found after the al- article
+FAMILY_NAMES = {
+    "هاشمي": "Hashimi", "مصري": "Masri", "بغدادي": "Baghdadi", "زرقاوي": "Zarqawi", "شامي": "Shami",
+    "تكريتي": "Tikriti", "حوثي": "Houthi", "أسد": "Assad", "عراقي": "Iraqi", "ليبي": "Libi", "يمني": "Yemeni",
+    "كويتي": "Kuwaiti", "ظواهري": "Zawahiri", "قحطاني": "Qahtani", "عتيبي": "Otaibi", "شمري": "Shammari",
+    "دوسري": "Dosari", "حربي": "Harbi", "غامدي": "Ghamdi", "زهراني": "Zahrani", "مطيري": "Mutairi",
+    "أنصاري": "Ansari", "منصوري": "Mansouri", "قادري": "Qadri", "نجار": "Najjar", "حداد": "Haddad",
+    "خوري": "Khoury", "درويش": "Darwish", "نصرالله": "Nasrallah", "صباح": "Sabah", "ثاني": "Thani",
+    "مكتوم": "Maktoum", "نهيان": "Nahyan", "خليفة": "Khalifa", "سوداني": "Sudani", "فلسطيني": "Filastini",
+}
+
+# Divine names completing the abd- compounds, e.g. Abd al-Rahman
+DIVINE_NAMES = {
+    "رحمن": "rahman", "رحيم": "rahim", "عزيز": "aziz", "كريم": "karim", "مجيد": "majid", "حميد": "hamid",
+    "ملك": "malik", "قادر": "qadir", "رزاق": "razzaq", "ستار": "sattar", "غني": "ghani", "حكيم": "hakim",
+    "لطيف": "latif", "باسط": "basit", "ناصر": "nasser", "وهاب": "wahab", "جبار": "jabbar", "سلام": "salam",
+    "حليم": "halim", "فتاح": "fattah", "هادي": "hadi", "واحد": "wahid", "عليم": "alim", "منعم": "moneim",
+    "رؤوف": "raouf", "صمد": "samad", "حق": "haq", "رشيد": "rashid", "نور": "nour", "مطلب": "muttalib",
+    "قوي": "qawi", "ودود": "wadud", "جليل": "jalil", "خالق": "khaliq", "باري": "bari", "شكور": "shakur",
+    "حفيظ": "hafiz", "غفار": "ghaffar", "رب": "rab", "إله": "ilah",
+}
+
+# Name particles
+PARTICLES = {
+    "بن": "bin", "ابن": "ibn", "بنت": "bint", "أبو": "Abu", "ابو": "Abu", "أبي": "Abi", "أم": "Umm", "آل": "Al",
+}
+
+# Letter by letter rendering of the tokens missing from the tables, long vowels are context dependent
+CONSONANTS = {
+    "ب": "b", "ت": "t", "ث": "th", "ج": "j", "ح": "h", "خ": "kh", "د": "d", "ذ": "dh", "ر": "r", "ز": "z",
+    "س": "s", "ش": "sh", "ص": "s", "ض": "d", "ط": "t", "ظ": "z", "غ": "gh", "ف": "f", "ق": "q", "ك": "k",
+    "ل": "l", "م": "m", "ن": "n", "ه": "h", "ء": "", "ئ": "", "ؤ": "", "ع": "", "پ": "p", "چ": "ch",
+    "گ": "g", "ڤ": "v",
+}
+LONG_VOWELS = {"ا": "a", "ى": "a", "ة": "a", "و": "ou", "ي": "i"}
+
+ARABIC_TOKEN = re.compile(r"^[ء-يپچڤگ]+$")
+
+
+def fold_arabic(token: str) -> str:
+    """Folds the spelling variants of an Arabic token: marks, hamza carrying alefs and final ya."""
+    token = ARABIC_MARKS.sub("", token)
+    token = re.sub("[أإآٱ]", "ا", token)
+    return re.sub("ى$", "ي", token)
+
+
+def _folded(table: dict) -> dict:
+    return {fold_arabic(key): value for key, value in table.items()}
+
+
+class NameTransliterator:
+    """
+    Rule-based Arabic to Latin transliteration of personal names, with a confidence score.
+
+    Tokens are resolved, by decreasing confidence, from the tables of common given and family
+    names, the al- article and abd- compounds built on them, the name particles, and at last a
+    letter by letter rendering. Short vowels are not written in Arabic, so the letter rendering
+    has to guess them and gets a low confidence, below the default threshold: names with a token
+    missing from the tables are left to the translation model.
+
+    Attributes:
+        hits (int): Number of names resolved with enough confidence.
+        misses (int): Number of names left to the translation model.
+    """
+
+    GIVEN = _folded(GIVEN_NAMES)
+    FAMILY = _folded(FAMILY_NAMES)
+    DIVINE = _folded(DIVINE_NAMES)
+    PARTICLE = _folded(PARTICLES)
+
+    def __init__(self, min_confidence: float = TRANSLITERATION_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _known(self, token: str) -> str:
+        """Returns the table spelling of a folded token, None when it is not in the tables."""
+        return self.GIVEN.get(token) or self.FAMILY.get(token)
+
+    def _letters(self, token: str) -> str:
+        """Renders a folded token letter by letter."""
+        latin = []
+        for index, char in enumerate(token):
+            if char in LONG_VOWELS:
+                # an initial waw or ya is a consonant
+                latin.append({"و": "w", "ي": "y"}.get(char, "a") if index == 0 else LONG_VOWELS[char])
+            else:
+                latin.append(CONSONANTS.get(char, ""))
+        return "".join(latin).capitalize()
+
+    def _letters_confidence(self, token: str) -> float:
+        """Confidence of a letter rendering, lower when consecutive consonants hide short vowels."""
+        hidden = sum(
+            first not in LONG_VOWELS and second not in LONG_VOWELS for first, second in zip(token, token[1:])
+        )
+        return 0.6 if hidden == 0 else 0.4
+
+    def _token(self, token: str) -> tuple[str, float]:
+        """Returns the transliteration of a folded token and its confidence."""
+        if token in self.PARTICLE:
+            return self.PARTICLE[token], 1.0
+        known = self._known(token)
+        if known:
+            return known, 1.0
+        if token.startswith("عبد") and len(token) > 3:
+            # abd- compound written as one token, e.g. عبدالله, عبدالرحمن
+            return self._abd(token[3:])
+        if token.startswith("ال") and len(token) > 3:
+            # article glued to the name, e.g. الهاشمي
+            inner, confidence = self._token(token[2:])
+            return f"Al-{inner}", confidence
+        return self._letters(token), self._letters_confidence(token)
+
+    def _abd(self, divine: str) -> tuple[str, float]:
+        """Returns the transliteration of abd- followed by ``divine``, with or without its article."""
+        if divine in ("الله", "لله"):
+            return "Abdullah", 1.0
+        name = divine[2:] if divine.startswith("ال") else divine
+        if name in self.DIVINE:
+            return f"Abdul{self.DIVINE[name]}", 1.0
+        return f"Abdul{self._letters(name).lower()}", self._letters_confidence(name)
+
+    def transliterate(self, name: str) -> tuple[str, float]:
+        """
+        Transliterates an Arabic personal name.
+
+        Returns:
+            tuple[str, float]: The Latin name and its confidence in [0, 1], the lowest of its tokens.
+            The confidence is 0 for a name with non-Arabic tokens.
+        """
+        tokens = [fold_arabic(token) for token in name.split()]
+        if not tokens or not all(ARABIC_TOKEN.match(token) for token in tokens):
+            return name, 0.0
+
+        latin, confidences = [], []
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            if token == "عبد" and index + 1 < len(tokens):
+                # abd- compound written as two tokens, e.g. عبد الرحمن
+                rendered, confidence = self._abd(tokens[index + 1])
+                index += 2
+            else:
+                rendered, confidence = self._token(token)
+                index += 1
+            latin.append(rendered)
+            confidences.append(confidence)
+        return " ".join(latin), min(confidences)
+
+    def resolve(self, names: list[str]) -> list[str]:
+        """
+        Transliterates the given names, counting the fast path hits.
+
+        Returns:
+            list[str]: Per name, its transliteration when confident enough, None otherwise.
+        """
+        resolved = []
+        for name in names:
+            latin, confidence = self.transliterate(name)
+            resolved.append(latin if confidence >= self.min_confidence else None)
+        hits = sum(latin is not None for latin in resolved)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(names) - hits
+        return resolved
+
+    def stats(self) -> dict:
+        """Returns the fast path hits and misses, and its hit ratio."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "min_confidence": self.min_confidence,
+        }
@@ -1,10 +1,17 @@
 import os
 from argparse import ArgumentParser, Namespace
 
+import numpy as np
+
 
 # from controllers.screeners import NameScreener
 # from controllers.translators import NameTranslator
+from controllers.consts import THRESHOLD, DEFAULT_TOP_K
+from controllers.embeddings import collapse_groups, sanction_group, sanction_name
+from controllers.handlers import NameHandler
+from controllers.pools import ShardedFuzzyPool
 from models.db import get_db_hook
+from models.models import Sanctions, SanctionAliases
 from utilities.loggings import MultipurposeLogger
 from utilities.utils import load_json_file
 
@@ -20,6 +27,53 @@ def main():
         create=True
     )
 
+    if args.prewarm_translations:
+        # Translate the Arabic customer names once, so their screening hits the shared translation cache
+        from controllers.translators import NameTranslator, translation_cache
+
+        cache = translation_cache(config, logger=logger)
+        if cache is None:
+            raise ValueError("Prewarming needs a 'translation_cache' config section.")
+        translator = NameTranslator(logger=logger, cache=cache, **config.get("translator", {}))
+        name_handler = NameHandler()
+        customers = connection.select(args.customers_query)
+        names = [
+            name for name in customers.iloc[:, 0].dropna().astype(str)
+            if name_handler.detect_language(name) == 'ar'
+        ]
+        logger.info(f"Prewarming the translations of {len(names)} Arabic customer names")
+        translated = translator.prewarm(names)
+        logger.info(f"Translated {translated} new names, translation cache stats: {cache.stats()}")
+
+    if args.customers:
+        # Arabic customer names are translated together, in length-sorted batches
+        name_handler = NameHandler()
+        arabic = [idx for idx, name in enumerate(args.customers) if name_handler.detect_language(name) == 'ar']
+        if arabic:
+            from controllers.translators import NameTranslator, translation_cache
+
+            translator = NameTranslator(
+                logger=logger, cache=translation_cache(config, logger=logger), **config.get("translator", {}),
+            )
+            for idx, translation in zip(arabic, translator.translate_batch([args.customers[idx] for idx in arabic])):
+                logger.info(f"Translated {args.customers[idx]} to {translation}")
+                args.customers[idx] = translation
+
+        # aliases are screened alongside the primary names, each sanction is reported once, by its best name
+        sanctions = factory.session.query(Sanctions).all() + factory.session.query(SanctionAliases).all()
+        names = [sanction_name(sanction) for sanction in sanctions]
+        groups = np.asarray([sanction_group(sanction) for sanction in sanctions], dtype=np.int64)
+        workers = args.workers if args.workers else config.get("screener", {}).get("fuzzy_workers")
+
+        with ShardedFuzzyPool(names, workers=workers, logger=logger) as pool:
+            results = pool.search(args.customers, score_cutoff=args.threshold)
+            for customer, (rows, scores) in zip(args.customers, results):
+                rows, scores = collapse_groups(rows, scores, groups, args.top_k)
+                print(f"{customer}: {len(rows)} potential matches")
+                for row, score in zip(rows, scores):
+                    print(f"    {score:6.2f}  {names[row]} (uid {groups[row]})")
+            logger.info(f"Fuzzy screening pool stats: {pool.stats()}")
+
     # screener = NameScreener(
     #     logger=logger,
     #     factory=factory,
@@ -79,7 +133,36 @@ def cli() -> Namespace:
         "--customers",
         type=str,
         nargs='+',
-        help="The run_for date in the format YYYYMMDD.",
+        help="The customer names to screen.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Fuzzy screening worker processes, the screener 'fuzzy_workers' or all cores by default.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=THRESHOLD,
+        help="Minimum token_sort_ratio (0-100) of a match.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help="Maximum matches printed per customer.",
+    )
+    parser.add_argument(
+        "--prewarm-translations",
+        action="store_true",
+        help="Translate and cache the Arabic names returned by --customers-query.",
+    )
+    parser.add_argument(
+        "--customers-query",
+        type=str,
+        default="SELECT full_name FROM screening.customers",
+        help="The query selecting the customer names to prewarm, from its first column.",
     )
     return parser.parse_args()
 
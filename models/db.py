@@ -572,6 +572,46 @@ class DBTablesFactory:
             self._logger.error(f"Error creating tables: {e}")
             raise e
 
+    def upgrade_tables(self, retired: Optional[dict] = None) -> list[str]:
+        """
+        Bring the existing tables in line with the models: add the model columns they are missing and
+        drop the retired ones. `create_all` only creates the missing tables, not the columns added since.
+
+        The added columns must be nullable, the rows already stored have no value for them until reloaded.
+
+        :param retired: Dictionary of table names and the columns dropped from their models.
+        :return: The executed DDL statements.
+        """
+        statements = []
+        try:
+            with self._connection.engine.begin() as conn:
+                inspector = inspect(conn)
+                preparer = conn.dialect.identifier_preparer
+                for table in self._base.metadata.sorted_tables:
+                    if not inspector.has_table(table.name, schema=table.schema):
+                        continue
+                    existing = {column['name'] for column in inspector.get_columns(table.name, schema=table.schema)}
+                    for column in table.columns:
+                        if column.name in existing:
+                            continue
+                        if not column.nullable:
+                            raise DBQueryError(f"Cannot add the non-nullable column {column.name} to {table.name}.")
+                        statements.append(
+                            f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.quote(column.name)} "
+                            f"{column.type.compile(dialect=conn.dialect)}"
+                        )
+                    for column in (retired or {}).get(table.name, ()):
+                        if column in existing:
+                            statements.append(f"ALTER TABLE {preparer.format_table(table)} "
+                                              f"DROP COLUMN {preparer.quote(column)}")
+                for statement in statements:
+                    self._logger.info(f"Upgrading table: {statement}")
+                    conn.execute(text(statement))
+        except Exception as e:
+            self._logger.error(f"Error upgrading tables: {e}")
+            raise e
+        return statements
+
     def get_table_metadata(self, table: str, schema: Optional[str] = None) -> dict:
         """Retrieve metadata for a specified table."""
         try:
@@ -650,10 +690,11 @@ def get_db_hook(config: Any, create: bool = False, logger: Optional[logging.Logg
     else:
         raise TypeError(f"Unsupported parameter type '{type(config)}' for creating a database connection.")
 
-    from models.models import BASE
+    from models.models import BASE, RETIRED_COLUMNS
     fac = DBTablesFactory(conn, base=BASE, logger=logger)
 
     if create:
         fac.create_tables()
+        fac.upgrade_tables(retired=RETIRED_COLUMNS)
 
     return conn, fac
@@ -78,18 +78,82 @@ class Sanctions(BASE):
     # name_10 = Column(String)
     # count = Column(Integer)
     search_hash = Column(String,)
+    phonetic_keys = Column(String,)  # space separated PhoneticEncoder keys of the name tokens
+    # Normalized full name computed at ingest, see NameHandler.name_fields
+    full_name = Column(String,)
+    # Arabic-script rendering of the name computed at ingest, see OFACDataProcessor.store_arabic_names
+    arabic_name = Column(String,)
     # dedup_hash = Column(BigInteger, nullable=False)
     reason = Column(String,)
     # language = Column(String, nullable=False, default=SupportedLanguage.ENGLISH.value)
 
     @validates('first_name', 'last_name', 'type')
     def validate_names(self, key, value):
-        if not value or value == np.nan or pd.isna(value):
+        if not isinstance(value, str) or not value:
             return None
-        print(value)
         return value.lower()
 
 
+# Aliases (OFAC akaList entries) of the sanctions, screened alongside their primary names
+class SanctionAliases(BASE):
+    __tablename__ = 'sanction_aliases'
+    __table_args__ = (
+        PrimaryKeyConstraint('id',),
+        Index('idx_sanction_aliases_uid', 'uid'),
+        Index('idx_sanction_aliases_sanction_uid', 'sanction_uid'),
+        {'extend_existing': True, 'schema': SCHEMA},
+    )
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    uid = Column(BigInteger, nullable=False)  # the aka uid
+    sanction_uid = Column(BigInteger, nullable=False)  # the uid of the sanction it belongs to
+    first_name = Column(String)
+    last_name = Column(String, nullable=False)
+    type = Column(String)  # a.k.a., f.k.a., n.k.a.
+    category = Column(String)  # strong or weak
+    phonetic_keys = Column(String,)
+    full_name = Column(String,)
+    arabic_name = Column(String,)
+
+    @validates('first_name', 'last_name')
+    def validate_names(self, key, value):
+        if not isinstance(value, str) or not value:
+            return None
+        return value.lower()
+
+
+# Multi-probe blocking keys of the sanctions, see NameHandler.blocking_keys
+class SanctionKeys(BASE):
+    __tablename__ = 'sanction_keys'
+    __table_args__ = (
+        PrimaryKeyConstraint('id',),
+        Index('idx_sanction_keys_key', 'key'),
+        Index('idx_sanction_keys_uid', 'uid'),
+        {'extend_existing': True, 'schema': SCHEMA},
+    )
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    uid = Column(BigInteger, nullable=False)
+    key = Column(String, nullable=False)
+
+
+# Sanctions list versions, one row per load of the list by the scraper
+class SanctionsVersions(BASE):
+    __tablename__ = 'sanctions_versions'
+    __table_args__ = (
+        PrimaryKeyConstraint('id',),
+        {'extend_existing': True, 'schema': SCHEMA},
+    )
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    version = Column(String, nullable=False)
+    count = Column(Integer)
+    loaded_at = Column(DateTime, server_default=func.now())
+
+
+# Columns dropped from the models that databases created before may still have, see DBTablesFactory.upgrade_tables
+RETIRED_COLUMNS = {
+    Sanctions.__tablename__: ("tokens", "token_count", "initials"),
+    SanctionAliases.__tablename__: ("tokens", "token_count", "initials"),
+}
+
 
 # Event listener to create partitions manually
 # DDL for Partition Creation
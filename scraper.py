@@ -20,19 +20,42 @@ def main():
 
     OFAC_XML_URL = "https://www.treasury.gov/ofac/downloads/sdn.xml"
 
+    translator = None
+    if config.get("dual_script", {}).get("enabled", False):
+        # the Arabic-script renderings of the sanctions are translated once here, not per request
+        from controllers.translators import NameTranslator, translation_cache
+
+        translator = NameTranslator(
+            logger=logger, cache=translation_cache(config, logger=logger), **config.get("translator", {}),
+        )
+
     processor = OFACDataProcessor(
         url=OFAC_XML_URL,
         connection=connection,
-        factory=factory
+        factory=factory,
+        translator=translator,
     )
 
     try:
-        df = processor.process()
-    except Exception as error:
-        print(f"Processing failed: {error}")
-
-    factory.close()
-    connection.close()
+        try:
+            processor.process()
+        except Exception as error:
+            # the stored list was rolled back, so the embeddings store is left matching it
+            logger.error(f"Processing failed: {error}")
+            raise
+
+        if config.get("screener", {}).get("store_path"):
+            logger.info(f"Updating the sanctions embeddings store.")
+            from controllers.screeners import NameScreener
+            from models.models import Sanctions, SanctionAliases
+
+            screener = NameScreener(logger=logger, **config.get("screener"))
+            screener.build_matrix(
+                factory.session.query(Sanctions).all() + factory.session.query(SanctionAliases).all()
+            )
+    finally:
+        factory.close()
+        connection.close()
 
 
 def cli() -> Namespace:
@@ -0,0 +1,113 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+transformers = pytest.importorskip("transformers")
+
+from controllers.backends import check_parity, check_translation_parity, load_encoder, load_translator
+from controllers.registry import ModelRegistry
+from controllers.translators import NameTranslator
+
+NAMES = [
+    "mohammed ali", "ahmed hassan", "abdul rahman al masri", "youssef khalid", "maria garcia lopez",
+    "ivan petrov", "nasrallah trading llc", "john smith",
+]
+ARABIC_NAMES = ["محمد علي", "أحمد حسن", "عبد الرحمن المصري", "يوسف خالد", "حداد", "فاطمة الهاشمي"]
+
+
+@pytest.fixture(scope="module")
+def encoder_model(tmp_path_factory) -> str:
+    """A small random BERT and its word piece vocabulary, saved like a downloaded model."""
+    path = str(tmp_path_factory.mktemp("encoder"))
+    words = sorted({word for name in NAMES for word in name.split()})
+    with open(os.path.join(path, "vocab.txt"), "w") as vocab:
+        vocab.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words, *"abcdefghijklmnopqrstuvwxyz"]))
+    transformers.BertTokenizer(os.path.join(path, "vocab.txt")).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=5 + len(words) + 26, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=64,
+    )
+    transformers.BertModel(config).eval().save_pretrained(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def translation_model(tmp_path_factory) -> str:
+    """A small random MarianMT model and its sentencepiece vocabularies, saved like a downloaded model."""
+    spm = pytest.importorskip("sentencepiece")
+    path = str(tmp_path_factory.mktemp("translator"))
+    corpus = os.path.join(path, "corpus.txt")
+    with open(corpus, "w") as lines:
+        lines.write("\n".join((NAMES + ARABIC_NAMES) * 10))
+    spm.SentencePieceTrainer.train(
+        input=corpus, model_prefix=os.path.join(path, "spm"), vocab_size=60, character_coverage=1.0,
+        hard_vocab_limit=False, minloglevel=2,
+    )
+    processor = spm.SentencePieceProcessor(model_file=os.path.join(path, "spm.model"))
+    vocab = {"</s>": 0, "<unk>": 1}
+    for piece in map(processor.id_to_piece, range(processor.get_piece_size())):
+        vocab.setdefault(piece, len(vocab))
+    vocab["<pad>"] = len(vocab)
+    with open(os.path.join(path, "vocab.json"), "w") as file:
+        json.dump(vocab, file, ensure_ascii=False)
+    spm_file = os.path.join(path, "spm.model")
+    transformers.MarianTokenizer(
+        vocab=os.path.join(path, "vocab.json"), source_spm=spm_file, target_spm=spm_file,
+    ).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = transformers.MarianConfig(
+        vocab_size=len(vocab), d_model=32, encoder_layers=2, decoder_layers=2, encoder_attention_heads=2,
+        decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64, max_position_embeddings=64,
+        pad_token_id=vocab["<pad>"], eos_token_id=0, decoder_start_token_id=vocab["<pad>"],
+    )
+    transformers.MarianMTModel(config).eval().save_pretrained(path)
+    return path
+
+
+@pytest.mark.parametrize("backend", ["onnx", "quantized"])
+def test_encoder_backend_parity(encoder_model, tmp_path, backend):
+    pytest.importorskip("sentence_transformers")
+    reference = load_encoder(encoder_model, backend="torch")
+    candidate = load_encoder(encoder_model, backend=backend, cache_dir=str(tmp_path))
+
+    report = check_parity(reference, candidate, NAMES)
+
+    assert report["ok"], report
+    assert report["min_self_cosine"] > 0.98
+
+
+# the dynamic int8 quantization changes the greedy choices of a random model, only the ONNX graphs are exact
+@pytest.mark.parametrize("backend", ["onnx"])
+def test_translator_backend_parity(translation_model, tmp_path, backend):
+    class Translator(NameTranslator):
+        ARABIC_MODEL_NAME = translation_model
+
+    options = dict(transliterate=False, backend_cache=str(tmp_path), max_new_tokens=8)
+    reference = Translator(device="cpu", registry=ModelRegistry(), **options)
+    candidate = Translator(backend=backend, registry=ModelRegistry(), **options)
+
+    report = check_translation_parity(reference, candidate, ARABIC_NAMES)
+
+    assert report["ok"], report
+
+
+def test_onnx_decoder_matches_generate(translation_model, tmp_path):
+    tokenizer, model = load_translator(translation_model, backend="onnx", cache_dir=str(tmp_path))
+    reference = transformers.MarianMTModel.from_pretrained(translation_model).eval()
+
+    inputs = tokenizer(ARABIC_NAMES, return_tensors="np", padding=True)
+    with torch.inference_mode():
+        expected = reference.generate(
+            **tokenizer(ARABIC_NAMES, return_tensors="pt", padding=True), num_beams=1, do_sample=False,
+            max_new_tokens=8,
+        ).numpy()
+    actual = model.generate(**inputs, max_new_tokens=8)
+
+    assert np.array_equal(actual[:, :expected.shape[1]], expected)
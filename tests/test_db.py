@@ -0,0 +1,59 @@
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("pandas")
+pytest.importorskip("cryptography")
+pytest.importorskip("OpenSSL")
+pytest.importorskip("jks")
+pytest.importorskip("urllib3")
+
+from sqlalchemy import BigInteger, create_engine, event, inspect, text
+from sqlalchemy.ext.compiler import compiles
+
+from models.db import DBTablesFactory
+from models.models import BASE, RETIRED_COLUMNS, SCHEMA, Sanctions, SanctionAliases
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER primary keys
+    return "INTEGER"
+
+
+class Connection:
+    def __init__(self, engine):
+        self.engine = engine
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda connection, _: connection.execute(f"ATTACH ':memory:' AS {SCHEMA}"))
+    yield engine
+    engine.dispose()
+
+
+def columns(engine, model) -> set:
+    return {column["name"] for column in inspect(engine).get_columns(model.__tablename__, schema=SCHEMA)}
+
+
+def test_upgrade_tables_adds_the_new_columns_and_drops_the_retired_ones(engine):
+    # the sanctions table as created before phonetic_keys, full_name and arabic_name, with the tokens columns
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE {SCHEMA}.sanctions (id INTEGER PRIMARY KEY, uid INTEGER NOT NULL, first_name VARCHAR, "
+            "last_name VARCHAR NOT NULL, type VARCHAR NOT NULL, search_hash VARCHAR, reason VARCHAR, "
+            "tokens VARCHAR, token_count INTEGER, initials VARCHAR)"
+        ))
+        conn.execute(text(f"INSERT INTO {SCHEMA}.sanctions (uid, last_name, type) VALUES (1, 'smith', 'individual')"))
+    factory = DBTablesFactory(Connection(engine), base=BASE)
+    BASE.metadata.create_all(engine, tables=[model.__table__ for model in BASE.__subclasses__()])
+
+    statements = factory.upgrade_tables(retired=RETIRED_COLUMNS)
+
+    assert columns(engine, Sanctions) == {column.name for column in Sanctions.__table__.columns}
+    assert columns(engine, SanctionAliases) == {column.name for column in SanctionAliases.__table__.columns}
+    with engine.connect() as conn:
+        assert conn.execute(text(f"SELECT uid, full_name FROM {SCHEMA}.sanctions")).all() == [(1, None)]
+    assert len(statements) == 6
+    assert factory.upgrade_tables(retired=RETIRED_COLUMNS) == []
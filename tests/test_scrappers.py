@@ -0,0 +1,89 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("requests")
+
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from controllers.scrappers import OFACDataProcessor
+from models.models import BASE, SCHEMA, Sanctions, SanctionAliases
+
+
+@compiles(BigInteger, "sqlite")
+def _sqlite_big_integer(type_, compiler, **kw):
+    # SQLite only autoincrements INTEGER primary keys
+    return "INTEGER"
+
+
+class Factory:
+    def __init__(self, session):
+        self.session = session
+
+    def commit(self):
+        self.session.flush()
+        self.session.commit()
+
+
+class Translator:
+    """Renders a name as its reversed upper-case letters, counting the names it is asked for."""
+
+    def __init__(self):
+        self.translated = []
+
+    def translate_to_arabic(self, names):
+        self.translated.extend(names)
+        return [name.upper()[::-1] for name in names]
+
+
+@pytest.fixture
+def processor():
+    engine = create_engine("sqlite://")
+    event.listen(engine, "connect", lambda connection, _: connection.execute(f"ATTACH ':memory:' AS {SCHEMA}"))
+    BASE.metadata.create_all(engine, tables=[model.__table__ for model in BASE.__subclasses__()])
+    session = sessionmaker(bind=engine)()
+    yield OFACDataProcessor(url=None, factory=Factory(session), translator=Translator())
+    session.close()
+
+
+def sdn_list():
+    # as parsed from the XML, the uids are text
+    return pd.DataFrame([
+        {"uid": "36", "firstName": "Ahmed", "lastName": "Al Masri", "sdnType": "Individual",
+         "aliases": [{"uid": "1001", "firstName": "Ahmad", "lastName": "El Masry", "type": "a.k.a.",
+                      "category": "strong"}]},
+        {"uid": "173", "firstName": "", "lastName": "Nasrallah Trading", "sdnType": "Entity", "aliases": []},
+    ])
+
+
+def test_reload_keeps_the_arabic_names(processor):
+    processor.orm_insertion(sdn_list())
+    processor.store_arabic_names()
+    session = processor.factory.session
+    stored = {row.uid: row.arabic_name for model in (Sanctions, SanctionAliases) for row in session.query(model)}
+    assert all(stored.values()) and len(stored) == 3
+
+    processor.translator.translated.clear()
+    processor.orm_insertion(sdn_list())
+    processor.store_arabic_names()
+
+    assert session.query(Sanctions).count() == 2
+    assert session.query(SanctionAliases).count() == 1
+    assert {row.uid: row.arabic_name for model in (Sanctions, SanctionAliases) for row in session.query(model)} \
+        == stored
+    assert processor.translator.translated == []
+
+
+def test_reload_translates_the_renamed_entries(processor):
+    processor.orm_insertion(sdn_list())
+    processor.store_arabic_names()
+
+    renamed = sdn_list()
+    renamed.loc[1, "lastName"] = "Nasrallah Shipping"
+    processor.translator.translated.clear()
+    processor.orm_insertion(renamed)
+    processor.store_arabic_names()
+
+    assert processor.translator.translated == ["Nasrallah Shipping"]